@@ -2,222 +2,66 @@
 Advanced LAN Network Scanner 
 """
 
+import asyncio
 import csv
 import ipaddress
 import json
-import platform
-import re
-import socket
-import subprocess
-import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import os
 from datetime import datetime
-from typing import Optional
 import sys
 import time
 
-from mac_vendor_lookup import MacLookup
-
-# Constants
-
-TOP_100_PORTS = [
-    20, 21, 22, 23, 25, 53, 67, 68, 69, 80, 110, 111, 123, 135, 137, 138, 139,
-    143, 161, 389, 443, 445, 514, 587, 631, 636, 873, 902, 989, 990, 993, 995,
-    1025, 1026, 1027, 1028, 1433, 1434, 1723, 2049, 2082, 2083, 2181, 2375,
-    2376, 2484, 2487, 3050, 3128, 3306, 3389, 3690, 4369, 5000, 5432, 5555,
-    5672, 5900, 5985, 5986, 6379, 6443, 6667, 6881, 7001, 7002, 7077, 8000,
-    8008, 8080, 8081, 8123, 8443, 8888, 9000, 9001, 9042, 9092, 9200, 9300,
-    9418, 11211, 27017, 27018, 27019, 28017,
-]
-
-PORT_SERVICES = {
-    20: "FTP-Data",    21: "FTP",          22: "SSH",          23: "Telnet",
-    25: "SMTP",        53: "DNS",          67: "DHCP",         68: "DHCP",
-    69: "TFTP",        80: "HTTP",         110: "POP3",        111: "RPC",
-    123: "NTP",        135: "MS-RPC",      137: "NetBIOS",     138: "NetBIOS",
-    139: "NetBIOS",    143: "IMAP",        161: "SNMP",        389: "LDAP",
-    443: "HTTPS",      445: "SMB",         514: "Syslog",      587: "SMTP",
-    631: "IPP",        636: "LDAPS",       873: "Rsync",       902: "VMware",
-    989: "FTPS",       990: "FTPS",        993: "IMAPS",       995: "POP3S",
-    1025: "MS-RPC",    1433: "MSSQL",      1434: "MSSQL",      1723: "PPTP",
-    2049: "NFS",       2082: "cPanel",     2083: "cPanel",     3306: "MySQL",
-    3389: "RDP",       3690: "SVN",        5000: "UPnP",       5432: "PostgreSQL",
-    5555: "ADB",       5672: "RabbitMQ",   5900: "VNC",        5985: "WinRM",
-    5986: "WinRM-SSL", 6379: "Redis",      6443: "Kubernetes", 7001: "WebLogic",
-    8000: "HTTP-Alt",  8008: "HTTP-Alt",   8080: "HTTP-Proxy", 8081: "HTTP-Alt",
-    8123: "Polipo",    8443: "HTTPS-Alt",  8888: "HTTP-Alt",   9000: "SonarQube",
-    9042: "Cassandra", 9092: "Kafka",      9200: "Elasticsearch", 9300: "Elasticsearch",
-    11211: "Memcached", 27017: "MongoDB",  27018: "MongoDB",   27019: "MongoDB",
-}
-
-ANDROID_VENDORS = {
-    "samsung", "xiaomi", "redmi", "realme", "oppo", "vivo", "oneplus",
-    "motorola", "google", "huawei", "honor", "sony", "asus", "nokia", "hmd",
-}
-
-# FIX A: MacLookup instantiated once at module level (not per-call)
-_mac_lookup = MacLookup()
-_mac_lookup_lock = threading.Lock()
-
-# Host Discovery
-
-def ping_host(ip: str) -> tuple[bool, Optional[int]]:
-    try:
-        if platform.system().lower() == "windows":
-            # FIX 1: "-n", "1" not "-n", 1
-            cmd = ["ping", "-n", "1", "-w", "500", ip]
-        else:
-            cmd = ["ping", "-c", "1", "-W", "1", ip]
-
-        result = subprocess.run(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-        )
-        output = result.stdout
-
-        # FIX 3: one case-insensitive check is enough
-        if "ttl=" in output.lower():
-            return True, extract_ttl(output)
-        return False, None
-    except Exception:
-        return False, None
-
-
-def extract_ttl(output: str) -> Optional[int]:
-    """
-    Parse TTL from ping output.
-    FIX 2: Corrected regex — 'ttl=64' had no separator between '=' and digits.
-    """
-    match = re.search(r"ttl[=:](\d+)", output, re.IGNORECASE)
-    return int(match.group(1)) if match else None
-
-
-def guess_os(ttl: Optional[int], vendor: str = "") -> str:
-    """
-    Infer OS from TTL and MAC vendor.
-    FIX 4: Check ttl >= 200 BEFORE ttl >= 128 — otherwise Network Devices
-           were always classified as Windows (200 > 128, branch was dead).
-    """
-    if ttl is None:
-        return "Unknown"
-
-    vendor = vendor.lower()
-
-    # FIX 4: highest range first
-    if ttl >= 200:
-        return "Network Device"
-    if ttl >= 128:
-        return "Windows"
-    if ttl >= 64:
-        if "apple" in vendor:
-            return "Apple (macOS/iOS)"
-        for name in ANDROID_VENDORS:
-            if name in vendor:
-                return f"Android ({name.title()})"
-        return "Linux / Unix"
-
-    return "Unknown"
+# The shared scanning package (netscan) lives next to the tool folders
+_PYTHON_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+if _PYTHON_ROOT not in sys.path:
+    sys.path.insert(0, _PYTHON_ROOT)
 
+from netscan import arp, discovery, fingerprint, governor, syn, tcp, udp
+from netscan.checkpoint import Checkpoint, default_path
+from netscan.pacing import Pacer
+from netscan.ports import PORT_SERVICES, TOP_100_PORTS, TOP_UDP_PORTS
+from netscan.results import HostResult
 
-# Host Information
-
-def get_mac(ip: str) -> Optional[dict]:
-    """
-    Read MAC from ARP table and look up vendor.
-    FIX 5: MAC regex now captures all 6 octets (was only capturing 2).
-    FIX A: Reuses global _mac_lookup instead of constructing per call.
-    """
-    try:
-        if platform.system().lower() == "windows":
-            output = subprocess.check_output(["arp", "-a", ip], text=True)
-        else:
-            output = subprocess.check_output(["arp", "-n", ip], text=True)
-
-        # FIX 5: full 6-octet pattern
-        match = re.search(
-            r"(([0-9A-Fa-f]{2}[:-]){5}[0-9A-Fa-f]{2})",
-            output,
-            re.IGNORECASE,
-        )
-        if not match:
-            return None
-
-        mac = match.group(0).replace("-", ":").upper()
-
-        try:
-            with _mac_lookup_lock:
-                vendor = _mac_lookup.lookup(mac)
-        except Exception:
-            vendor = "Unknown"
-
-        return {"mac": mac, "vendor": vendor}
-
-    except Exception:
-        return None
-
-
-def get_hostname(ip: str) -> Optional[str]:
-    try:
-        return socket.gethostbyaddr(ip)[0]
-    except Exception:
-        return None
-
-
-# Port Scanning
-
-def scan_port(ip: str, port: int, timeout: float = 0.5) -> tuple[bool, str]:
-    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    s.settimeout(timeout)
-    try:
-        result = s.connect_ex((ip, port))
-        if result != 0:
-            return False, ""
-
-        banner = ""
-        try:
-            s.send(b"\r\n")
-            banner = s.recv(1024).decode(errors="ignore").strip()
-        except Exception:
-            pass
+# Constants
 
-        return True, banner
-    except Exception:
-        return False, ""
-    finally:
-        s.close()
+PING_CONCURRENCY = 150   # echo requests in flight during the sweep
+HOST_CONCURRENCY = 10    # hosts port-scanned at once
+PORT_CONCURRENCY = 50    # connects in flight per host
+PORT_TIMEOUT = 0.8
+UDP_TIMEOUT = 1.5        # UDP services answer slower, and silence is only decided on timeout
+FINGERPRINT_CONCURRENCY = 32   # open ports being identified at once, across all hosts
 
 
 #  Phase 1: Ping Sweep
 
-def find_alive_hosts(network: str) -> list[tuple[str, Optional[int]]]:
+def find_alive_hosts(network: str, pacer: Pacer | None = None,
+                     checkpoint: Checkpoint | None = None) -> list[HostResult]:
     """
-    Ping-sweep the entire subnet in parallel.
-    Returns list of (ip, ttl) for alive hosts.
+    Ping-sweep the entire subnet concurrently (at the pacer's rate, if any).
+    MAC, vendor, hostname and OS guess are looked up for each host as it answers.
+    Addresses a resumed checkpoint has already swept are skipped, and the hosts
+    it found are returned with the new ones. Returns the alive hosts.
     """
-    net = ipaddress.ip_network(network, strict=False)
-    hosts = list(net.hosts())
+    hosts = ipaddress.ip_network(network, strict=False).hosts()
 
     print(f"\n Step 1: Finding Alive Hosts in {network}...")
     print("=" * 60)
 
-    alive: list[tuple[str, Optional[int]]] = []
+    alive: list[HostResult] = []
+    if checkpoint and checkpoint.resumed:
+        alive = [HostResult.from_dict(record) for record in checkpoint.records("sweep")]
+        hosts = (ip for ip in hosts if not checkpoint.finished(str(ip), "sweep"))
+        print(f"  Resuming: {checkpoint.count('sweep')} addresses already swept, {len(alive)} UP")
 
-    # FIX E: 150 workers is reasonable for /24 ICMP sweeps
-    with ThreadPoolExecutor(max_workers=150) as executor:
-        futures = {executor.submit(ping_host, str(ip)): str(ip) for ip in hosts}
-
-        for future in as_completed(futures):
-            ip = futures[future]
-            try:
-                is_alive, ttl = future.result()
-            except Exception:
-                continue
+    def report(host: HostResult) -> None:
+        if checkpoint and not host.error:
+            checkpoint.done(host.ip, "sweep", host.to_dict() if host.alive else None)
+        if host.alive:
+            alive.append(host)
+            print(f"  ✔  {host.ip} is UP  (TTL={host.ttl})")
 
-            if is_alive:
-                alive.append((ip, ttl))
-                print(f"  ✔  {ip} is UP  (TTL={ttl})")
+    asyncio.run(discovery.discover(hosts, timeout=1.0, concurrency=PING_CONCURRENCY, on_result=report,
+                                   pacer=pacer))
 
     print("=" * 60)
     print(f"Found {len(alive)} alive hosts\n")
@@ -226,79 +70,103 @@ def find_alive_hosts(network: str) -> list[tuple[str, Optional[int]]]:
 
 # Phase 2: Deep Scan
 
-def scan_alive_host(ip: str, ttl: Optional[int]) -> dict:
-    mac_info = get_mac(ip)
-    vendor = mac_info["vendor"] if mac_info else ""
-    os_guess = guess_os(ttl, vendor)
-    hostname = get_hostname(ip)
-
-    open_ports: list[dict] = []
-
-    # FIX F: parallel port scanning per host
-    with ThreadPoolExecutor(max_workers=50) as executor:
-        port_futures = {executor.submit(scan_port, ip, port, 0.8): port for port in TOP_100_PORTS}
-        for future in as_completed(port_futures):
-            port = port_futures[future]
-            try:
-                is_open, banner = future.result()
-            except Exception:
-                continue
-
-            if is_open:
-                open_ports.append({
-                    "port": port,
-                    "service": PORT_SERVICES.get(port, "Unknown"),
-                    "banner": banner[:50] if banner else "",
-                })
-
-    open_ports.sort(key=lambda x: x["port"])
+def host_record(host: HostResult) -> dict:
+    """Report entry for one scanned host."""
+    open_ports = [{
+        "port": p.port,
+        "proto": p.proto,
+        "service": p.service or PORT_SERVICES.get(p.port, "Unknown"),
+        "detected": p.detected,
+        "product": p.product,
+        "banner": p.banner[:50] if p.banner else "",
+    } for p in host.open_ports]
 
     return {
-        "ip": ip,
-        "hostname": hostname,
-        "ttl": ttl,
-        "os": os_guess,
-        "mac": mac_info,
+        "ip": host.ip,
+        "hostname": host.hostname,
+        "ttl": host.ttl,
+        "os": host.os or "Unknown",
+        "mac": {"mac": host.mac, "vendor": host.vendor} if host.mac else None,
         "open_ports": open_ports,
         "port_count": len(open_ports),
+        "filtered_count": sum(1 for p in host.ports if "filtered" in p.state),
     }
 
 
-def scan_alive_hosts(alive_hosts: list[tuple[str, Optional[int]]]) -> list[dict]:
-    """Run detailed scans on all alive hosts, up to 10 hosts in parallel."""
-    print(f"Step 2: Scanning {len(alive_hosts)} alive host(s) for open ports...")
-    print("=" * 60)
+async def _port_scan(host: HostResult, use_syn: bool, pacer: Pacer | None) -> list:
+    pairs = ((host.ip, port) for port in TOP_100_PORTS)
+    if not use_syn or ":" in host.ip:
+        return await tcp.scan(pairs, timeout=PORT_TIMEOUT, concurrency=PORT_CONCURRENCY, pacer=pacer)
+    return await syn.scan(pairs, timeout=PORT_TIMEOUT, pacer=pacer)
 
-    # Load/refresh the vendor list once, single-threaded, before the worker
-    # threads start hammering _mac_lookup concurrently.
-    try:
-        _mac_lookup.load_vendors()
-    except Exception:
-        pass
 
-    results: list[dict] = []
+async def _scan_hosts(alive_hosts: list[HostResult], on_host, on_error, use_syn: bool = False,
+                      use_udp: bool = False, pacer: Pacer | None = None) -> None:
+    sem = asyncio.Semaphore(HOST_CONCURRENCY)
+    # Service identification is its own stage with its own socket budget, shared by all hosts
+    fp = fingerprint.Fingerprinter(FINGERPRINT_CONCURRENCY)
 
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        futures = {
-            executor.submit(scan_alive_host, ip, ttl): ip
-            for ip, ttl in alive_hosts
-        }
-
-        for i, future in enumerate(as_completed(futures), 1):
+    async def one(host: HostResult) -> None:
+        async with sem:
             try:
-                result = future.result()
+                host.ports = await _port_scan(host, use_syn, pacer)
+                if use_udp:
+                    host.ports += await udp.scan(((host.ip, port) for port in TOP_UDP_PORTS),
+                                                 timeout=UDP_TIMEOUT, pacer=pacer)
             except Exception as exc:
-                ip = futures[future]
-                print(f"\n[{i}/{len(alive_hosts)}] {ip} — scan error: {exc}")
-                continue
-
-            results.append(result)
-            mac_str = result["mac"]["mac"] if result["mac"] else "N/A"
-            print(f"\n[{i}/{len(alive_hosts)}] Host: {result['ip']}")
-            print(f"     OS       : {result['os']}")
-            print(f"     MAC      : {mac_str}")
-            print(f"     Hostname : {result['hostname'] or 'N/A'}")
-            print(f"     Open Ports: {result['port_count']}")
+                on_error(host, exc)
+                return
+        await asyncio.gather(*(fp.identify(p) for p in host.ports if p.is_open and p.proto == "tcp"))
+        on_host(host)
+
+    await asyncio.gather(*(one(h) for h in alive_hosts))
+
+
+def scan_alive_hosts(alive_hosts: list[HostResult], use_syn: bool = False,
+                     use_udp: bool = False, pacer: Pacer | None = None,
+                     checkpoint: Checkpoint | None = None) -> list[dict]:
+    """
+    Port-scan all alive hosts, up to HOST_CONCURRENCY hosts at a time.
+    use_syn finds open ports with half-open SYNs (root / CAP_NET_RAW);
+    use_udp also probes TOP_UDP_PORTS; pacer, if given, limits the probes per
+    second across all hosts. Open TCP ports are then fingerprinted to name the
+    service actually running. Each finished host is recorded in the checkpoint,
+    and hosts a resumed checkpoint has already scanned are not scanned again.
+    """
+    print(f"Step 2: Scanning {len(alive_hosts)} alive host(s) for open ports...")
+    print("=" * 60)
+
+    results: list[dict] = []
+    done = 0
+    if checkpoint and checkpoint.resumed:
+        results = checkpoint.records("scan")
+        done = len(results)
+        alive_hosts_left = [h for h in alive_hosts if not checkpoint.finished(h.ip, "scan")]
+        if done:
+            print(f"  Resuming: {done} host(s) already scanned")
+    else:
+        alive_hosts_left = alive_hosts
+
+    def on_host(host: HostResult) -> None:
+        nonlocal done
+        done += 1
+        result = host_record(host)
+        results.append(result)
+        if checkpoint:
+            checkpoint.done(host.ip, "scan", result)
+        mac_str = result["mac"]["mac"] if result["mac"] else "N/A"
+        print(f"\n[{done}/{len(alive_hosts)}] Host: {result['ip']}")
+        print(f"     OS       : {result['os']}")
+        print(f"     MAC      : {mac_str}")
+        print(f"     Hostname : {result['hostname'] or 'N/A'}")
+        print(f"     Open Ports: {result['port_count']}  (filtered: {result['filtered_count']})")
+
+    def on_error(host: HostResult, exc: Exception) -> None:
+        nonlocal done
+        done += 1
+        print(f"\n[{done}/{len(alive_hosts)}] {host.ip} — scan error: {exc}")
+
+    asyncio.run(_scan_hosts(alive_hosts_left, on_host, on_error, use_syn, use_udp, pacer))
 
     print("\n" + "=" * 60)
     return results
@@ -306,6 +174,12 @@ def scan_alive_hosts(alive_hosts: list[tuple[str, Optional[int]]]) -> list[dict]
 
 # Display
 
+def port_label(port_info: dict) -> str:
+    """"80" for TCP ports, "53/udp" for UDP ones."""
+    proto = port_info.get("proto", "tcp")
+    return str(port_info["port"]) if proto == "tcp" else f"{port_info['port']}/{proto}"
+
+
 def display_detailed_results(results: list[dict]) -> None:
     if not results:
         print("No results to display.")
@@ -330,14 +204,16 @@ def display_detailed_results(results: list[dict]) -> None:
         if host["open_ports"]:
             print("│   OPEN PORTS:")
             print("│   " + "─" * 70)
-            print("│   {:<8}  {:<20}  {:<40}".format("PORT", "SERVICE", "BANNER"))
+            print("│   {:<10}  {:<20}  {:<38}".format("PORT", "SERVICE", "PRODUCT / BANNER"))
             print("│   " + "─" * 70)
 
             for port_info in host["open_ports"]:
-                port    = port_info["port"]
-                service = port_info["service"]
-                banner  = port_info["banner"][:38] if port_info["banner"] else ""
-                print(f"│   {port:<8}  {service:<20}  {banner:<40}")
+                port    = port_label(port_info)
+                # "?" marks a conventional guess for a TCP port that didn't identify itself
+                guessed = port_info["proto"] == "tcp" and not port_info["detected"]
+                service = port_info["service"] + ("?" if guessed else "")
+                banner  = (port_info["product"] or port_info["banner"] or "")[:38]
+                print(f"│   {port:<10}  {service:<20}  {banner:<38}")
         else:
             print("│   No open ports detected.")
 
@@ -402,7 +278,7 @@ def save_results(results: list[dict]) -> None:
     with open(csv_file, "w", newline="", encoding="utf-8") as cf:
         writer = csv.writer(cf)
         writer.writerow(["IP", "Hostname", "OS", "TTL", "MAC", "Vendor",
-                         "Total Ports", "Port", "Service", "Banner"])
+                         "Total Ports", "Port", "Service", "Product", "Banner"])
 
         for r in results:
             mac_val    = r["mac"]["mac"]    if r["mac"] else ""
@@ -413,12 +289,12 @@ def save_results(results: list[dict]) -> None:
                     writer.writerow([
                         r["ip"], r["hostname"] or "", r["os"], r["ttl"],
                         mac_val, vendor_val, r["port_count"],
-                        p["port"], p["service"], p["banner"],
+                        p["port"], p["service"], p["product"], p["banner"],
                     ])
             else:
                 writer.writerow([
                     r["ip"], r["hostname"] or "", r["os"], r["ttl"],
-                    mac_val, vendor_val, 0, "", "", "",
+                    mac_val, vendor_val, 0, "", "", "", "",
                 ])
 
     # Summary CSV (one row per host)
@@ -432,7 +308,7 @@ def save_results(results: list[dict]) -> None:
             mac_val    = r["mac"]["mac"]    if r["mac"] else ""
             vendor_val = r["mac"]["vendor"] if r["mac"] else ""
             # FIX 6: p["port"] not p["ports"]
-            ports_list = ", ".join(str(p["port"]) for p in r["open_ports"])
+            ports_list = ", ".join(port_label(p) for p in r["open_ports"])
             writer.writerow([
                 r["ip"], r["hostname"] or "", r["os"],
                 mac_val, vendor_val, r["port_count"], ports_list,
@@ -448,15 +324,40 @@ def save_results(results: list[dict]) -> None:
 
 # Orchestrator
 
-def scan_subnet(network: str) -> list[dict]:
-    """Two-phase scan: (1) ping sweep → (2) deep scan of alive hosts only."""
-    alive_hosts = find_alive_hosts(network)
-
-    if not alive_hosts:
-        print("No alive hosts found.")
-        return []
+def scan_subnet(network: str, use_syn: bool = False, use_udp: bool = False,
+                pacer: Pacer | None = None, checkpoint: str | None = None,
+                resume: bool = False) -> list[dict]:
+    """
+    Two-phase scan: (1) ping sweep → (2) deep scan of alive hosts only.
+    Progress is checkpointed to `checkpoint` (default scan_<network>.checkpoint)
+    every few seconds and on Ctrl+C, and removed once the scan completes;
+    resume=True carries on from an interrupted scan's checkpoint.
 
-    results = scan_alive_hosts(alive_hosts)
+    Raises:
+        ValueError: if the checkpoint to resume belongs to a different scan
+    """
+    net = str(ipaddress.ip_network(network, strict=False))
+    ck = Checkpoint(checkpoint or default_path("scan", net),
+                    {"tool": "advanced_lan_scanner", "network": net, "syn": use_syn, "udp": use_udp},
+                    resume)
+    # Make room for every connect the deep scan can have in flight; the governor queues the rest
+    governor.raise_nofile(HOST_CONCURRENCY * PORT_CONCURRENCY + FINGERPRINT_CONCURRENCY + governor.RESERVE)
+    # Load/refresh the vendor list once, before lookups start running concurrently
+    arp.load_vendors()
+    try:
+        alive_hosts = find_alive_hosts(network, pacer, ck)
+
+        if not alive_hosts:
+            print("No alive hosts found.")
+            ck.remove()
+            return []
+
+        results = scan_alive_hosts(alive_hosts, use_syn, use_udp, pacer, ck)
+    except KeyboardInterrupt:
+        ck.save()
+        print(f"\n Interrupted - progress saved to {ck.path}; run again with --resume to continue")
+        raise
+    ck.remove()
     display_detailed_results(results)
     return results
 
@@ -468,23 +369,65 @@ if __name__ == "__main__":
     print("║" + " " * 20 + "LAN NETWORK SCANNER - DETAILED PORT VIEW" + " " * 18 + "║")
     print("╚" + "═" * 78 + "╝")
 
-    if len(sys.argv) < 2:
+    args = [a for a in sys.argv[1:] if a not in ("--syn", "--udp", "--resume")]
+    use_syn = "--syn" in sys.argv[1:]
+    use_udp = "--udp" in sys.argv[1:]
+    resume = "--resume" in sys.argv[1:]
+    pacer = None
+    checkpoint = None
+    if "--checkpoint" in args:
+        # --checkpoint FILE: where progress is saved (default scan_<network>.checkpoint)
+        i = args.index("--checkpoint")
+        if i + 1 >= len(args):
+            print("\n --checkpoint needs a file name")
+            sys.exit(1)
+        checkpoint = args[i + 1]
+        del args[i:i + 2]
+    if "--rate" in args:
+        # --rate N: probes per second for the sweep and the port scans together, shared fairly per host
+        i = args.index("--rate")
+        try:
+            pacer = Pacer(float(args[i + 1]))
+        except (IndexError, ValueError):
+            print("\n --rate needs a positive number of probes per second")
+            sys.exit(1)
+        del args[i:i + 2]
+    if not args:
         print("\n Usage:")
-        print("   python advanced_lan_scanner.py <network/prefix>")
+        print("   python advanced_lan_scanner.py <network/prefix> [--syn] [--udp] [--rate N] "
+              "[--resume] [--checkpoint FILE]")
         print("\n Examples:")
         print("   python advanced_lan_scanner.py 192.168.1.0/24")
-        print("   python advanced_lan_scanner.py 10.0.0.0/24")
+        print("   python advanced_lan_scanner.py 10.0.0.0/24 --syn   (half-open scan; root / CAP_NET_RAW)")
+        print("   python advanced_lan_scanner.py 10.0.0.0/24 --udp   (also probe common UDP services)")
+        print("   python advanced_lan_scanner.py 10.0.0.0/24 --rate 200   (at most 200 probes per second)")
+        print("   python advanced_lan_scanner.py 10.0.0.0/16 --resume     (continue an interrupted scan)")
+        sys.exit(1)
+    if use_syn and not syn.available():
+        print("\n --syn needs root or CAP_NET_RAW")
         sys.exit(1)
 
-    network = sys.argv[1]
+    network = args[0]
     start_time = time.time()
 
-    results = scan_subnet(network)
+    try:
+        results = scan_subnet(network, use_syn, use_udp, pacer, checkpoint, resume)
+    except ValueError as e:
+        print(f"\n Cannot scan {network}: {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        sys.exit(130)
     elapsed = time.time() - start_time
 
     if results:
         display_statistics(results)
         save_results(results)
+        if pacer and pacer.achieved:
+            print(f"\n   Probe rate           : {pacer.achieved:,.0f}/s achieved (limit {pacer.rate:g}/s, "
+                  f"{pacer.sent} probes)")
+        pressure = governor.GOVERNOR.summary()
+        if pressure:
+            print(f"\n   Socket back-pressure : {pressure}")
         print("\n" + "=" * 80)
         print(f"   SCAN COMPLETED in {elapsed:.2f} seconds")
         print("=" * 80)
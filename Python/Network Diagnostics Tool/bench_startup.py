@@ -0,0 +1,88 @@
+"""
+Startup-time benchmark for netdiag_cli.
+
+Measures, in fresh interpreters, how long `import netdiag_cli` adds on top of
+a bare `python -c pass` (median of --runs), shows the slowest modules from
+`-X importtime`, and checks that importing the CLI loads none of the optional
+dependencies and that a --json run never imports rich. Exits 1 when the
+import overhead is over --budget-ms or a heavy module sneaks in.
+
+    python bench_startup.py
+    python bench_startup.py --budget-ms 60 --runs 20 --top 15
+"""
+import argparse, json, os, statistics, subprocess, sys, time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HEAVY = ("rich", "psutil", "requests", "speedtest", "mac_vendor_lookup")
+
+JSON_RUN = """
+import io, json, runpy, sys, contextlib
+sys.argv = ["netdiag_cli.py", "--host", "127.0.0.1", "--route", "--json", "--no-cache"]
+with contextlib.redirect_stdout(io.StringIO()):
+    runpy.run_path("netdiag_cli.py", run_name="__main__")
+print(json.dumps([m for m in %r if m in sys.modules]))
+""" % (HEAVY,)
+
+
+def _wall(code: str, runs: int) -> float:
+    """Median wall time in ms of `python -c code` over runs."""
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=HERE, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def _importtime(module: str):
+    """(cumulative_us, module) pairs from -X importtime, slowest first."""
+    p = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                       cwd=HERE, capture_output=True, text=True, check=True)
+    rows = []
+    for line in p.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self, cumulative, name = (x.strip() for x in line[len("import time:"):].split("|"))
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)
+
+
+def _loaded(code: str):
+    p = subprocess.run([sys.executable, "-c", code], cwd=HERE, capture_output=True, text=True)
+    if p.returncode != 0:
+        return None, p.stderr.strip().splitlines()[-1:] or ["failed"]
+    return json.loads(p.stdout.strip().splitlines()[-1]), None
+
+
+def main():
+    ap = argparse.ArgumentParser(description="netdiag_cli startup benchmark")
+    ap.add_argument("--runs", type=int, default=10, help="Interpreter launches per measurement (default: 10)")
+    ap.add_argument("--budget-ms", type=float, default=100, help="Allowed import overhead in ms (default: 100)")
+    ap.add_argument("--top", type=int, default=10, help="Slowest modules to list (default: 10)")
+    args = ap.parse_args()
+
+    bare = _wall("pass", args.runs)
+    cli = _wall("import netdiag_cli", args.runs)
+    overhead = cli - bare
+    print(f"python -c pass        {bare:8.1f} ms")
+    print(f"import netdiag_cli    {cli:8.1f} ms  (+{overhead:.1f} ms, budget {args.budget_ms:.0f} ms)")
+
+    print("\nSlowest imports (cumulative):")
+    for us, name in _importtime("netdiag_cli")[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    failed = overhead > args.budget_ms
+    on_import, err = _loaded("import netdiag_cli, sys, json; print(json.dumps([m for m in %r if m in sys.modules]))" % (HEAVY,))
+    print(f"\nOptional deps loaded by import: {on_import if err is None else err}")
+    failed |= bool(on_import) or err is not None
+    on_json, err = _loaded(JSON_RUN)
+    print(f"Optional deps loaded by a --json run: {on_json if err is None else err}")
+    failed |= "rich" in (on_json or []) or err is not None
+
+    print("\nFAIL" if failed else "\nOK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,608 @@
-import argparse, json
-from netdiag_core import run_all, port_scan
-from typing import List
-from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
-from rich import box
-console = Console()
-
-def parse_ports(s: str) -> List[int]:
-    if not s: return []
-    ports = s.split(","); out = set()
-    for p in ports:
-        p = p.strip()
-        if "-" in p:
-            a, b = p.split("-", 1); out.update(range(int(a), int(b)+1))
+from __future__ import annotations
+import argparse, json, logging, os, sys, time
+from typing import TYPE_CHECKING, Any, Dict
+
+if TYPE_CHECKING:
+    from rich.panel import Panel
+    from rich.table import Table
+
+# The shared scanning package (netscan) lives next to the tool folders
+_PYTHON_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+if _PYTHON_ROOT not in sys.path:
+    sys.path.insert(0, _PYTHON_ROOT)
+
+
+class _LazyConsole:
+    """Stands in for rich's Console and imports rich on first use, so --json runs never load it."""
+
+    def __init__(self, **kwargs):
+        self._kwargs = kwargs
+        self._console = None
+
+    def __getattr__(self, name):
+        if self._console is None:
+            from rich.console import Console
+            self._console = Console(**self._kwargs)
+        return getattr(self._console, name)
+
+
+console = _LazyConsole()
+
+
+def section_table():
+    from rich.table import Table
+    from rich import box
+    return Table(show_header=True, header_style="bold cyan", box=box.SIMPLE)
+
+def parse_size(s: str) -> float:
+    # "100M" -> 100e6, "64K" -> 64e3, "1.5G" -> 1.5e9
+    s = s.strip().upper()
+    mult = {"K": 1e3, "M": 1e6, "G": 1e9}.get(s[-1:], 1)
+    return float(s[:-1] if mult != 1 else s) * mult
+
+
+def monitor_table(snap) -> Table:
+    from rich.table import Table
+    from rich import box
+    table = Table(
+        title=f"[bold cyan]Path to {snap.get('host')}[/bold cyan] [dim](round {snap.get('round')})[/dim]",
+        show_header=True, header_style="bold cyan", box=box.SIMPLE
+    )
+    table.add_column("Hop", style="white", width=5)
+    table.add_column("Address", style="cyan", width=18)
+    table.add_column("Loss %", width=8)
+    table.add_column("Sent", style="dim", width=6)
+    table.add_column("Last", style="green", width=8)
+    table.add_column("Avg", style="green", width=8)
+    table.add_column("Best", style="dim", width=8)
+    table.add_column("Worst", style="dim", width=8)
+    table.add_column("StDev", style="dim", width=8)
+    table.add_column("p95", style="yellow", width=8)
+
+    def fmt(v):
+        return "-" if v is None else f"{v:.1f}"
+
+    for hop in snap.get("hops", []):
+        loss = hop.get("loss_percent", 0.0)
+        loss_color = "green" if loss == 0 else "yellow" if loss < 10 else "red"
+        table.add_row(
+            str(hop["hop"]), hop.get("address") or "???",
+            f"[{loss_color}]{loss:.1f}%[/{loss_color}]", str(hop.get("sent", 0)),
+            fmt(hop.get("rtt_last")), fmt(hop.get("rtt_avg")), fmt(hop.get("rtt_min")),
+            fmt(hop.get("rtt_max")), fmt(hop.get("rtt_stdev")), fmt(hop.get("rtt_p95"))
+        )
+    return table
+
+
+def render_sections(report: Dict[str, Any], only=None):
+    """Print the Rich section for every check in report (or only the named ones)."""
+    def show(key):
+        return report.get(key) and (only is None or key in only)
+
+    # Ping results
+    if show("ping"):
+        console.print("[bold cyan]🔵 PING TEST[/bold cyan]")
+        console.print("[dim]" + "-" * 60 + "[/dim]")
+        p = report["ping"]
+        if "error" in p:
+            console.print(f"   [red]x ERROR: {p['error']}[/red]")
+        else:
+            loss = p.get("loss", "N/A")
+            avg = p.get("avg", "N/A")
+            min_rtt = p.get("min", "N/A")
+            max_rtt = p.get("max", "N/A")
+
+            if loss == 0.0:
+                status_color = "green"
+                status_icon = "✓"
+            elif loss < 50:
+                status_color = "yellow"
+                status_icon = "⚠"
+            else:
+                status_color = "red"
+                status_icon = "x"
+            
+            console.print(f"   [{status_color}]{status_icon} Status: {'Reachable' if loss < 100 else 'Unreachable'}[/{status_color}]")
+            console.print(f"   Packet Loss: [{status_color}]{loss}%[/{status_color}]")
+            console.print(f"   Average RTT: [cyan]{avg} ms[/cyan]")
+            if min_rtt != "N/A" and max_rtt != "N/A":
+                console.print(f"   RTT Range: [dim]{min_rtt} - {max_rtt} ms[/dim]")
+        console.print()
+
+    # Pathping
+    if show("pathping"):
+        console.print("[bold cyan] 🛣️  PATHPING (Advanced Route Diagnostics)[/bold cyan]")
+        console.print("[dim]" + "-" * 60 + "[/dim]")
+        pp = report["pathping"]
+
+        if "error" in pp:
+            console.print(f"    [red]✗ Error: {pp['error']}[/red]")
+        elif pp.get("success"):
+            console.print(f"   [green]✓[/green] Analysis Complete")
+            console.print(f"   Target: [white]{pp.get('host')}[/white]")
+
+            if "resolved_ip" in pp and pp["resolved_ip"]:
+                console.print(f"   Resolved IP: [cyan]{pp['resolved_ip']}[/cyan]")
+
+            console.print(f"   Total Hops: [white]{pp.get('total_hops', 'N/A')}[/white]\n")
+
+            if "hops" in pp and pp["hops"]:
+                console.print("   [bold]Hop Statistics:[/bold]")
+
+                table = section_table()
+                table.add_column("Hop", style="white", width=5)
+                table.add_column("Address", style="cyan", width=18)
+                table.add_column("Loss %", style="yellow", width=8)
+                table.add_column("Sent", style="dim", width=6)
+                table.add_column("Lost", style="dim", width=6)
+                table.add_column("RTT (ms)", style="green", width=15)
+
+                for hop in pp["hops"]:
+                    hop_num = str(hop.get("hop", "?"))
+                    address = hop.get("address", "N/A")[:18]
+                    loss_pct = hop.get("loss_percent", "N/A")
+                    sent = str(hop.get("sent", "N/A"))
+                    lost = str(hop.get("lost", "N/A"))
+
+                    if "rtt_avg" in hop:
+                        rtt_min = hop.get("rtt_min", "?")
+                        rtt_avg = hop.get("rtt_avg", "?")
+                        rtt_max = hop.get("rtt_max", "?")
+                        rtt_str = f"{rtt_min} / {rtt_avg} / {rtt_max}"
+                    else:
+                        rtt_str = "N/A"
+
+                    if isinstance(loss_pct, (int, float)):
+                        if loss_pct == 0:
+                            loss_color = "green"
+                        elif loss_pct < 10:
+                            loss_color = "yellow"
+                        else:
+                            loss_color = "red"
+                        loss_display = f"[{loss_color}]{loss_pct}%[/{loss_color}]"
+                    else:
+                        loss_display = str(loss_pct)
+                    table.add_row(hop_num, address, loss_display, sent, lost, rtt_str)
+
+                console.print(table)
+                if "note" in pp:
+                    console.print(f"\n   [dim]Note: {pp['note']}[/dim]")
+            if "raw" in pp and len(pp["raw"]) < 2000:
+                console.print("\n   [bold]Raw Output:[/bold]")
+                console.print(f"   [dim]{pp['raw'][:500]}[/dim]")
+        console.print("\n")
+    
+    #DNS
+    if show("dns"):
+        console.print("[bold cyan]🌐 DNS LOOKUP[/bold cyan]")
+        console.print("[dim]" + "-" * 60 + "[/dim]")
+        dns = report["dns"]
+        if "error" in dns:
+            console.print(f"   [red]x ERROR: {dns['error']}[/red]")
+        else:
+            addresses = dns.get("addresses", [])
+            if addresses:
+                console.print(f"   [green]✓[/green] IP Addresses:")
+                for idx, addr in enumerate(addresses, 1):
+                    console.print(f"   {idx}. [white]{addr}[/white]")
+            else:
+                console.print("   [yellow]⚠ No addresses found[/yellow]")
+            
+            if "mx" in dns and dns["mx"]:
+                console.print(f"\n  [green]✓[/green] MX Records:")
+                for idx, mx in enumerate(dns["mx"], 1):
+                    console.print(f"   {idx}. [white]{mx}[/white]")
+
+            for key, label in (("ipv6", "AAAA Records"), ("ns", "NS Records"),
+                               ("cname", "CNAME"), ("txt", "TXT Records")):
+                if dns.get(key):
+                    console.print(f"\n  [green]✓[/green] {label}:")
+                    for idx, value in enumerate(dns[key], 1):
+                        console.print(f"   {idx}. [white]{value}[/white]")
+
+            if "resolve_time_ms" in dns:
+                note = " (cached)" if dns.get("cached") else ""
+                console.print(f"\n   [dim]Resolved in {dns['resolve_time_ms']} ms{note}[/dim]")
+        console.print()
+
+    #HTTP
+    if show("http"):
+        console.print("[bold cyan]📡 HTTP CHECK[/bold cyan]")
+        console.print("[dim]" + "-" * 60 + "[/dim]")
+        http = report["http"]
+        if "error" in http:
+            console.print(f"[red]x ERROR: {http['error']}[/red]")
+        else:
+            status = http.get("status", "N/A")
+            latency = http.get("latency_ms", "N/A")
+
+            if status < 300:
+                status_color = "green"
+                status_icon = "✓"
+            elif status < 400:
+                status_color = "yellow"
+                status_icon = "↻"
+            else:
+                status_color = "red"
+                status_icon = "x"
+            console.print(f"   [{status_color}]{status_icon} Status Code: {status}[/{status_color}]")
+            if isinstance(latency, (int, float)):
+                console.print(f"   Response Time: [cyan]{latency: .2f} ms[/cyan]")
+
+            headers = http.get("headers", {})
+            if headers:
+                console.print(f"\n   [bold]Key Headers:[/bold]")
+                important_headers = ["Server", "Content-Type", "Content-Length"]
+                for h in important_headers:
+                    if h in headers:
+                        console.print(f"   {h}: [dim]{headers[h]}[/dim]")
+        console.print()
+               
+    # SSL
+    if show("ssl"):
+        console.print("[bold cyan]🔒 SSL/TLS CERTIFICATE[/bold cyan]")
+        console.print("[dim]" + "-" * 60 + "[/dim]")
+        ssl = report["ssl"]
+        if "error" in ssl:
+            console.print(f"  [red]✗ Error: {ssl['error']}[/red]")
+        else:
+            console.print(f"   [green]✓[/green] Certificate Found")
+            subject = ssl.get("subject", "N/A")
+            if subject != "N/A" and isinstance(subject, tuple):
+                for item in subject:
+                    for key, value in item:
+                        if key == "commonName":
+                            console.print(f"   Common Name: [white]{value}[/white]")
+            issuer = ssl.get("issuer", "N/A")
+            if issuer != "N/A" and isinstance(issuer, tuple):
+                for item in subject:
+                    for key, value in item:
+                        if key == "oragnizationsName":
+                            console.print(f"   Issuere: [white]{value}[/white]")
+            not_before = ssl.get("notBefore", "N/A")
+            not_after = ssl.get("notAfter", "N/A")
+            console.print(f"   Valid From: [dim]{not_before}[/dim]")
+            console.print(f"   Valid Until: [cyan]{not_after}[/cyan]")
+        console.print("\n")
+
+    # Speedtest
+    if show("speed"):
+        console.print("[bold cyan]⚡ INTERNET SPEED TEST[/bold cyan]")
+        console.print("[dim]" + "-" * 60 + "[/dim]")
+        s = report["speed"]
+        if "error" in s:
+            console.print(f"  [red]✗ Error: {s['error']}[/red]")
+            if "install_hint" in s:
+                console.print(f"   yellow]💡 Hint: {s['install_hint']}[/yellow]")
+        else:
+            download = s.get("download", "N/A")
+            upload = s.get("upload", "N/A")
+            latency = s.get("latency", "N/A")
+            server = s.get("server", "N/A")
+            console.print(f"   [green]✓[/green] Speed Test Complete")
+            console.print(f"   Download: [bold green]{download} Mbps[/bold green]")
+            console.print(f"   Upload: [bold blue]{download} Mbps[/bold blue]")
+            console.print(f"   Latency: [cyan]{latency} ms[/cyan]")
+            console.print(f"   Server: [dim]{server}[/dim]")
+        console.print("\n")
+    
+    # Port Scan
+    if show("ports"):
+        console.print("[bold cyan] 🔍 PORT SCAN RESULTS[/bold cyan]")
+        console.print("[dim]" + "-" * 60 + "[/dim]")
+        ports_data = report["ports"]
+        if "error" in ports_data:
+            console.print(f"   [red]✗ Error: {ports_data['error']}[/red]")
+        else:
+            open_ports = [p for p, info in ports_data.items() if info["state"] == "open"]
+            closed_ports = [p for p, info in ports_data.items() if info["state"] == "closed"]
+            filtered_ports = [p for p, info in ports_data.items() if "filtered" in info["state"]]
+
+            console.print(f"   Total Ports Scanned: [white]{len(ports_data)}[/white]")
+            console.print(f"   [green]Open:[/green] {len(open_ports)}")
+            console.print(f"   [red]Closed:[/red] {len(closed_ports)} [dim](refused)[/dim]")
+            console.print(f"   [yellow]Filtered:[/yellow] {len(filtered_ports)} [dim](no answer / unreachable)[/dim]\n")
+
+            if open_ports:
+                console.print("    [bold]Open Ports:[/bold]")
+
+                table = section_table()
+                table.add_column("Port", style="green", width=10)
+                table.add_column("State", style="green", width=12)
+                table.add_column("Latency", justify="right", width=10)
+                table.add_column("Service", style="dim")
+
+                for port in sorted(open_ports, key=int)[:20]:  # Show first 20
+                    info = ports_data[port]
+                    latency = f"{info['latency_ms']:.1f} ms" if info.get("latency_ms") is not None else "-"
+                    service = info.get("service", "")
+                    if info.get("product"):
+                        service += f"  [white]{info['product']}[/white]"
+                    elif "detected" in info and not info["detected"]:
+                        service += "?"
+                    table.add_row(str(port), "OPEN", latency, service)
+                console.print(table)
+
+                if len(open_ports) > 20:
+                    console.print(f"   [dim]... and {len(open_ports) - 20} more open ports[/dim]")
+        console.print("\n")
+
+    # Traceroute
+    if show("traceroute"):
+        console.print("[bold cyan]🗺️  TRACEROUTE[/bold cyan]")
+        console.print("[dim]" + "-" * 60 + "[/dim]")
+        tr = report["traceroute"]
+
+        if "error" in tr:
+            console.print(f"   [red]✗ Error: {tr['error']}[/red]")
+        else:
+            raw = tr.get("raw", "N/A")
+            lines = raw.split("/n")
+
+            for line in lines[:25]:
+                if line.strip():
+                    console.print(f"[dim]{line}[/dim]")
+            
+            if len(lines) > 25:
+                console.print(f"   [dim]... ({len(lines) - 25} more hops)[/dim]")
+        console.print("\n")
+
+    # Open Connections
+    if show("conns"):
+        console.print("[bold cyan]🔗 OPEN CONNECTIONS[/bold cyan]")
+        console.print("[dim]" + "─" * 60 + "[/dim]")
+        conns = report["conns"]
+        
+        if "error" in conns:
+            console.print(f"  [red]✗ Error: {conns['error']}[/red]")
+        elif isinstance(conns, list):
+            console.print(f"  Total Connections: [white]{len(conns)}[/white]\n")
+            
+            # Show first 15 connections
+            if conns:
+                table = section_table()
+                table.add_column("Local Address", style="cyan", width=22)
+                table.add_column("Remote Address", style="yellow", width=22)
+                table.add_column("Status", style="green", width=12)
+                table.add_column("PID", style="dim", width=8)
+                
+                for conn in conns[:15]:
+                    laddr = conn.get("laddr", "N/A")
+                    raddr = conn.get("raddr", "N/A")
+                    status = conn.get("status", "N/A")
+                    pid = str(conn.get("pid", "N/A"))
+                    table.add_row(laddr, raddr, status, pid)
+                
+                console.print(table)
+                
+                if len(conns) > 15:
+                    console.print(f"  [dim]... and {len(conns) - 15} more connections[/dim]")
+            else:
+                console.print("  [yellow]No connections found[/yellow]")
+        elif "raw" in conns:
+            console.print(f"  [dim]{conns['raw'][:500]}[/dim]")
+        console.print()
+
+    # Socket inventory
+    if show("sockets"):
+        console.print("[bold cyan]🔌 SOCKET SUMMARY[/bold cyan]")
+        console.print("[dim]" + "─" * 60 + "[/dim]")
+        socks = report["sockets"]
+
+        if "error" in socks:
+            console.print(f"  [red]✗ Error: {socks['error']}[/red]")
+        else:
+            console.print(f"  Total Sockets: [white]{socks.get('count', 0)}[/white]")
+            console.print(f"  Remote Hosts: [white]{socks.get('remote_hosts', 0)}[/white]\n")
+
+            table = section_table()
+            table.add_column("State", style="green", width=14)
+            table.add_column("Count", style="white", width=10)
+            for state, count in socks.get("by_state", {}).items():
+                table.add_row(state, str(count))
+            console.print(table)
+
+            if socks.get("by_remote"):
+                console.print("  [bold]Top Remote Hosts:[/bold]")
+                table = section_table()
+                table.add_column("Remote Address", style="yellow", width=40)
+                table.add_column("Sockets", style="white", width=10)
+                for r in socks["by_remote"]:
+                    table.add_row(r["raddr"], str(r["count"]))
+                console.print(table)
+        console.print()
+
+    # ARP
+    if show("arp"):
+        arp = report["arp"]
+        if "error" in arp:
+            console.print(f"\n[bold red]❌ ARP Table Error:[/bold red] {arp['error']}")
+        elif "entries" in arp:
+            entries = arp["entries"]
+            if entries:
+                console.print(f"\n[bold cyan] ARP Table ({arp.get('count', len(entries))} enries):[/bold cyan]")
+                console.print("[dim]" + "-" * 70 + "[/dim]")
+                console.print(f"{'IP Address': <18} {'Mac Address': <20} {'Interface': <12} {'State': <10}")
+                console.print("[dim]" + "-" * 70 + "[/dim]")
+                for entry in entries:
+                    ip = entry.get('ip') or 'N/A'
+                    mac = entry.get('mac') or 'N/A'
+                    iface = entry.get('iface') or 'N/A'
+                    state = entry.get('state') or entry.get('type') or 'N/A'
+                    console.print(f"[yellow]{ip:<18}[/yellow] [cyan]{mac:<20}[/cyan] [green]{iface:<12}[/green] [dim]{state:<10}[/dim]")
+            else:
+               console.print("[red]ARP Table: No entries found (cache may be empty)[/red]")
+        elif "raw" in arp:
+            console.print(f"\n[bold cyan]ARP Table (raw output):[/bold cyan]")
+            console.print("[dim]" + "-" * 60 + "[/dim]")
+            console.print(f"[dim]{arp['raw']}[/dim]")
+        console.print("\n")
+    
+    # Interfaces
+    if show("interfaces"):
+        iface = report["interfaces"]
+        if "error" in iface:
+            console.print(f"Interfaces: [red]{iface['error']}[/red]")
+        elif "raw" in iface:
+            console.print(f"\n[bold cyan] Network Interfaces [/ bold cyan]")
+            console.print(f"[dim]{iface['raw'][:1000]}[/dim]")
         else:
-            out.add(int(p))
-    return sorted(out)
+            console.print("[bold cyan]Network Interfaces:[/ bold cyan]")
+            console.print("[dim]" + "-" * 80 + "[/dim]")
+            for name, fields in iface.items():
+                is_up = fields.get("isup", False)
+                status_icon = "🟢" if is_up else "🔴"
+                status_text = "[green]UP[/green]" if is_up else "[red]DOWN[/red]"
+                console.print(f"\n{status_icon} [bold yellow]{name}[/bold yellow] - {status_text}")
+
+                addresses = fields.get("addresses", [])
+                if addresses:
+                    console.print("   [bold]Addresses:[/bold]")
+                    for idx, addr in enumerate(addresses, 1):
+                        if isinstance(addr, dict):
+                            family = addr.get("family", "N/A")
+                            ip = addr.get("addr", "N/A")
+                            netmask = addr.get("netmask", "N/A")
+
+                            if "AF_INET" in str(family) and "AF_INET6" not in str(family):
+                                console.print(f"   {idx}. [cyan]IPv4:[/cyan] [white]{ip}[/white] [dim]Netmask[/dim]")
+                            elif "AF_INET6" in str(family):
+                                console.print(f"   {idx}. [magenta]IPv6:[/magenta] [white]{ip}[/white]")
+                            elif "AF_LINK" in str(family) or "AF_PACKET" in str(family):
+                                console.print(f"   {idx}. [blue]MAC:[/blue] [white]{ip}[/white]")
+                            else:
+                                console.print(f"   {idx}. [dim]{family}:[/dim] [white]{ip}[/white]")
+                else:
+                    console.print("   [dim]No Addresses assigned[/dim]")
+            console.print("\n[dim]" + "-" * 80 + "[/dim]")
+        console.print("\n")
+
+    # Interface rates
+    if show("iface_rates"):
+        console.print("[bold cyan]📈 INTERFACE RATES[/bold cyan]")
+        console.print("[dim]" + "-" * 60 + "[/dim]")
+        rates = report["iface_rates"]
+
+        if "error" in rates:
+            console.print(f"   [red]✗ Error: {rates['error']}[/red]")
+        else:
+            console.print(f"   Window: [white]{rates['duration']}s[/white] ([dim]{rates['samples']} samples every {rates['interval']}s[/dim])\n")
+
+            def mbps(v):
+                return f"{v * 8 / 1e6:.2f}"
+
+            table = section_table()
+            table.add_column("Interface", style="yellow", width=12)
+            table.add_column("RX Mbps (cur/p95/peak)", style="green", width=24)
+            table.add_column("TX Mbps (cur/p95/peak)", style="blue", width=24)
+            table.add_column("Pkts/s RX/TX", style="white", width=16)
+            table.add_column("Err/Drop", style="red", width=10)
+            table.add_column("Util p95", style="cyan", width=9)
+            for name, r in rates["interfaces"].items():
+                rx, tx = r["rx_bytes_per_s"], r["tx_bytes_per_s"]
+                util = r.get("utilisation_p95_percent")
+                table.add_row(
+                    name,
+                    f"{mbps(rx['current'])}/{mbps(rx['p95'])}/{mbps(rx['peak'])}",
+                    f"{mbps(tx['current'])}/{mbps(tx['p95'])}/{mbps(tx['peak'])}",
+                    f"{r['rx_packets_per_s']['current']:.0f}/{r['tx_packets_per_s']['current']:.0f}",
+                    f"{r['rx_errors'] + r['tx_errors']}/{r['rx_drops'] + r['tx_drops']}",
+                    f"{util}%" if util is not None else "N/A"
+                )
+            console.print(table)
+        console.print("\n")
+
+    # Routing Table
+    if show("route"):
+        console.print("[bold cyan]🛣️   ROUTING TABLE[/bold cyan]")
+        console.print("[dim]" + "-" * 60 + "[/dim]")
+
+        route_data = report["route"]
+
+        if "error" in route_data:
+            console.print(f"   [red]✗ Error: {route_data['error']}[/red]")
+
+        elif route_data.get("success"):
+            total = route_data.get("total_routes", 0)
+            console.print(f"   [green]✓[/green] Routing table retrieved")
+            console.print(f"   Command: [dim]{route_data.get('command', 'N/A')}[/dim]")
+            console.print(f"   Total Routes: [white]{total}[/white]\n")
+            
+            if route_data.get("parsed_routes"):
+                console.print("   [bold]Active Routes:[/bold]")
+
+                table = section_table()
+                table.add_column("Destination", style="green", width=18)
+                table.add_column("Gateway", style="green", width=18)
+                table.add_column("Interface", style="yellow", width=18)
+                table.add_column("Metric", style="dim", width=18)
+
+                # Show first 20
+                for route in route_data["parsed_routes"][:20]:
+                    dest = route.get("destination") or "N/A"
+                    gateway = route.get("gateway") or "on-link"
+                    iface = route.get("interface") or "N/A"
+                    metric = route.get("metric", "N/A")
+
+                    # Truncate long values
+                    if len(dest) > 17:
+                        dest = dest[:17]
+                    if len(gateway) > 17:
+                        gateway = gateway[:17]
+                    if len(iface) > 17:
+                        iface = iface[:17]
+
+                    table.add_row(dest, gateway, iface, str(metric))
+
+                console.print(table)
+                if total > 20:
+                    console.print(f"   [dim]... and {total - 20} more routes[/dim]")
+            else:
+                # Fallback: show raw output
+                console.print("\n   [bold]Raw Output:[/bold]")
+                raw_lines = route_data.get("raw", "").split("\n")
+                for line in raw_lines[:30]:
+                    if line.strip():
+                        console.print(f"   [dim]{line}[/dim]")
+                if len(raw_lines) > 30:
+                    console.print(f"   [dim]... ({len(raw_lines) - 30}) more lines[/dim]")
+        console.print("\n")
+
+
+def host_panel(report: Dict[str, Any]) -> Panel:
+    from rich.panel import Panel
+    from rich import box
+    return Panel(
+        f"[bold]Host:[/bold] {report.get('host', 'N/A')}\n"
+        f"[bold]IP Address:[/bold] {report.get('ip', 'N/A')}\n"
+        f"[bold]Timestamp:[/bold] {report.get('time', 'N/A')}"
+        + ("\n[bold]Cached:[/bold] [dim]" + ", ".join(f"{k} ({age:.0f}s old)" for k, age in report["cached"].items())
+           + "[/dim]" if report.get("cached") else "")
+        + ("\n[bold]Timed out:[/bold] [red]" + ", ".join(report["timed_out"]) + "[/red]"
+           if report.get("timed_out") else "")
+        + ("\n[bold]Back-pressure:[/bold] [yellow]" + fd_note(report["fd_governor"]) + "[/yellow]"
+           if report.get("fd_governor") else "")
+        + (f"\n[bold]Probe rate:[/bold] [dim]{report['pacing']['achieved_pps']}/s achieved "
+           f"(limit {report['pacing']['rate']:g}/s)[/dim]" if report.get("pacing") else ""),
+        title="[bold cyan]Target Information[/bold cyan]",
+        border_style="cyan",
+        box=box.ROUNDED
+    )
+
+
+def fd_note(gov: Dict[str, Any]) -> str:
+    # Socket back-pressure from netscan's descriptor governor: the scan slowed down instead of losing ports
+    parts = [f"fd limit {gov['ceiling']}, peak {gov['peak']}"]
+    if gov["waits"]:
+        parts.append(f"{gov['waits']} waits")
+    parts += [f"{name} x{n}" for name, n in sorted(gov["pressure"].items())]
+    return ", ".join(parts)
+
+
+def print_footer():
+    console.print("[bold cyan]═══════════════════════════════════════════════════════════[/bold cyan]")
+    console.print("[bold cyan]                    Diagnostics Complete                   [/bold cyan]")
+    console.print("[bold cyan]═══════════════════════════════════════════════════════════[/bold cyan]\n")
 
 
 def main():
@@ -26,21 +612,79 @@ def main():
     p.add_argument("--sweep", help="Network sweep (CIDR notation, e.g., 192.168.1.0/24, 10.0.0.0/16)")
     p.add_argument("--sweep-timeout", type=int, default=1, help="Ping timeout for sweep (default: 1s)")
     p.add_argument("--sweep-workers", type=int, default=50, help="Concurrent workers for sweep (default: 50)")
+    p.add_argument("--rate", type=float, help="Maximum probes per second for --sweep and --ports (default: unpaced)")
+    p.add_argument("--burst", type=float, help="Probes allowed back to back under --rate (default: rate/20, at least 1)")
     p.add_argument("--traceroute", action="store_true", help="Run traceroute")
-    p.add_argument("--dns", action="store_true", help="Perform DNS lookup")
+    p.add_argument("--dns", action="store_true", help="Perform DNS lookup (A, AAAA, MX, NS, TXT, CNAME)")
     p.add_argument("--http", action="store_true", help="Check HTTP connectivity")
     p.add_argument("--arp", action="store_true", help="Show ARP table")
     p.add_argument("--ssl", action="store_true", help="Check SSL/TLS certificate")
     p.add_argument("--ports", help="Port scan (e.g., 22,80,443,8000-8100)")
+    p.add_argument("--syn", action="store_true", help="Half-open SYN scan for --ports (root / CAP_NET_RAW, IPv4)")
+    p.add_argument("--udp", action="store_true", help="Scan --ports over UDP with service payloads (DNS, NTP, SNMP, ...)")
+    p.add_argument("--service-detect", "-sV", action="store_true", help="Identify the service on each open --ports port by probing it")
     p.add_argument("--speed", action="store_true", help="Run speedtest")
     p.add_argument("--interfaces", action="store_true", help="Show local network interfaces")
     p.add_argument("--conns", action="store_true", help="Show open connections")
+    p.add_argument("--iface-rates", type=float, default=0, help="Sample interface throughput/error rates for N seconds")
+    p.add_argument("--iface-interval", type=float, default=1.0, help="Sampling interval for --iface-rates (default: 1s)")
+    p.add_argument("--sockets", action="store_true", help="Socket summary by state and remote host (Linux /proc fast path)")
+    p.add_argument("--sock-state", help="Only count sockets in these states (e.g., ESTABLISHED,TIME_WAIT)")
     p.add_argument("--pathping", action="store_true", help="Run pathping (advanced route diagnostics)")
     p.add_argument("--route", action="store_true", help="Show routing table (route print)")
+    p.add_argument("--perf", action="store_true", help="Throughput test against a NetDiag perf server on --host")
+    p.add_argument("--perf-server", action="store_true", help="Run the throughput test server")
+    p.add_argument("--perf-port", type=int, default=5201, help="Perf server port (default: 5201)")
+    p.add_argument("--perf-streams", type=int, default=1, help="Parallel streams for --perf (default: 1)")
+    p.add_argument("--perf-time", type=float, default=10, help="Test duration in seconds (default: 10)")
+    p.add_argument("--perf-udp", action="store_true", help="Use UDP (reports loss and jitter)")
+    p.add_argument("--perf-rate", default="1M", help="UDP target rate in bits/s (e.g., 500M; default: 1M)")
+    p.add_argument("--perf-len", help="Bytes per write / datagram (e.g., 128K, 1400)")
+    p.add_argument("--perf-window", help="Socket buffer size (e.g., 4M)")
+    p.add_argument("--perf-zerocopy", action="store_true", help="Send TCP payload with sendfile()")
+    p.add_argument("--route-lookup", help="Show which interface/gateway carries traffic to targets (e.g., 8.8.8.8,10.0.0.5 or @targets.txt)")
+    p.add_argument("--dns-bench", nargs="?", const="", metavar="SERVERS",
+                   help="Benchmark nameservers (e.g., 1.1.1.1,8.8.8.8; default: system + public resolvers)")
+    p.add_argument("--dns-bench-names", help="Query names for --dns-bench (e.g., example.com,github.com or @names.txt)")
+    p.add_argument("--dns-bench-types", default="A", help="Record types for --dns-bench (default: A)")
+    p.add_argument("--dns-bench-rounds", type=int, default=3, help="Warm-cache rounds for --dns-bench (default: 3)")
+    p.add_argument("--dns-bench-timeout", type=float, default=2.0, help="Per-query timeout for --dns-bench (default: 2s)")
+    p.add_argument("--dns-bench-bust", action="store_true", help="Force uncached (full recursion) cold queries")
+    p.add_argument("--dns-bulk", metavar="FILE", help="Resolve every name in FILE ('-' = stdin) and write JSON lines")
+    p.add_argument("--dns-bulk-out", help="Output file for --dns-bulk results (default: stdout)")
+    p.add_argument("--dns-bulk-types", default="A", help="Record types for --dns-bulk (default: A)")
+    p.add_argument("--dns-bulk-window", type=int, default=256, help="Names in flight for --dns-bulk (default: 256)")
+    p.add_argument("--dns-bulk-timeout", type=float, default=2.0, help="Per-query timeout for --dns-bulk (default: 2s)")
+    p.add_argument("--dns-bulk-rate", type=float, help="Maximum queries per second for --dns-bulk")
+    p.add_argument("--monitor", action="store_true", help="Continuous MTR-style path monitor (Ctrl+C to stop)")
+    p.add_argument("--monitor-rounds", type=int, default=0, help="Rounds to run in monitor mode (default: 0 = until stopped)")
+    p.add_argument("--monitor-interval", type=float, default=1.0, help="Seconds between monitor rounds (default: 1)")
+    p.add_argument("--deadline", type=float, help="Overall time limit in seconds; overrunning checks are cancelled")
+    p.add_argument("--budget", help="Per-check time limits (e.g., traceroute=20,speed=30)")
+    p.add_argument("--max-procs", type=int, help="Maximum child processes (ping/traceroute/...) running at once (default: 64)")
+    p.add_argument("--max-age", type=float, help="Reuse cached dns/ssl/interfaces/route/arp results at most N seconds old (0 = refresh)")
+    p.add_argument("--no-cache", action="store_true", help="Neither read nor write the result cache")
+    p.add_argument("--cache-dir", help="Result cache directory (default: ~/.cache/netdiag)")
+    p.add_argument("--live", action="store_true", help="Show each check (or sweep host) as soon as it finishes; with --json, emit one JSON event per line")
     p.add_argument("--json", action="store_true", help="Output as JSON")
     p.add_argument("--report", help="Save report to JSON file")
     args = p.parse_args()
-    ports = parse_ports(args.ports) if args.ports else None
+    if args.rate is not None and args.rate <= 0:
+        p.error("--rate must be positive")
+    if args.iface_interval <= 0:
+        p.error("--iface-interval must be positive")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if args.max_procs:
+        import netdiag_proc
+        netdiag_proc.set_max_procs(args.max_procs)
+    from netscan.ports import parse_ports
+    if args.syn and args.udp:
+        p.error("choose one of --syn and --udp")
+    try:
+        # --udp on its own scans the common UDP services
+        ports = parse_ports(args.ports or "topudp") if args.ports or args.udp else None
+    except ValueError as e:
+        p.error(f"--ports: {e}")
     opts = {
         "ping": args.ping,
         "traceroute": args.traceroute,
@@ -52,22 +696,259 @@ def main():
         "arp": args.arp,
         "conns": args.conns,
         "pathping": args.pathping,
-        "route": args.route
+        "route": args.route,
+        "syn": args.syn,
+        "udp": args.udp,
+        "service_detect": args.service_detect,
+        "rate": args.rate,
+        "burst": args.burst,
+        "iface_rates": args.iface_rates,
+        "iface_interval": args.iface_interval,
+        "sockets": args.sockets,
+        "socket_states": [x.strip() for x in args.sock_state.split(",")] if args.sock_state else None
     }
 
-    report = run_all(args.host, opts, ports)
+    # Local throughput testing
+    if args.perf_server:
+        from netdiag_perf import perf_server
+        console.print(f"[bold cyan]⚡ Perf server listening on port {args.perf_port}[/bold cyan] [dim](Ctrl+C to stop)[/dim]")
+        try:
+            perf_server(port=args.perf_port)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if args.perf:
+        if not args.host:
+            console.print("[red]Error: --perf requires --host (a machine running --perf-server)[/red]")
+            return
+        from netdiag_perf import perf_client
+
+        def show_interval(entry):
+            if not args.json:
+                console.print(f"   [dim]{entry['second']:>3}-{entry['second'] + 1:<3}s[/dim]  "
+                              f"[cyan]{entry['bytes'] / 1e6:10.2f} MB[/cyan]  [green]{entry['mbps']:10.2f} Mbps[/green]")
+
+        if not args.json:
+            console.print(f"\n[bold cyan]⚡ THROUGHPUT TEST → {args.host}:{args.perf_port}[/bold cyan] "
+                          f"[dim]({'UDP' if args.perf_udp else 'TCP'}, {args.perf_streams} stream(s), {args.perf_time}s)[/dim]")
+            console.print("[dim]" + "-" * 60 + "[/dim]")
+        res = perf_client(
+            args.host, port=args.perf_port, streams=args.perf_streams, duration=args.perf_time,
+            udp=args.perf_udp, rate=parse_size(args.perf_rate),
+            length=int(parse_size(args.perf_len)) if args.perf_len else None,
+            window=int(parse_size(args.perf_window)) if args.perf_window else None,
+            zerocopy=args.perf_zerocopy, on_interval=show_interval
+        )
+        if args.json or args.report:
+            s = json.dumps(res, indent=2)
+            if args.report:
+                with open(args.report, "w") as f:
+                    f.write(s)
+                console.print(f"[green]✓[/green] Report saved to: [bold]{args.report}[/bold]")
+            else:
+                print(s)
+        elif "error" in res:
+            console.print(f"   [red]✗ Error: {res['error']}[/red]")
+        else:
+            console.print("[dim]" + "-" * 60 + "[/dim]")
+            console.print(f"   Sender:   [bold green]{res['sender_mbps']} Mbps[/bold green] ({res['sent_bytes'] / 1e6:.1f} MB)")
+            console.print(f"   Receiver: [bold blue]{res['receiver_mbps']} Mbps[/bold blue] ({res['received_bytes'] / 1e6:.1f} MB)")
+            if args.perf_udp:
+                console.print(f"   Loss:     [yellow]{res.get('lost_packets', 'N/A')}/{res.get('sent_packets', 'N/A')} ({res.get('loss_percent', 'N/A')}%)[/yellow]")
+                console.print(f"   Jitter:   [cyan]{res.get('jitter_ms', 'N/A')} ms[/cyan]")
+                console.print(f"   Out of order: [dim]{res.get('out_of_order', 0)}[/dim]")
+            console.print()
+        return
+
+    # Bulk DNS resolution
+    if args.dns_bulk:
+        from netscan.dns import bulk_resolve, read_names
+        out = open(args.dns_bulk_out, "w") if args.dns_bulk_out else sys.stdout
+        # Results go to stdout by default, so progress and the summary go to stderr
+        err = _LazyConsole(stderr=True)
+        last = [0.0]
+
+        def progress(line, stats):
+            now = time.time()
+            if args.dns_bulk_out and now - last[0] >= 1:
+                last[0] = now
+                err.print(f"[dim]{stats['resolved'] + stats['nxdomain'] + stats['failed']}/{stats['total']} done, "
+                          f"{stats['failed']} failed[/dim]")
+
+        try:
+            summary = bulk_resolve(read_names(args.dns_bulk), out, qtypes=args.dns_bulk_types.split(","),
+                                   window=args.dns_bulk_window, timeout=args.dns_bulk_timeout,
+                                   rate=args.dns_bulk_rate, on_result=progress)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        if "error" in summary:
+            err.print(f"[red]✗ Error: {summary['error']}[/red]")
+        else:
+            err.print(f"[green]✓[/green] {summary['total']} names in {summary['elapsed_s']}s "
+                      f"({summary['names_per_s']}/s): {summary['resolved']} resolved, "
+                      f"{summary['nxdomain']} NXDOMAIN, {summary['failed']} failed")
+        return
+
+    # Resolver latency benchmark
+    if args.dns_bench is not None:
+        from netscan.dns import benchmark_resolvers
+        names = None
+        if args.dns_bench_names:
+            if args.dns_bench_names.startswith("@"):
+                with open(args.dns_bench_names[1:]) as f:
+                    names = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+            else:
+                names = [n.strip() for n in args.dns_bench_names.split(",") if n.strip()]
+        servers = [x.strip() for x in args.dns_bench.split(",") if x.strip()] or None
+        if not args.json:
+            console.print("\n[bold cyan]⏱ DNS RESOLVER BENCHMARK[/bold cyan] [dim](running...)[/dim]")
+        bench = benchmark_resolvers(servers, names=names, qtypes=args.dns_bench_types.split(","),
+                                    rounds=args.dns_bench_rounds, timeout=args.dns_bench_timeout,
+                                    cache_bust=args.dns_bench_bust)
+        if args.json:
+            print(json.dumps(bench, indent=2))
+            return
+        if "error" in bench:
+            console.print(f"   [red]✗ Error: {bench['error']}[/red]")
+            return
+        console.print(f"[dim]{bench['names']} name(s) × {', '.join(bench['qtypes'])}, "
+                      f"1 cold + {bench['rounds']} warm round(s), {bench['elapsed_s']}s[/dim]")
+        table = section_table()
+        table.add_column("Nameserver", style="yellow", width=22)
+        table.add_column("Phase", style="dim", width=6)
+        table.add_column("p50 ms", style="green", justify="right")
+        table.add_column("p95 ms", style="green", justify="right")
+        table.add_column("p99 ms", style="green", justify="right")
+        table.add_column("Timeouts", style="red", justify="right")
+        table.add_column("Errors", style="red", justify="right")
+        table.add_column("Consistency", style="cyan", justify="right")
+        for srv in bench["servers"]:
+            for phase in ("cold", "warm"):
+                st = srv[phase]
+                cons = srv["consistency_percent"]
+                table.add_row(srv["nameserver"] if phase == "cold" else "", phase,
+                              str(st["p50_ms"] if st["p50_ms"] is not None else "N/A"),
+                              str(st["p95_ms"] if st["p95_ms"] is not None else "N/A"),
+                              str(st["p99_ms"] if st["p99_ms"] is not None else "N/A"),
+                              f"{st['timeout_rate']}%", str(st["errors"]),
+                              (f"{cons}%" if cons is not None else "N/A") if phase == "cold" else "")
+        console.print(table)
+        for srv in bench["servers"]:
+            for m in srv["mismatches"][:3]:
+                console.print(f"[yellow]⚠ {srv['nameserver']}: {m['name']} {m['type']} → "
+                              f"{', '.join(map(str, m['answer'])) or m['rcode']} (majority: {', '.join(m['majority']) or 'empty'})[/yellow]")
+        return
+
+    # Longest-prefix-match route lookup
+    if args.route_lookup:
+        from netdiag_core import route_lookup
+        if args.route_lookup.startswith("@"):
+            with open(args.route_lookup[1:]) as f:
+                targets = [line.strip() for line in f if line.strip()]
+        else:
+            targets = [t.strip() for t in args.route_lookup.split(",") if t.strip()]
+        lookup = route_lookup(targets)
+        if args.json:
+            print(json.dumps(lookup, indent=2))
+            return
+        table = section_table()
+        table.add_column("Interface", style="yellow", width=14)
+        table.add_column("Gateway", style="green", width=26)
+        table.add_column("Source", style="cyan", width=26)
+        table.add_column("Targets", style="white", width=8)
+        table.add_column("Examples", style="dim")
+        for g in lookup["groups"]:
+            table.add_row(g["interface"] or "[red]no route[/red]", g["gateway"] or "on-link",
+                          ", ".join(g["sources"]) or "N/A", str(g["count"]), ", ".join(g["targets"][:3]))
+        console.print(table)
+        if lookup["invalid"]:
+            console.print(f"[yellow]⚠ Skipped {len(lookup['invalid'])} invalid address(es): {', '.join(lookup['invalid'][:5])}[/yellow]")
+        return
+
+    # Continuous path monitor
+    if args.monitor:
+        if not args.host:
+            console.print("[red]Error: --monitor requires --host[/red]")
+            return
+        from netdiag_core import path_monitor
+        monitor = path_monitor(args.host, rounds=args.monitor_rounds, interval=args.monitor_interval)
+        try:
+            if args.json:
+                for snap in monitor:
+                    print(json.dumps(snap), flush=True)
+            else:
+                from rich.live import Live
+                with Live(console=console, refresh_per_second=4) as live:
+                    for snap in monitor:
+                        if "error" in snap:
+                            console.print(f"[red]✗ Error: {snap['error']}[/red]")
+                            break
+                        live.update(monitor_table(snap))
+                        for c in snap.get("changes", []):
+                            console.print(f"[yellow]⚠ Path change at hop {c['hop']}: {c['old'] or '???'} → {c['new']}[/yellow]")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            monitor.close()
+        return
+
     # Handle network sweep separately
     if args.sweep:
         from netdiag_core import network_sweep
         
-        console.print(f"\n[bold cyan]🔍 NETWORK SWEEP: {args.sweep}[/bold cyan]")
-        console.print("[dim]" + "─" * 60 + "[/dim]\n")
+        if not args.json:
+            console.print(f"\n[bold cyan]🔍 NETWORK SWEEP: {args.sweep}[/bold cyan]")
+            console.print("[dim]" + "─" * 60 + "[/dim]\n")
         
-        sweep_result = network_sweep(
-            args.sweep, 
-            timeout=args.sweep_timeout, 
-            workers=args.sweep_workers
-        )
+        if args.live and args.json:
+            # Newline-delimited events: one per alive host, progress once a second, then the summary
+            last = [0.0]
+
+            def on_probe(ip, alive, scanned, total):
+                if alive:
+                    print(json.dumps({"event": "alive", "ip": ip}), flush=True)
+                if time.time() - last[0] >= 1 or scanned == total:
+                    last[0] = time.time()
+                    print(json.dumps({"event": "progress", "scanned": scanned, "total": total}), flush=True)
+
+            sweep_result = network_sweep(args.sweep, timeout=args.sweep_timeout,
+                                         workers=args.sweep_workers, on_probe=on_probe,
+                                         rate=args.rate, burst=args.burst)
+            print(json.dumps({"event": "end", **sweep_result}), flush=True)
+            return
+        elif args.live:
+            from rich.progress import Progress, BarColumn, TextColumn, TimeRemainingColumn, MofNCompleteColumn
+            # Alive hosts are printed above the bar; keep the per-host log lines out of its way
+            logging.getLogger("netdiag_core").setLevel(logging.WARNING)
+            started = time.time()
+            found = [0]
+            with Progress(TextColumn("[cyan]Sweeping[/cyan]"), BarColumn(), MofNCompleteColumn(),
+                          TextColumn("[dim]{task.fields[rate]} probes/s[/dim]"),
+                          TextColumn("[green]{task.fields[alive]} alive[/green]"),
+                          TextColumn("ETA"), TimeRemainingColumn(), console=console) as progress:
+                task = progress.add_task("sweep", total=None, rate="0.0", alive=0)
+
+                def on_probe(ip, alive, scanned, total):
+                    if alive:
+                        found[0] += 1
+                        progress.console.print(f"   [green]✓[/green] [white]{ip}[/white]")
+                    rate = scanned / max(time.time() - started, 1e-6)
+                    progress.update(task, completed=scanned, total=total, rate=f"{rate:.1f}", alive=found[0])
+
+                sweep_result = network_sweep(args.sweep, timeout=args.sweep_timeout,
+                                             workers=args.sweep_workers, on_probe=on_probe,
+                                             rate=args.rate, burst=args.burst)
+            console.print()
+        else:
+            sweep_result = network_sweep(
+                args.sweep, 
+                timeout=args.sweep_timeout, 
+                workers=args.sweep_workers,
+                rate=args.rate,
+                burst=args.burst
+            )
         
         if args.json or args.report:
             s = json.dumps(sweep_result, indent=2)
@@ -89,11 +970,17 @@ def main():
                 console.print(f"[bold]Total Hosts:[/bold] [white]{total}[/white]")
                 console.print(f"[bold]Alive Hosts:[/bold] [green]{alive}[/green] ({(alive/total*100) if total else 0:.1f}%)")
                 console.print(f"[bold]Timeout:[/bold] [dim]{sweep_result['timeout']}s[/dim]")
-                console.print(f"[bold]Workers:[/bold] [dim]{sweep_result['workers']}[/dim]\n")
+                console.print(f"[bold]Workers:[/bold] [dim]{sweep_result['workers']}[/dim]")
+                if sweep_result.get("pacing"):
+                    pacing = sweep_result["pacing"]
+                    console.print(f"[bold]Rate:[/bold] [dim]{pacing['achieved_pps']} probes/s achieved "
+                                  f"(limit {pacing['rate']:g})[/dim]")
+                console.print()
                 
-                if sweep_result["alive_hosts"]:
+                # In live mode the hosts were already listed as they were found
+                if sweep_result["alive_hosts"] and not args.live:
                     console.print("[bold cyan]Alive Hosts:[/bold cyan]")
-                    table = Table(show_header=True, header_style="bold cyan", box=box.SIMPLE)
+                    table = section_table()
                     table.add_column("#", style="dim", width=5)
                     table.add_column("IP Address", style="green", width=18)
                     
@@ -101,7 +988,7 @@ def main():
                         table.add_row(str(idx), ip)
                     
                     console.print(table)
-                else:
+                elif not sweep_result["alive_hosts"]:
                     console.print("[yellow]⚠ No alive hosts found[/yellow]")
             
             console.print("[bold cyan]═" * 30 + "[/bold cyan]")
@@ -109,13 +996,75 @@ def main():
             console.print("[bold cyan]═" * 30 + "[/bold cyan]\n")
         
         return  # Exit after sweep
-    
+
     # Require --host if not doing sweep
     if not args.host:
         console.print("[red]Error: --host is required (or use --sweep for network discovery)[/red]")
         p.print_help()
         return
 
+    from netdiag_core import run_all, ResultCache, CHECK_BUDGETS
+    budgets = {}
+    for item in filter(None, (i.strip() for i in (args.budget or "").split(","))):
+        name, _, secs = (x.strip() for x in item.partition("="))
+        if name not in CHECK_BUDGETS and name != "iface_rates":
+            p.error(f"--budget: unknown check {name!r} (choose from {', '.join(sorted(CHECK_BUDGETS) + ['iface_rates'])})")
+        try:
+            budgets[name] = float(secs)
+        except ValueError:
+            p.error(f"--budget: {item!r} is not check=seconds")
+        if not budgets[name] > 0:
+            p.error(f"--budget: {name} must be a positive number of seconds")
+    cache = None if args.no_cache else ResultCache.with_disk(args.cache_dir)
+    if args.live:
+        # Render (or emit) each check the moment it finishes instead of after the slowest one
+        status = None
+        pending = set()
+
+        def on_event(ev):
+            nonlocal status
+            if args.json:
+                print(json.dumps(ev, default=str), flush=True)
+                return
+            if ev["event"] == "start":
+                console.print(host_panel(ev))
+                console.print()
+                pending.update(ev["checks"])
+                status = console.status("[dim]Running: " + ", ".join(sorted(pending)) + "[/dim]")
+                status.start()
+            elif ev["event"] == "result":
+                pending.discard(ev["check"])
+                render_sections({ev["check"]: ev["result"]})
+                status.update("[dim]Running: " + ", ".join(sorted(pending)) + "[/dim]")
+            elif ev["event"] == "end":
+                status.stop()
+                note = f"Finished in {ev['elapsed_s']}s"
+                if ev.get("timed_out"):
+                    note += f" — [red]timed out: {', '.join(ev['timed_out'])}[/red]"
+                if ev.get("cached"):
+                    note += f" — cached: {', '.join(ev['cached'])}"
+                if ev.get("pacing"):
+                    note += f" — {ev['pacing']['achieved_pps']} probes/s (limit {ev['pacing']['rate']:g})"
+                if ev.get("fd_governor"):
+                    note += " — " + fd_note(ev["fd_governor"])
+                console.print(f"[dim]{note}[/dim]")
+                print_footer()
+
+        try:
+            report = run_all(args.host, opts, ports, cache=cache, max_age=args.max_age,
+                             deadline=args.deadline, budgets=budgets, on_event=on_event)
+        finally:
+            if status:
+                status.stop()
+        if args.report:
+            with open(args.report, "w") as f:
+                f.write(json.dumps(report, indent=2))
+            if not args.json:
+                console.print(f"[green]✓[/green] Report saved to: [bold]{args.report}[/bold]")
+        return
+
+    report = run_all(args.host, opts, ports, cache=cache, max_age=args.max_age,
+                     deadline=args.deadline, budgets=budgets)
     
     if args.json or args.report:
         s = json.dumps(report, indent=2)
@@ -126,433 +1075,12 @@ def main():
         else:
             print(s)
     else:
-        host_panel = Panel(
-            f"[bold]Host:[/bold] {report.get('host', 'N/A')}\n"
-            f"[bold]IP Address:[/bold] {report.get('ip', 'N/A')}\n"
-            f"[bold]Timestamp:[/bold] {report.get('time', 'N/A')}",
-            title="[bold cyan]Target Information[/bold cyan]",
-            border_style="cyan",
-            box=box.ROUNDED
-        )
-        console.print(host_panel)
+        console.print(host_panel(report))
         console.print()
 
-        # Ping results
-        if report.get("ping"):
-            console.print("[bold cyan]🔵 PING TEST[/bold cyan]")
-            console.print("[dim]" + "-" * 60 + "[/dim]")
-            p = report["ping"]
-            if "error" in p:
-                console.print(f"   [red]x ERROR: {p['error']}[/red]")
-            else:
-                loss = p.get("loss", "N/A")
-                avg = p.get("avg", "N/A")
-                min_rtt = p.get("min", "N/A")
-                max_rtt = p.get("max", "N/A")
-
-                if loss == 0.0:
-                    status_color = "green"
-                    status_icon = "✓"
-                elif loss < 50:
-                    status_color = "yellow"
-                    status_icon = "⚠"
-                else:
-                    status_color = "red"
-                    status_icon = "x"
-                
-                console.print(f"   [{status_color}]{status_icon} Status: {'Reachable' if loss < 100 else 'Unreachable'}[/{status_color}]")
-                console.print(f"   Packet Loss: [{status_color}]{loss}%[/{status_color}]")
-                console.print(f"   Average RTT: [cyan]{avg} ms[/cyan]")
-                if min_rtt != "N/A" and max_rtt != "N/A":
-                    console.print(f"   RTT Range: [dim]{min_rtt} - {max_rtt} ms[/dim]")
-            console.print()
-
-        # Pathping
-        if report.get("pathping"):
-            console.print("[bold cyan] 🛣️  PATHPING (Advanced Route Diagnostics)[/bold cyan]")
-            console.print("[dim]" + "-" * 60 + "[/dim]")
-            pp = report["pathping"]
-
-            if "error" in pp:
-                console.print(f"    [red]✗ Error: {pp['error']}[/red]")
-            elif pp.get("success"):
-                console.print(f"   [green]✓[/green] Analysis Complete")
-                console.print(f"   Target: [white]{pp.get('host')}[/white]")
-
-                if "resolved_ip" in pp and pp["resolved_ip"]:
-                    console.print(f"   Resolved IP: [cyan]{pp['resolved_ip']}[/cyan]")
-
-                console.print(f"   Total Hops: [white]{pp.get('total_hops', 'N/A')}[/white]\n")
-
-                if "hops" in pp and pp["hops"]:
-                    console.print("   [bold]Hop Statistics:[/bold]")
-
-                    table = Table(show_header=True, header_style="bold cyan", box=box.SIMPLE)
-                    table.add_column("Hop", style="white", width=5)
-                    table.add_column("Address", style="cyan", width=18)
-                    table.add_column("Loss %", style="yellow", width=8)
-                    table.add_column("Sent", style="dim", width=6)
-                    table.add_column("Lost", style="dim", width=6)
-                    table.add_column("RTT (ms)", style="green", width=15)
-
-                    for hop in pp["hops"]:
-                        hop_num = str(hop.get("hop", "?"))
-                        address = hop.get("address", "N/A")[:18]
-                        loss_pct = hop.get("loss_percent", "N/A")
-                        sent = str(hop.get("sent", "N/A"))
-                        lost = str(hop.get("lost", "N/A"))
-
-                        if "rtt_avg" in hop:
-                            rtt_min = hop.get("rtt_min", "?")
-                            rtt_avg = hop.get("rtt_avg", "?")
-                            rtt_max = hop.get("rtt_max", "?")
-                            rtt_str = f"{rtt_min} / {rtt_avg} / {rtt_max}"
-                        else:
-                            rtt_str = "N/A"
-
-                        if isinstance(loss_pct, (int, float)):
-                            if loss_pct == 0:
-                                loss_color = "green"
-                            elif loss_pct < 10:
-                                loss_color = "yellow"
-                            else:
-                                loss_color = "red"
-                            loss_display = f"[{loss_color}]{loss_pct}%[/{loss_color}]"
-                        else:
-                            loss_display = str(loss_pct)
-                        table.add_row(hop_num, address, loss_display, sent, lost, rtt_str)
-
-                    console.print(table)
-                    if "note" in pp:
-                        console.print(f"\n   [dim]Note: {pp['note']}[/dim]")
-                if "raw" in pp and len(pp["raw"]) < 2000:
-                    console.print("\n   [bold]Raw Output:[/bold]")
-                    console.print(f"   [dim]{pp['raw'][:500]}[/dim]")
-            console.print("\n")
-        
-        #DNS
-        if report.get("dns"):
-            console.print("[bold cyan]🌐 DNS LOOKUP[/bold cyan]")
-            console.print("[dim]" + "-" * 60 + "[/dim]")
-            dns = report["dns"]
-            if "error" in dns:
-                console.print(f"   [red]x ERROR: {dns['error']}[/red]")
-            else:
-                addresses = dns.get("addresses", [])
-                if addresses:
-                    console.print(f"   [green]✓[/green] IP Addresses:")
-                    for idx, addr in enumerate(addresses, 1):
-                        console.print(f"   {idx}. [white]{addr}[/white]")
-                else:
-                    console.print("   [yellow]⚠ No addresses found[/yellow]")
-                
-                if "mx" in dns and dns["mx"]:
-                    console.print(f"\n  [green]✓[/green] MX Records:")
-                    for idx, mx in enumerate(dns["mx"], 1):
-                        console.print(f"   {idx}. [white]{mx}[/white]")
-            console.print()
+        render_sections(report)
 
-        #HTTP
-        if report.get("http"):
-            console.print("[bold cyan]📡 HTTP CHECK[/bold cyan]")
-            console.print("[dim]" + "-" * 60 + "[/dim]")
-            http = report["http"]
-            if "error" in http:
-                console.print(f"[red]x ERROR: {http['error']}[/red]")
-            else:
-                status = http.get("status", "N/A")
-                latency = http.get("latency_ms", "N/A")
-
-                if status < 300:
-                    status_color = "green"
-                    status_icon = "✓"
-                elif status < 400:
-                    status_color = "yellow"
-                    status_icon = "↻"
-                else:
-                    status_color = "red"
-                    status_icon = "x"
-                console.print(f"   [{status_color}]{status_icon} Status Code: {status}[/{status_color}]")
-                if isinstance(latency, (int, float)):
-                    console.print(f"   Response Time: [cyan]{latency: .2f} ms[/cyan]")
-
-                headers = http.get("headers", {})
-                if headers:
-                    console.print(f"\n   [bold]Key Headers:[/bold]")
-                    important_headers = ["Server", "Content-Type", "Content-Length"]
-                    for h in important_headers:
-                        if h in headers:
-                            console.print(f"   {h}: [dim]{headers[h]}[/dim]")
-            console.print()
-                   
-        # SSL
-        if report.get("ssl"):
-            console.print("[bold cyan]🔒 SSL/TLS CERTIFICATE[/bold cyan]")
-            console.print("[dim]" + "-" * 60 + "[/dim]")
-            ssl = report["ssl"]
-            if "error" in ssl:
-                console.print(f"  [red]✗ Error: {ssl['error']}[/red]")
-            else:
-                console.print(f"   [green]✓[/green] Certificate Found")
-                subject = ssl.get("subject", "N/A")
-                if subject != "N/A" and isinstance(subject, tuple):
-                    for item in subject:
-                        for key, value in item:
-                            if key == "commonName":
-                                console.print(f"   Common Name: [white]{value}[/white]")
-                issuer = ssl.get("issuer", "N/A")
-                if issuer != "N/A" and isinstance(issuer, tuple):
-                    for item in subject:
-                        for key, value in item:
-                            if key == "oragnizationsName":
-                                console.print(f"   Issuere: [white]{value}[/white]")
-                not_before = ssl.get("notBefore", "N/A")
-                not_after = ssl.get("notAfter", "N/A")
-                console.print(f"   Valid From: [dim]{not_before}[/dim]")
-                console.print(f"   Valid Until: [cyan]{not_after}[/cyan]")
-            console.print("\n")
-
-        # Speedtest
-        if report.get("speed"):
-            console.print("[bold cyan]⚡ INTERNET SPEED TEST[/bold cyan]")
-            console.print("[dim]" + "-" * 60 + "[/dim]")
-            s = report["speed"]
-            if "error" in s:
-                console.print(f"  [red]✗ Error: {s['error']}[/red]")
-                if "install_hint" in s:
-                    console.print(f"   yellow]💡 Hint: {s['install_hint']}[/yellow]")
-            else:
-                download = s.get("download", "N/A")
-                upload = s.get("upload", "N/A")
-                latency = s.get("latency", "N/A")
-                server = s.get("server", "N/A")
-                console.print(f"   [green]✓[/green] Speed Test Complete")
-                console.print(f"   Download: [bold green]{download} Mbps[/bold green]")
-                console.print(f"   Upload: [bold blue]{download} Mbps[/bold blue]")
-                console.print(f"   Latency: [cyan]{latency} ms[/cyan]")
-                console.print(f"   Server: [dim]{server}[/dim]")
-            console.print("\n")
-        
-        # Port Scan
-        if report.get("ports"):
-            console.print("[bold cyan] 🔍 PORT SCAN RESULTS[/bold cyan]")
-            console.print("[dim]" + "-" * 60 + "[/dim]")
-            ports_data = report["ports"]
-            if "error" in ports:
-                console.print(f"   [red]✗ Error: {ports_data['error']}[/red]")
-            else:
-                open_ports = [p for p, state in ports_data.items() if state]
-                closed_ports = [p for p, state in ports_data.items() if not state]
-
-                console.print(f"   Total Ports Scanned: [white]{len(ports_data)}[/white]")
-                console.print(f"   [green]Open:[/green] {len(open_ports)}")
-                console.print(f"   [red]Closed/Filtered:[/red] {len(closed_ports)}\n")
-
-                if open_ports:
-                    console.print("    [bold]Open Ports:[/bold]")
-
-                    table = Table(show_header=True, header_style="bold cyan", box=box.SIMPLE)
-                    table.add_column("Port", style="green", width=10)
-                    table.add_column("State", style="green", width=12)
-                    table.add_column("Common Service", style="dim")
-
-                    common_services = {
-                        21: "FTP", 22: "SSH", 23: "Telnet", 25: "SMTP",
-                        53: "DNS", 80: "HTTP", 110: "POP3", 143: "IMAP",
-                        443: "HTTPS", 445: "SMB", 3306: "MySQL", 3389: "RDP",
-                        5432: "PostgreSQL", 5900: "VNC", 8080: "HTTP-Alt",
-                        8443: "HTTPS-Alt", 27017: "MongoDB"
-                    }
-                    for port in sorted(open_ports)[:20]:  # Show first 20
-                        service = common_services.get(int(port), "Unknown")
-                        table.add_row(str(port), "OPEN", service)
-                    console.print(table)
-
-                    if len(open_ports) > 20:
-                        console.print(f"   [dim]... and {len(open_ports) - 20} more open ports[/dim]")
-            console.print("\n")
-
-        # Traceroute
-        if report.get("traceroute"):
-            console.print("[bold cyan]🗺️  TRACEROUTE[/bold cyan]")
-            console.print("[dim]" + "-" * 60 + "[/dim]")
-            tr = report["traceroute"]
-
-            if "error" in tr:
-                console.print(f"   [red]✗ Error: {tr['error']}[/red]")
-            else:
-                raw = tr.get("raw", "N/A")
-                lines = raw.split("/n")
-
-                for line in lines[:25]:
-                    if line.strip():
-                        console.print(f"[dim]{line}[/dim]")
-                
-                if len(lines) > 25:
-                    console.print(f"   [dim]... ({len(lines) - 25} more hops)[/dim]")
-            console.print("\n")
-
-        # Open Connections
-        if report.get("conns"):
-            console.print("[bold cyan]🔗 OPEN CONNECTIONS[/bold cyan]")
-            console.print("[dim]" + "─" * 60 + "[/dim]")
-            conns = report["conns"]
-            
-            if "error" in conns:
-                console.print(f"  [red]✗ Error: {conns['error']}[/red]")
-            elif isinstance(conns, list):
-                console.print(f"  Total Connections: [white]{len(conns)}[/white]\n")
-                
-                # Show first 15 connections
-                if conns:
-                    table = Table(show_header=True, header_style="bold cyan", box=box.SIMPLE)
-                    table.add_column("Local Address", style="cyan", width=22)
-                    table.add_column("Remote Address", style="yellow", width=22)
-                    table.add_column("Status", style="green", width=12)
-                    table.add_column("PID", style="dim", width=8)
-                    
-                    for conn in conns[:15]:
-                        laddr = conn.get("laddr", "N/A")
-                        raddr = conn.get("raddr", "N/A")
-                        status = conn.get("status", "N/A")
-                        pid = str(conn.get("pid", "N/A"))
-                        table.add_row(laddr, raddr, status, pid)
-                    
-                    console.print(table)
-                    
-                    if len(conns) > 15:
-                        console.print(f"  [dim]... and {len(conns) - 15} more connections[/dim]")
-                else:
-                    console.print("  [yellow]No connections found[/yellow]")
-            elif "raw" in conns:
-                console.print(f"  [dim]{conns['raw'][:500]}[/dim]")
-            console.print()
-
-        # ARP
-        if report.get("arp"):
-            arp = report["arp"]
-            if "error" in arp:
-                console.print(f"\n[bold red]❌ ARP Table Error:[/bold red] {arp['error']}")
-            elif "entries" in arp:
-                entries = arp["entries"]
-                if entries:
-                    console.print(f"\n[bold cyan] ARP Table ({arp.get('count', len(entries))} enries):[/bold cyan]")
-                    console.print("[dim]" + "-" * 70 + "[/dim]")
-                    console.print(f"{'IP Address': <18} {'Mac Address': <20} {'Interface': <12} {'State': <10}")
-                    console.print("[dim]" + "-" * 70 + "[/dim]")
-                    for entry in entries:
-                        ip = entry.get('ip', 'N/A')
-                        mac = entry.get('mac', 'N/A')
-                        iface = entry.get('iface', 'N/A')
-                        state = entry.get('state', entry.get('type', 'N/A'))
-                        console.print(f"[yellow]{ip:<18}[/yellow] [cyan]{mac:<20}[/cyan] [green]{iface:<12}[/green] [dim]{state:<10}[/dim]")
-                else:
-                   console.print("[red]ARP Table: No entries found (cache may be empty)[/red]")
-            elif "raw" in arp:
-                console.print(f"\n[bold cyan]ARP Table (raw output):[/bold cyan]")
-                console.print("[dim]" + "-" * 60 + "[/dim]")
-                console.print(f"[dim]{arp['raw']}[/dim]")
-            console.print("\n")
-        
-        # Interfaces
-        if report.get("interfaces"):
-            iface = report["interfaces"]
-            if "error" in iface:
-                console.print(f"Interfaces: [red]{iface['error']}[/red]")
-            elif "raw" in iface:
-                console.print(f"\n[bold cyan] Network Interfaces [/ bold cyan]")
-                console.print(f"[dim]{iface['raw'][:1000]}[/dim]")
-            else:
-                console.print("[bold cyan]Network Interfaces:[/ bold cyan]")
-                console.print("[dim]" + "-" * 80 + "[/dim]")
-                for name, fields in iface.items():
-                    is_up = fields.get("isup", False)
-                    status_icon = "🟢" if is_up else "🔴"
-                    status_text = "[green]UP[/green]" if is_up else "[red]DOWN[/red]"
-                    console.print(f"\n{status_icon} [bold yellow]{name}[/bold yellow] - {status_text}")
-
-                    addresses = fields.get("addresses", [])
-                    if addresses:
-                        console.print("   [bold]Addresses:[/bold]")
-                        for idx, addr in enumerate(addresses, 1):
-                            if isinstance(addr, dict):
-                                family = addr.get("family", "N/A")
-                                ip = addr.get("addr", "N/A")
-                                netmask = addr.get("netmask", "N/A")
-
-                                if "AF_INET" in str(family) and "AF_INET6" not in str(family):
-                                    console.print(f"   {idx}. [cyan]IPv4:[/cyan] [white]{ip}[/white] [dim]Netmask[/dim]")
-                                elif "AF_INET6":
-                                    console.print(f"   {idx}. [magenta]IPv6:[/magenta] [white]{ip}[/white]")
-                                elif "AF_LINK" in str(family) or "AF_PACKET" in str(family):
-                                    console.print(f"   {idx}. [blue]IPv6:[/blue] [white]{ip}[/white]")
-                                else:
-                                    console.print(f"   {idx}. [dim]{family}:[/dim] [white]{ip}[/white]")
-                    else:
-                        console.print("   [dim]No Addresses assigned[/dim]")
-                console.print("\n[dim]" + "-" * 80 + "[/dim]")
-            console.print("\n")
-
-            # Routing Table
-            if report.get("route"):
-                console.print("[bold cyan]🛣️   ROUTING TABLE[/bold cyan]")
-                console.print("[dim]" + "-" * 60 + "[/dim]")
-
-                route_data = report["route"]
-
-                if "error" in route_data:
-                    console.print(f"   [red]✗ Error: {route_data['error']}[/red]")
-
-                elif route_data.get("success"):
-                    total = route_data.get("total_routes", 0)
-                    console.print(f"   [green]✓[/green] Routing table retrieved")
-                    console.print(f"   Command: [dim]{route_data.get('command', 'N/A')}[/dim]")
-                    console.print(f"   Total Routes: [white]{total}[/white]\n")
-                    
-                    if route_data.get("parsed_routes"):
-                        console.print("   [bold]Active Routes:[/bold]")
-
-                        table = Table(show_header=True, header_style="bold cyan", box=box.SIMPLE)
-                        table.add_column("Destination", style="green", width=18)
-                        table.add_column("Gateway", style="green", width=18)
-                        table.add_column("Interface", style="yellow", width=18)
-                        table.add_column("Metric", style="dim", width=18)
-
-                        # Show first 20
-                        for route in route_data["parese_routes"][:-1]:
-                            dest = route.get("destination", "N/A")
-                            gateway = route.get("gateway", "N/A")
-                            iface = route.get("interface", "N/A")
-                            metric = route.get("metric", "N/A")
-
-                            # Truncate long values
-                            if len(dest) > 17:
-                                dest = dest[::] 
-                            if len(gateway) > 17:
-                                gateway = gateway[::]
-                            if len(iface) > 17:
-                                iface = iface[::] 
-
-                            table.add_row(dest, gateway, iface, str(metric))
-
-                        console.print(table)
-                        if total > 20:
-                            console.print(f"   [dim]... and {total - 20} more routes[\dim]")
-                    else:
-                        # Fallback: show raw output
-                        console.print("\n   [bold]Raw Output:[/bold]")
-                        raw_lines = route_data.get("raw", "").split("\n")
-                        for line in raw_lines[:30]:
-                            if line.strip():
-                                console.print(f"   [dim]{line}[/dim]")
-                        if len(raw_lines) > 30:
-                            console.print(f"   [dim]... ({len(raw_lines) - 30}) more lines[/dim]")
-                console.print("\n")
-
-        # Footer
-        console.print("[bold cyan]═══════════════════════════════════════════════════════════[/bold cyan]")
-        console.print("[bold cyan]                    Diagnostics Complete                   [/bold cyan]")
-        console.print("[bold cyan]═══════════════════════════════════════════════════════════[/bold cyan]\n")
+        print_footer()
 
 
 if __name__ == "__main__":
@@ -3,103 +3,181 @@ Core network diagnostics engine.
 Provides functions used by CLI, GUI, Monitor, API, Reporter.
 """
 from __future__ import annotations
-import platform, subprocess, re, socket, json, shutil, time, asyncio
+import platform, re, socket, json, shutil, time, os, threading
+import concurrent.futures
 from datetime import datetime
-from typing import List, Dict, Any, Optional
-import logging, ipaddress
+from typing import List, Dict, Any, Optional, Iterator
+import importlib, logging, ipaddress, sys
+import netdiag_proc
+
+# The shared scanning package (netscan) lives next to the tool folders
+_PYTHON_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+if _PYTHON_ROOT not in sys.path:
+    sys.path.insert(0, _PYTHON_ROOT)
+from netscan import arp, dns, icmp, syn, tcp, udp
+from netscan.governor import GOVERNOR
+from netscan.pacing import Pacer
 
-try:
-    import psutil
-except Exception:
-    psutil = None
+LOG = logging.getLogger("netdiag_core")
 
-try:
-    import dns.resolver
-except Exception:
-    dns = None
+# Optional dependencies (psutil, requests) are imported on first use, not at import time
+_OPTIONAL: Dict[str, Any] = {}
 
-try:
-    import requests
-except Exception:
-    requests = None
 
-LOG = logging.getLogger("netdiag_core")
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+def _optional(name: str):
+    """Import an optional module once; None if it isn't installed."""
+    if name not in _OPTIONAL:
+        try:
+            _OPTIONAL[name] = importlib.import_module(name)
+        except Exception:
+            _OPTIONAL[name] = None
+    return _OPTIONAL[name]
 
 def which(cmd: str):
     # Use shutil.which to search for 'cmd' in the system PATH
     # Returns full path to the command if found, otherwise None
     return shutil.which(cmd)
 
-def run_cmd(cmd, timeout=30):
+# Cancellation
+class CheckScope:
+    """
+    Deadline and cleanup registry for one check running in its own thread.
+    run_cmd() clamps its timeout to the scope's remaining budget and registers
+    child processes; sockets can be registered too. cancel() kills every
+    registered process group and closes every registered socket, which
+    unblocks the check's thread.
+    """
+
+    def __init__(self, name: str, expires: Optional[float] = None):
+        self.name = name
+        self.expires = expires            # time.monotonic() value, or None for no limit
+        self.cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._resources: List[Any] = []
+
+    def remaining(self) -> Optional[float]:
+        if self.expires is None:
+            return None
+        return max(0.0, self.expires - time.monotonic())
+
+    def register(self, resource):
+        with self._lock:
+            if not self.cancelled.is_set():
+                self._resources.append(resource)
+                return resource
+        _release(resource)
+        return resource
+
+    def unregister(self, resource):
+        with self._lock:
+            if resource in self._resources:
+                self._resources.remove(resource)
+
+    def cancel(self):
+        self.cancelled.set()
+        with self._lock:
+            resources, self._resources = self._resources, []
+        for r in resources:
+            _release(r)
+
+
+def _release(resource):
+    if isinstance(resource, concurrent.futures.Future):
+        # A queued or running netdiag_proc command; cancelling kills its process group
+        resource.cancel()
+        return
+    try:
+        # shutdown() wakes a thread blocked in recv(); close() alone may not
+        resource.shutdown(socket.SHUT_RDWR)
+    except (OSError, AttributeError):
+        pass
+    try:
+        resource.close()
+    except Exception:
+        pass
+
+
+_scope_local = threading.local()
+
+
+def current_scope() -> Optional[CheckScope]:
+    return getattr(_scope_local, "scope", None)
+
+
+def cancelled() -> bool:
+    scope = current_scope()
+    return bool(scope and scope.cancelled.is_set())
+
+
+def cancellable_sleep(seconds: float):
+    # Like time.sleep(), but returns as soon as the current check is cancelled
+    scope = current_scope()
+    if scope:
+        scope.cancelled.wait(seconds)
+    else:
+        time.sleep(seconds)
+
+
+def run_cmd(cmd, timeout=30, on_line=None):
     # Define a function 'run_cmd' to execute a shell/CLI command.
     # 'cmd' is the command to run (as a list, e.g. ['ping', '8.8.8.8']).
-    # 'timeout' is the maximum allowed time in seconds (default 30).
+    # 'timeout' is the maximum allowed time in seconds (default 30),
+    # shortened to whatever budget the calling check has left.
+    # 'on_line' optionally receives each stdout line as the tool prints it.
+    # The process itself runs on netdiag_proc's shared event loop.
+    scope = current_scope()
+    if scope:
+        if scope.cancelled.is_set():
+            return -1, "", "cancelled"
+        left = scope.remaining()
+        if left is not None:
+            timeout = min(timeout, left)
+    job = netdiag_proc.submit(cmd, timeout=timeout, on_line=on_line)
+    if scope:
+        scope.register(job)
     try:
-        p = subprocess.run(
-            cmd,                       # The command list
-            stdout=subprocess.PIPE,    # Capture standard output
-            stderr=subprocess.PIPE,    # Capture standard error
-            text=True,                 # Return output as string (not bytes)
-            timeout=timeout            # Max seconds before forced kill
-        )
         # Return tuple: (exit code, stdout, stderr), trimming whitespace.
-        return p.returncode, p.stdout.strip(), p.stderr.strip()
-    except subprocess.TimeoutExpired:
-        # If command takes too long, indicate timeout occurred
-        return -1, "", "timeout"
+        return job.result()
+    except concurrent.futures.CancelledError:
+        return -1, "", "cancelled"
     except Exception as e:
-        # For any other error, return error message as stderr
+        # For any other error (e.g. command not found), return error message as stderr
         return -1, "", str(e)
+    finally:
+        if scope:
+            scope.unregister(job)
     
 # Ping
 def ping_host(host: str, count: int = 4, timeout: int=2) -> Dict[str, Any]:
-    import ipaddress
     system = platform.system().lower()
     if system == "windows":
-        try:
-            ip = None
-            try:
-                ip = str(ipaddress.ip_address(host))
-            except ValueError:
-                ip = socket.gethostbyname(host)
-            host_arg = ip
-        except Exception:
-            host_arg = host
+        addrs = dns.resolve_host(host)
+        host_arg = addrs[0] if addrs else host
         cmd = ["ping", "-n", str(count), "-w", str(timeout*1000), host_arg]
     else:
         cmd = ["ping", "-c", str(count), "-W", str(timeout), host]
     rc, out, err = run_cmd(cmd, timeout=(count*timeout*5))
     res = {"host": host, "rc": rc, "raw": out or err}
-    m = re.search(r"(\d+)% packet loss", out) or re.search(r"Lost = \d+ \((\d+)% loss\)", out)
-    if m:
-        res["loss"] = float(m.group(1))
-    else:
-        res["loss"] = None
+    parsed = icmp.parse_ping_output(out)
+    res["loss"] = parsed["loss"]
+    if parsed["loss"] is None:
         res["parse_error"] = "Could not parse packet loss"
         res["ping_output"] = out
-    # Existing Linux-style regex first...
-    m2 = re.search(r"min/avg/max(?:/mdev)? = ([\d\.]+)/([\d\.]+)/([\d\.]+)", out)
-    if m2:
-        res.update({"min":float(m2.group(1)), "avg":float(m2.group(2)), "max":float(m2.group(3))})
-    else:
-        # Windows-style: "Average = Xms"
-        avg_match = re.search(r"Average = (\d+)ms", out)
-        if avg_match:
-            res["avg"] = float(avg_match.group(1))
-        else:
-            res["avg"] = None
+    if parsed["min"] is not None:
+        res.update({"min": parsed["min"], "max": parsed["max"]})
+    res["avg"] = parsed["avg"]
     return res
 
 # Traceroute
-def traceroute(host: str, max_hops: int=30, timeout: int=2) -> Dict[str, Any]:
+def traceroute(host: str, max_hops: int=30, timeout: int=2, on_line=None) -> Dict[str, Any]:
+    # on_line receives each hop line as traceroute prints it
     import ipaddress
     system = platform.system().lower()
 
     try:
         ip = str(ipaddress.ip_address(host))
         host_arg = ip
-    except ValueError:
+    except (OSError, ValueError):
         host_arg = host
 
     if system == "windows":
@@ -111,74 +189,86 @@ def traceroute(host: str, max_hops: int=30, timeout: int=2) -> Dict[str, Any]:
             cmd = ["tracepath", host_arg]
         else:
             return {"host": host, "error": "no traceroute available"}
-    rc, out, err = run_cmd(cmd, timeout=60)
+    rc, out, err = run_cmd(cmd, timeout=60, on_line=on_line)
     return {"host": host, "raw": out or err}
 
-async def _tcp_check(host: str, port: int, timeout: float=0.8):
-    loop = asyncio.get_event_loop()
-    try:
-        fut = loop.create_connection(lambda: asyncio.Protocol(), host, port)
-        conn = await asyncio.wait_for(fut, timeout=timeout)
-        try:
-            transport, proto = conn
-            transport.close()
-        except Exception:
-            pass
-        return port, True
-    except Exception:
-        return port, False
-    
-async def _port_scan_async(host: str, ports: List[int], concurrency: int=200, timeout :float=0.8):
-    sem = asyncio.Semaphore(concurrency)
-    results = {}
-    async def worker(p):
-        async with sem:
-            port, ok = await _tcp_check(host, p, timeout)
-            results[port] = ok
-    await asyncio.gather(*[worker(p) for p in ports])
-    return results
-
 # Port Scan
-def port_scan(host: str, ports: List[int], concurrency: int=200, timeout: float=0.8) -> Dict[int, bool]:
+def port_scan(host: str, ports: List[int], concurrency: int=200, timeout: float=0.8,
+              use_syn: bool=False, use_udp: bool=False, detect: bool=False,
+              pacer: Optional[Pacer]=None) -> Dict[int, Dict[str, Any]]:
+    # One non-blocking connect per port on netscan's TCP engine; stops early if the check is cancelled.
+    # use_syn sends half-open SYNs from one raw socket instead (root / CAP_NET_RAW, IPv4);
+    # use_udp scans UDP with service payloads, where only a reply counts as open.
+    # detect fingerprints the open TCP ports (netscan.fingerprint) instead of guessing from the number.
+    # pacer (netscan.pacing) caps the probes per second for any of the three engines.
+    # Each port maps to {"state": open/closed/filtered (UDP: open|filtered), "latency_ms", ["service"]}
+    # plus "detected", "product" and "banner" for open ports when detect is set
     try:
-        return asyncio.run(_port_scan_async(host, ports, concurrency, timeout))
-    except Exception:
-        out = {}
-        for p in ports:
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            s.settimeout(timeout)
-            try:
-                s.connect((host, p)); out[p] = True
-            except Exception:
-                out[p] = False
-            try:
-                s.close()
-            except:
-                pass
-        return out
+        if use_udp:
+            results = udp.scan_ports(host, ports, timeout=max(timeout, 1.0), stop=cancelled, pacer=pacer)
+        elif use_syn:
+            results = syn.scan_ports(host, ports, timeout=timeout, stop=cancelled, pacer=pacer)
+        else:
+            results = tcp.scan_ports(host, ports, timeout=timeout, concurrency=concurrency, stop=cancelled,
+                                     pacer=pacer)
+    except PermissionError:
+        return {"error": "SYN scan needs root or CAP_NET_RAW"}
+    except Exception as e:
+        return {"error": str(e)}
+    if not results and ports:
+        return {"error": f"Could not resolve {host}"}
+    if detect:
+        from netscan.fingerprint import fingerprint_ports  # imports ssl; only when asked for
+        fingerprint_ports(results)
+    out = {}
+    for r in results:
+        entry = {"state": r.state, "latency_ms": r.latency_ms}
+        if r.is_open:
+            entry["service"] = r.service
+            if detect and r.proto == "tcp":
+                entry.update(detected=r.detected, product=r.product, banner=r.banner)
+        out[r.port] = entry
+    return out
     
 # DNS Lookup
 def dns_lookup(host: str) -> Dict[str, Any]:
+    # A, AAAA, MX, NS, TXT and CNAME are queried concurrently and cached by TTL
     res = {"host": host, "addresses": []}
+    t0 = time.perf_counter()
     try:
-        if dns:
-            a = dns.resolver.resolve(host, "A")
-            res["addresses"] = [str(x) for x in a]
-            try:
-                mx = dns.resolver.resolve(host, "MX")
-                res["mx"] = [str(m.exchange).rstrip(".") for m in mx]
-            except Exception:
-                pass
+        try:
+            res["addresses"] = [str(ipaddress.ip_address(host))]
+            return res
+        except (OSError, ValueError):
+            pass
+        answers = dns.lookup(host) if dns.system_nameservers() else {}
+        if answers and any("error" not in a for a in answers.values()):
+            res["addresses"] = answers["A"]["records"]
+            res["ipv6"] = answers["AAAA"]["records"]
+            res["mx"] = [m["exchange"] for m in sorted(answers["MX"]["records"], key=lambda m: m["preference"])]
+            res["ns"] = answers["NS"]["records"]
+            res["txt"] = answers["TXT"]["records"]
+            res["cname"] = answers["CNAME"]["records"]
+            res["ttl"] = {t: a["ttl"] for t, a in answers.items() if a.get("records")}
+            res["cached"] = all(a.get("cached") for a in answers.values())
+            errors = {t: a["error"] for t, a in answers.items() if "error" in a}
+            if errors:
+                res["query_errors"] = errors
+            if answers["A"].get("rcode") == "NXDOMAIN":
+                res["error"] = f"{host}: NXDOMAIN"
         else:
             ais = socket.getaddrinfo(host, None)
             res["addresses"] = list({ai[4][0] for ai in ais})
     except Exception as e:
         res["error"] = str(e)
+    finally:
+        res["resolve_time_ms"] = round((time.perf_counter() - t0) * 1000, 2)
     return res
 
 # HTTP Check
 def http_check(url: str, timeout: int=10) -> Dict[str, Any]:
     r = {"url": url}
+    requests = _optional("requests")
     if requests:
         try:
             t0 = time.perf_counter()
@@ -198,7 +288,12 @@ def ssl_info(hostname: str, port: int=443, timeout: int=5) -> Dict[str, Any]:
     r = {"host": hostname, "port": port}
     try: 
         ctx = ssl.create_default_context()
-        with socket.create_connection((hostname, port), timeout=timeout) as sock:
+        # Connect to the cached address; the hostname is still used for SNI and verification
+        addrs = dns.resolve_host(hostname) or [hostname]
+        with socket.create_connection((addrs[0], port), timeout=timeout) as sock:
+            scope = current_scope()
+            if scope:
+                scope.register(sock)
             with ctx.wrap_socket(sock, server_hostname=hostname) as ssock:
                 cert = ssock.getpeercert()
                 r["subject"] = cert.get("subject")
@@ -209,8 +304,97 @@ def ssl_info(hostname: str, port: int=443, timeout: int=5) -> Dict[str, Any]:
         r["error"] = str(e)
     return r
 
+def _ip_json(args: List[str]) -> Optional[Any]:
+    # Run `ip -j <args>` and decode the JSON output (None if ip/JSON is unavailable)
+    if not which("ip"):
+        return None
+    rc, out, err = run_cmd(["ip", "-j"] + args, timeout=10)
+    if rc != 0 or not out:
+        return None
+    try:
+        return json.loads(out)
+    except (OSError, ValueError):
+        return None
+
+def _netlink_addresses() -> Optional[Dict[int, List[tuple]]]:
+    """
+    Dump every interface address with one rtnetlink RTM_GETADDR request.
+    Returns {ifindex: [(family, address, prefixlen), ...]} or None if unavailable.
+    """
+    import struct
+    if not hasattr(socket, "AF_NETLINK"):
+        return None
+    RTM_NEWADDR, RTM_GETADDR = 20, 22
+    NLMSG_ERROR, NLMSG_DONE = 2, 3
+    NLM_F_REQUEST_DUMP = 0x301
+    IFA_ADDRESS, IFA_LOCAL = 1, 2
+
+    addrs: Dict[int, List[tuple]] = {}
+    try:
+        with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, 0) as s:
+            s.settimeout(2)
+            # nlmsghdr + ifaddrmsg (family 0 = all families)
+            s.sendto(struct.pack("=IHHII", 24, RTM_GETADDR, NLM_F_REQUEST_DUMP, 1, 0)
+                     + struct.pack("=BBBBI", 0, 0, 0, 0, 0), (0, 0))
+            while True:
+                data = s.recv(65536)
+                off = 0
+                while off + 16 <= len(data):
+                    length, mtype = struct.unpack_from("=IH", data, off)
+                    if mtype == NLMSG_DONE or length < 16:
+                        return addrs
+                    if mtype == NLMSG_ERROR:
+                        return None
+                    if mtype == RTM_NEWADDR:
+                        family, plen, _flags, _scope, index = struct.unpack_from("=BBBBI", data, off + 16)
+                        attrs = {}
+                        a, end = off + 24, off + length
+                        while a + 4 <= end:
+                            alen, atype = struct.unpack_from("=HH", data, a)
+                            if alen < 4:
+                                break
+                            attrs[atype] = data[a + 4:a + alen]
+                            a += (alen + 3) & ~3
+                        # IFA_LOCAL is our address on point-to-point links, IFA_ADDRESS the peer
+                        raw = attrs.get(IFA_LOCAL) or attrs.get(IFA_ADDRESS)
+                        if raw and family in (socket.AF_INET, socket.AF_INET6):
+                            addrs.setdefault(index, []).append((family, socket.inet_ntop(family, raw), plen))
+                    off += (length + 3) & ~3
+    except (OSError, struct.error):
+        return None
+
+def _netlink_interfaces() -> Optional[Dict[str, Any]]:
+    # Zero-subprocess interfaces_info for Linux: netlink addresses + /sys/class/net
+    if platform.system().lower() != "linux":
+        return None
+    addrs = _netlink_addresses()
+    if addrs is None:
+        return None
+    info = {}
+    for index, name in socket.if_nameindex():
+        addresses = []
+        try:
+            with open(f"/sys/class/net/{name}/address") as f:
+                mac = f.read().strip()
+            if mac:
+                addresses.append({"family": "AF_PACKET", "addr": mac, "netmask": None})
+        except OSError:
+            pass
+        for family, addr, plen in addrs.get(index, []):
+            netmask = str(ipaddress.ip_network(f"{addr.split('%')[0]}/{plen}", strict=False).netmask)
+            addresses.append({"family": "AF_INET" if family == socket.AF_INET else "AF_INET6",
+                              "addr": addr, "netmask": netmask})
+        try:
+            with open(f"/sys/class/net/{name}/flags") as f:
+                isup = bool(int(f.read().strip(), 16) & 0x1)  # IFF_UP
+        except (OSError, ValueError):
+            isup = None
+        info[name] = {"addresses": addresses, "isup": isup}
+    return info
+
 # Interfaces
 def interfaces_info() -> Dict[str, Any]:
+    psutil = _optional("psutil")
     if psutil:
         info = {}
         addrs = psutil.net_if_addrs(); stats = psutil.net_if_stats()
@@ -220,21 +404,331 @@ def interfaces_info() -> Dict[str, Any]:
                 "isup": stats.get(iface).isup if stats.get(iface) else None
             }
         return info
-    else:
-        rc, out, err = run_cmd(["ip", "addr"] if which("ip") else ["ifconfig"])
-        return {"raw": out or err}
+    info = _netlink_interfaces()
+    if info is not None:
+        return info
+    links = _ip_json(["addr"])
+    if links is not None:
+        # Same layout as the psutil branch so consumers don't care which one ran
+        families = {"inet": "AF_INET", "inet6": "AF_INET6"}
+        info = {}
+        for link in links:
+            addresses = []
+            if link.get("address"):
+                addresses.append({"family": "AF_PACKET", "addr": link["address"], "netmask": None})
+            for a in link.get("addr_info", []):
+                family = a.get("family")
+                if family not in families or "local" not in a:
+                    continue
+                netmask = str(ipaddress.ip_network(f"{a['local']}/{a.get('prefixlen', 0)}", strict=False).netmask)
+                addresses.append({"family": families[family], "addr": a["local"], "netmask": netmask})
+            info[link.get("ifname")] = {
+                "addresses": addresses,
+                "isup": "UP" in link.get("flags", [])
+            }
+        return info
+    rc, out, err = run_cmd(["ip", "addr"] if which("ip") else ["ifconfig"])
+    return {"raw": out or err}
     
 # ARP Table
 def arp_table() -> Dict[str, Any]:
-    if platform.system().lower() == "windows":
-        rc, out, err = run_cmd(["arp", "-a"])
-        return {"raw": out or err}
-    else:
-        rc, out, err = run_cmd(["ip", "neigh"] if which("ip") else ["arp", "-n"])
-        return {"raw": out or err}
+    # ip -j neigh, /proc/net/arp, arp -a or arp -an, whichever the platform has
+    return arp.neighbours(run=run_cmd)
     
+# Interface throughput sampler
+IFACE_COUNTERS = ("rx_bytes", "rx_packets", "rx_errors", "rx_drops",
+                  "tx_bytes", "tx_packets", "tx_errors", "tx_drops")
+MIN_SAMPLE_INTERVAL = 0.01   # seconds; shorter (or non-positive) sampling intervals are raised to this
+
+def _read_iface_counters() -> Dict[str, tuple]:
+    # Per-interface counters in IFACE_COUNTERS order, from /proc/net/dev or psutil
+    counters = {}
+    try:
+        with open("/proc/net/dev") as f:
+            for line in f.read().splitlines()[2:]:
+                name, _, data = line.partition(":")
+                v = data.split()
+                if len(v) >= 12:
+                    counters[name.strip()] = (int(v[0]), int(v[1]), int(v[2]), int(v[3]),
+                                              int(v[8]), int(v[9]), int(v[10]), int(v[11]))
+        return counters
+    except (OSError, ValueError):
+        pass
+    psutil = _optional("psutil")
+    if psutil:
+        for name, c in psutil.net_io_counters(pernic=True).items():
+            counters[name] = (c.bytes_recv, c.packets_recv, c.errin, c.dropin,
+                              c.bytes_sent, c.packets_sent, c.errout, c.dropout)
+    return counters
+
+def _link_speed_mbps(iface: str) -> Optional[int]:
+    try:
+        with open(f"/sys/class/net/{iface}/speed") as f:
+            speed = int(f.read().strip())
+        return speed if speed > 0 else None
+    except (OSError, ValueError):
+        pass
+    psutil = _optional("psutil")
+    if psutil:
+        st = psutil.net_if_stats().get(iface)
+        if st and st.speed:
+            return st.speed
+    return None
+
+
+class InterfaceSampler:
+    """
+    Samples interface counters at a fixed interval into a bounded ring buffer
+    and turns consecutive samples into per-second rates.
+
+    Each sample is one /proc/net/dev read plus a tuple per interface, so a
+    100 ms interval costs well under 1% of a core. Only `window` seconds of
+    samples are kept; peaks and percentiles are computed over that window.
+    """
+
+    def __init__(self, interval: float = 1.0, window: float = 60.0):
+        from collections import deque
+        self.interval = max(MIN_SAMPLE_INTERVAL, interval)
+        self.samples = deque(maxlen=max(2, int(window / self.interval) + 1))
+        self.speeds: Dict[str, Optional[int]] = {}
+
+    def sample(self) -> Dict[str, Dict[str, float]]:
+        """Take one sample and return the rates since the previous one."""
+        self.samples.append((time.monotonic(), _read_iface_counters()))
+        if len(self.samples) < 2:
+            return {}
+        return self._rates(self.samples[-2], self.samples[-1])
+
+    @staticmethod
+    def _rates(a: tuple, b: tuple) -> Dict[str, Dict[str, float]]:
+        (t0, c0), (t1, c1) = a, b
+        dt = t1 - t0
+        rates = {}
+        if dt <= 0:
+            return rates
+        for iface, now in c1.items():
+            before = c0.get(iface)
+            if before is None:
+                continue
+            # A negative delta means the counter wrapped or the interface was reset
+            rates[iface] = {k: max(0, n - o) / dt for k, n, o in zip(IFACE_COUNTERS, now, before)}
+        return rates
+
+    def run(self, duration: float):
+        """
+        Sample every `interval` seconds for `duration` seconds. At least two
+        samples are taken - the second at the end of `duration` when that
+        comes before one interval - so there is always a rate to report.
+        """
+        next_tick = time.monotonic()
+        deadline = next_tick + max(0.0, duration)
+        taken = 0
+        while True:
+            self.sample()
+            taken += 1
+            next_tick += self.interval
+            if next_tick > deadline:
+                if taken >= 2:
+                    break
+                next_tick = deadline
+            if cancelled():
+                break
+            cancellable_sleep(max(0.0, next_tick - time.monotonic()))
+
+    def summary(self) -> Dict[str, Any]:
+        """Current, peak and percentile rates per interface over the buffered window."""
+        samples = list(self.samples)
+        series: Dict[str, Dict[str, List[float]]] = {}
+        for a, b in zip(samples, samples[1:]):
+            for iface, r in self._rates(a, b).items():
+                per = series.setdefault(iface, {k: [] for k in IFACE_COUNTERS})
+                for k, v in r.items():
+                    per[k].append(v)
+
+        def pct(values: List[float], p: float) -> float:
+            ordered = sorted(values)
+            return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+
+        out = {}
+        for iface, per in series.items():
+            if iface not in self.speeds:
+                self.speeds[iface] = _link_speed_mbps(iface)
+            speed = self.speeds[iface]
+            entry: Dict[str, Any] = {"link_speed_mbps": speed}
+            for k in ("rx_bytes", "tx_bytes", "rx_packets", "tx_packets"):
+                v = per[k]
+                entry[f"{k}_per_s"] = {"current": round(v[-1], 1), "peak": round(max(v), 1),
+                                       "p50": round(pct(v, 0.5), 1), "p95": round(pct(v, 0.95), 1)}
+            first, last = samples[0][1].get(iface), samples[-1][1].get(iface)
+            for k in ("rx_errors", "tx_errors", "rx_drops", "tx_drops"):
+                # Totals over the window rather than rates: any non-zero value matters
+                i = IFACE_COUNTERS.index(k)
+                entry[k] = max(0, last[i] - first[i]) if first and last else 0
+            if speed:
+                bits = speed * 1e6
+                peak_bytes = max(max(per["rx_bytes"]), max(per["tx_bytes"]))
+                p95_bytes = max(pct(per["rx_bytes"], 0.95), pct(per["tx_bytes"], 0.95))
+                entry["utilisation_peak_percent"] = round(peak_bytes * 8 / bits * 100, 2)
+                entry["utilisation_p95_percent"] = round(p95_bytes * 8 / bits * 100, 2)
+            out[iface] = entry
+        return out
+
+
+def interface_rates(duration: float = 5.0, interval: float = 1.0) -> Dict[str, Any]:
+    """
+    Measure per-interface throughput, packet, error and drop rates.
+
+    Args:
+        duration: Seconds to sample for
+        interval: Seconds between samples (0.1 is fine)
+
+    Returns:
+        Dictionary with per-interface current/peak/p50/p95 rates
+    """
+    sampler = InterfaceSampler(interval=interval, window=duration)
+    try:
+        sampler.run(duration)
+    except Exception as e:
+        return {"error": str(e), "success": False}
+    interfaces = sampler.summary()
+    if not interfaces:
+        return {"error": "No interface counters available", "success": False}
+    return {"duration": duration, "interval": sampler.interval, "samples": len(sampler.samples),
+            "interfaces": interfaces, "success": True}
+
+# Socket inventory (/proc/net)
+TCP_STATES = {
+    1: "ESTABLISHED", 2: "SYN_SENT", 3: "SYN_RECV", 4: "FIN_WAIT1", 5: "FIN_WAIT2",
+    6: "TIME_WAIT", 7: "CLOSE", 8: "CLOSE_WAIT", 9: "LAST_ACK", 10: "LISTEN",
+    11: "CLOSING", 12: "NEW_SYN_RECV"
+}
+SOCKET_COLUMNS = ("proto", "laddr", "lport", "raddr", "rport", "state", "uid", "inode")
+
+def _proc_hex_addr(addr: str) -> str:
+    # Encode an IP the way /proc/net/{tcp,udp}{,6} prints it (host-order 32-bit words)
+    packed = socket.inet_pton(socket.AF_INET6 if ":" in addr else socket.AF_INET, addr)
+    return "".join(packed[i:i + 4][::-1].hex().upper() for i in range(0, len(packed), 4))
+
+_V4_MAPPED = bytes(10) + b"\xff\xff"   # ::ffff:0:0/96, IPv4 peers of dual-stack tcp6/udp6 sockets
+
+def _proc_decode_addr(h: str) -> str:
+    raw = bytes.fromhex(h)
+    raw = b"".join(raw[i:i + 4][::-1] for i in range(0, len(raw), 4))
+    if len(raw) == 16 and raw[:12] == _V4_MAPPED:
+        # Report IPv4 peers the same way whichever table they were found in
+        raw = raw[12:]
+    return socket.inet_ntop(socket.AF_INET6 if len(raw) == 16 else socket.AF_INET, raw)
+
+def _proc_hex_addrs(addr: str) -> set:
+    # Every way /proc/net can print an address: IPv4 addresses also appear v4-mapped in the v6 tables
+    ip = ipaddress.ip_address(addr)
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    forms = {_proc_hex_addr(str(ip))}
+    if ip.version == 4:
+        forms.add(_proc_hex_addr(f"::ffff:{ip}"))
+    return forms
+
+def socket_inventory(protos: tuple = ("tcp", "tcp6", "udp", "udp6"), states: Optional[List[str]] = None,
+                     local_port: Optional[int] = None, remote_port: Optional[int] = None,
+                     remote_addr: Optional[str] = None, columns: bool = True, top: int = 10) -> Dict[str, Any]:
+    """
+    Bulk socket inventory read straight from /proc/net (Linux, no subprocess).
+
+    Filters are applied to the raw hex fields before any address is decoded,
+    so narrowing the query also makes it cheaper. Results are columnar (one
+    list per field) rather than one dict per socket, and decoded addresses
+    are memoised since busy hosts repeat the same few peers many times.
+
+    Args:
+        protos: Tables to read (tcp, tcp6, udp, udp6)
+        states: Keep only these states (e.g. ["ESTABLISHED", "TIME_WAIT"])
+        local_port: Keep only sockets bound to this local port
+        remote_port: Keep only sockets connected to this remote port
+        remote_addr: Keep only sockets connected to this remote IP (an IPv4 address
+            also matches its ::ffff: form on dual-stack IPv6 sockets)
+        columns: Include the per-socket columns (False = aggregates only)
+        top: Number of entries in the per-remote-host fan-out view
+
+    Returns:
+        Dictionary with columns, per-state counts and per-remote-host fan-out
+    """
+    from collections import Counter
+
+    result = {"source": "/proc/net", "count": 0}
+    cols: Dict[str, list] = {c: [] for c in SOCKET_COLUMNS}
+    by_state: Counter = Counter()
+    by_remote: Counter = Counter()
+    decoded: Dict[str, str] = {}
+
+    want_states = {s.upper() for s in states} if states else None
+    lport_hex = f"{local_port:04X}" if local_port is not None else None
+    rport_hex = f"{remote_port:04X}" if remote_port is not None else None
+    try:
+        raddr_hex = _proc_hex_addrs(remote_addr) if remote_addr else None
+    except (OSError, ValueError):
+        return {"error": f"Invalid remote address: {remote_addr}", "success": False}
+
+    read_any = False
+    for proto in protos:
+        udp = proto.startswith("udp")
+        try:
+            with open(f"/proc/net/{proto}") as f:
+                lines = f.read().splitlines()[1:]
+        except OSError:
+            continue
+        read_any = True
+        for line in lines:
+            # sl local rem st tx:rx tr:when retrnsmt uid timeout inode ...
+            parts = line.split(None, 10)
+            if len(parts) < 10:
+                continue
+            local, remote, st = parts[1], parts[2], int(parts[3], 16)
+            state = "NONE" if udp and st == 7 else TCP_STATES.get(st, str(st))
+            if want_states is not None and state not in want_states:
+                continue
+            lhex, lp = local.split(":")
+            rhex, rp = remote.split(":")
+            if lport_hex is not None and lp != lport_hex:
+                continue
+            if rport_hex is not None and rp != rport_hex:
+                continue
+            if raddr_hex is not None and rhex not in raddr_hex:
+                continue
+
+            raddr = decoded.get(rhex)
+            if raddr is None:
+                raddr = decoded[rhex] = _proc_decode_addr(rhex)
+            result["count"] += 1
+            by_state[state] += 1
+            if int(rp, 16):
+                by_remote[raddr] += 1
+            if columns:
+                laddr = decoded.get(lhex)
+                if laddr is None:
+                    laddr = decoded[lhex] = _proc_decode_addr(lhex)
+                cols["proto"].append(proto)
+                cols["laddr"].append(laddr)
+                cols["lport"].append(int(lp, 16))
+                cols["raddr"].append(raddr)
+                cols["rport"].append(int(rp, 16))
+                cols["state"].append(state)
+                cols["uid"].append(int(parts[7]))
+                cols["inode"].append(int(parts[9]))
+
+    if not read_any:
+        return {"error": "/proc/net socket tables not available", "success": False}
+    if columns:
+        result["columns"] = cols
+    result["by_state"] = dict(by_state.most_common())
+    result["by_remote"] = [{"raddr": a, "count": n} for a, n in by_remote.most_common(top)]
+    result["remote_hosts"] = len(by_remote)
+    result["success"] = True
+    return result
+
 # Check open ports
 def open_connections() -> Any:
+    psutil = _optional("psutil")
     if psutil:
         conns = psutil.net_connections(kind="inet")
         out = []
@@ -245,6 +739,15 @@ def open_connections() -> Any:
                 "status": c.status, "pid": c.pid
             })
         return out
+    if platform.system().lower() == "linux":
+        inv = socket_inventory()
+        if inv.get("success"):
+            c = inv["columns"]
+            return [{
+                "laddr": f"{c['laddr'][i]}: {c['lport'][i]}",
+                "raddr": f"{c['raddr'][i]}: {c['rport'][i]}" if c["rport"][i] else None,
+                "status": c["state"][i], "pid": None
+            } for i in range(inv["count"])]
     rc, out, err = run_cmd(["ss", "-tunap"] if which("ss") else ["netstat", "-ant"])
     return {"raw": out or err}
 
@@ -274,7 +777,8 @@ def speedtest() -> Dict[str, Any]:
     
 
 # Network Sweep (Multiple ping at a time)
-def network_sweep(cidr: str, timeout: int = 1, workers: int = 50) -> Dict[str, Any]:
+def network_sweep(cidr: str, timeout: int = 1, workers: int = 50, on_probe=None,
+                  rate: Optional[float] = None, burst: Optional[float] = None) -> Dict[str, Any]:
     """
     Perform a network sweep on a given CIDR range.
     
@@ -282,15 +786,14 @@ def network_sweep(cidr: str, timeout: int = 1, workers: int = 50) -> Dict[str, A
         cidr: Network range in CIDR notation (e.g., '192.168.1.0/24', '10.0.0.0/16')
         timeout: Ping timeout in seconds (default: 1)
         workers: Number of concurrent workers (default: 50)
+        on_probe: Optional callback(ip, is_alive, scanned, total) after every probe
+        rate: Maximum echo requests per second, shared fairly per /24 (default: unpaced)
+        burst: Echo requests allowed back to back under rate
     
     Returns:
-        Dictionary with sweep results including alive hosts
+        Dictionary with sweep results including alive hosts (and "pacing" when rate is set)
     """
 
-    import concurrent.futures
-    import ipaddress
-    import platform
-
     result = {
         "cidr": cidr,
         "timeout": timeout,
@@ -307,35 +810,27 @@ def network_sweep(cidr: str, timeout: int = 1, workers: int = 50) -> Dict[str, A
 
         LOG.info(f"Starting network sweep on {cidr} ({len(hosts)} hosts)")
 
-        # Quick ping fucntion for sweep
-        def quick_ping(ip_str: str) -> tuple:
-            system = platform.system().lower()
+        # netscan's ICMP engine: one ICMP socket when permitted, otherwise ping
+        # processes on the shared subprocess runner
+        def probed(host):
+            result["scanned"] += 1
+            if host.alive:
+                result["alive_hosts"].append(host.ip)
+                LOG.info(f"[ALIVE] {host.ip}")
+            if on_probe:
+                on_probe(host.ip, host.alive, result["scanned"], len(hosts))
 
-            if system == "windows":
-                cmd = ["ping", "-n", "1", "-w", str(timeout * 1000), ip_str]
-            else:
-                cmd = ["ping", "-c", "1", "-W", str(timeout), ip_str]
-
-            rc, out, er = run_cmd(cmd, timeout=timeout + 2)
+        pacer = Pacer(rate, burst, fairness="subnet") if rate else None
 
-            is_alive = rc == 0 and ("ttl" in out.lower() or "TTL" in out)
-
-            return ip_str, is_alive
-        
-        alive_count = 0
-        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
-            futures = {executor.submit(quick_ping, str(ip)): str(ip) for ip in hosts}
-
-            for future in concurrent.futures.as_completed(futures):
-                result["scanned"] += 1
-                ip, is_alive = future.result()
-
-                if is_alive:
-                    alive_count += 1
-                    result["alive_hosts"].append(ip)
-                    LOG.info(f"[ALIVE] {ip}")
+        async def sweep():
+            found = await icmp.sweep(hosts, timeout=timeout, concurrency=workers,
+                                     on_result=probed, run=netdiag_proc.run, pacer=pacer)
+            return sum(1 for h in found if h.alive)
 
+        alive_count = netdiag_proc.run_coroutine(sweep())
         result["alive_count"] = alive_count
+        if pacer:
+            result["pacing"] = pacer.stats()
         result["success"] = True
         LOG.info(f"Sweep complete: {alive_count}/{len(hosts)} hosts alive")
 
@@ -362,17 +857,9 @@ def pathping(host: str, max_hops: int = 30, queries: int = 100) -> Dict[str, Any
     Returns:
         Dictionary with pathping results including hop statistics
     """
-    import ipaddress
     system = platform.system().lower()
-    try:
-        ip = str(ipaddress.ip_address(host))
-        host_arg = ip
-    except ValueError:
-        try:
-            ip = socket.gethostbyname(host)
-            host_arg = ip
-        except Exception:
-            host_arg = host
+    addrs = dns.resolve_host(host)
+    host_arg = addrs[0] if addrs else host
     
     result = {
         "host": host,
@@ -498,13 +985,331 @@ def pathping(host: str, max_hops: int = 30, queries: int = 100) -> Dict[str, Any
 
     return result
 
+# Path monitor (MTR-style)
+class RunningStats:
+    """Online mean/variance (Welford) with min/max, O(1) per sample."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, x: float):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+        self.min = x if self.min is None else min(self.min, x)
+        self.max = x if self.max is None else max(self.max, x)
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stdev(self) -> float:
+        return self.variance ** 0.5
+
+
+class P2Quantile:
+    """
+    Streaming quantile estimate using the P-square algorithm (Jain & Chlamtac).
+    Keeps five markers regardless of how many samples are added.
+    """
+
+    def __init__(self, p: float):
+        self.p = p
+        self._q: List[float] = []
+        self._n = [0, 1, 2, 3, 4]
+        self._np = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]
+        self._dn = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def add(self, x: float):
+        q, n = self._q, self._n
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._np[i] += self._dn[i]
+
+        # Adjust the three middle markers towards their desired positions
+        for i in (1, 2, 3):
+            d = self._np[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                qp = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not q[i - 1] < qp < q[i + 1]:
+                    qp = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = qp
+                n[i] += d
+
+    def value(self) -> Optional[float]:
+        if not self._q:
+            return None
+        if len(self._q) < 5:
+            return self._q[min(len(self._q) - 1, int(round(self.p * (len(self._q) - 1))))]
+        return self._q[2]
+
+
+class HopStats:
+    """Incremental loss/RTT statistics for a single hop of a monitored path."""
+
+    def __init__(self, hop: int, address: Optional[str]):
+        self.hop = hop
+        self.address = address
+        self.sent = 0
+        self.lost = 0
+        self.last = None
+        self.rtt = RunningStats()
+        self.p50 = P2Quantile(0.5)
+        self.p95 = P2Quantile(0.95)
+
+    def add(self, rtt: Optional[float]):
+        self.sent += 1
+        self.last = rtt
+        if rtt is None:
+            self.lost += 1
+            return
+        self.rtt.add(rtt)
+        self.p50.add(rtt)
+        self.p95.add(rtt)
+
+    def as_dict(self) -> Dict[str, Any]:
+        def r(v):
+            return round(v, 2) if isinstance(v, float) else v
+        return {
+            "hop": self.hop,
+            "address": self.address,
+            "sent": self.sent,
+            "lost": self.lost,
+            "loss_percent": round(self.lost / self.sent * 100.0, 1) if self.sent else 0.0,
+            "rtt_last": r(self.last),
+            "rtt_min": r(self.rtt.min),
+            "rtt_avg": r(self.rtt.mean) if self.rtt.count else None,
+            "rtt_max": r(self.rtt.max),
+            "rtt_stdev": r(self.rtt.stdev) if self.rtt.count else None,
+            "rtt_p50": r(self.p50.value()),
+            "rtt_p95": r(self.p95.value()),
+        }
+
+
+def _parse_traceroute_hops(raw: str) -> List[Optional[str]]:
+    """
+    Extract the hop list from traceroute/tracert/tracepath output.
+    Index i holds the address answering at TTL i+1, or None for '* * *' hops.
+    """
+    hops: Dict[int, Optional[str]] = {}
+    for line in raw.splitlines():
+        m = re.match(r"\s*(\d+):?\s+(.*)", line)
+        if not m:
+            continue
+        ip_match = re.search(r"(\d+\.\d+\.\d+\.\d+|[0-9a-fA-F]*:[0-9a-fA-F:]+:[0-9a-fA-F]+)", m.group(2))
+        hop = int(m.group(1))
+        # tracepath prints several lines per TTL; keep the first one that answered
+        if hops.get(hop) is None:
+            hops[hop] = ip_match.group(1) if ip_match else None
+    if not hops:
+        return []
+    return [hops.get(i) for i in range(1, max(hops) + 1)]
+
+
+def path_monitor(host: str, rounds: int = 0, interval: float = 1.0, max_hops: int = 30,
+                 timeout: int = 1, retrace_every: int = 10) -> Iterator[Dict[str, Any]]:
+    """
+    Continuous MTR-style monitor of the path to a host.
+
+    The path is discovered once with traceroute, then every round sends one
+    ping to each known hop in parallel and folds the result into per-hop
+    running statistics. Every `retrace_every` rounds the path is traced again;
+    hops whose address changed get fresh statistics and the change is reported.
+
+    Args:
+        host: Target hostname or IP
+        rounds: Number of rounds to run, 0 runs until the caller stops iterating
+        interval: Seconds between the start of consecutive rounds
+        max_hops: Maximum number of hops to trace
+        timeout: Per-probe timeout in seconds
+        retrace_every: Re-run traceroute every N rounds to detect path changes (0 disables)
+
+    Yields:
+        Dictionary snapshot of the hop statistics after each round
+    """
+    import concurrent.futures
+
+    def trace() -> Dict[str, Any]:
+        tr = traceroute(host, max_hops=max_hops, timeout=timeout)
+        if "error" in tr:
+            return tr
+        hops = _parse_traceroute_hops(tr.get("raw", ""))
+        if not hops:
+            return {"error": tr.get("raw") or "traceroute returned no hops"}
+        return {"hops": hops}
+
+    def probe(address: Optional[str]) -> Optional[float]:
+        if not address:
+            return None
+        res = ping_host(address, count=1, timeout=timeout)
+        if res.get("loss") == 0.0 and res.get("avg") is not None:
+            return res["avg"]
+        return None
+
+    path = trace()
+    if "error" in path:
+        yield {"host": host, "round": 0, "error": path["error"], "success": False}
+        return
+    stats = [HopStats(i, addr) for i, addr in enumerate(path["hops"], 1)]
+
+    n = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(len(stats), max_hops))) as ex:
+        while not rounds or n < rounds:
+            started = time.monotonic()
+            n += 1
+            changes = []
+
+            if retrace_every and n > 1 and (n - 1) % retrace_every == 0:
+                new_path = trace()
+                if "hops" in new_path:
+                    new_hops = new_path["hops"]
+                    for i in range(max(len(stats), len(new_hops))):
+                        old = stats[i].address if i < len(stats) else None
+                        new = new_hops[i] if i < len(new_hops) else None
+                        # A silent hop is not evidence that the path moved
+                        if old != new and new is not None:
+                            changes.append({"hop": i + 1, "old": old, "new": new})
+                    if changes or len(new_hops) != len(stats):
+                        kept = stats[:len(new_hops)]
+                        for c in changes:
+                            if c["hop"] <= len(kept):
+                                kept[c["hop"] - 1] = HopStats(c["hop"], c["new"])
+                        for i in range(len(kept), len(new_hops)):
+                            kept.append(HopStats(i + 1, new_hops[i]))
+                        stats = kept
+
+            rtts = list(ex.map(probe, [h.address for h in stats]))
+            for h, rtt in zip(stats, rtts):
+                h.add(rtt)
+
+            yield {
+                "host": host,
+                "round": n,
+                "time": datetime.utcnow().isoformat(),
+                "hops": [h.as_dict() for h in stats],
+                "total_hops": len(stats),
+                "path_changed": bool(changes),
+                "changes": changes,
+                "success": True,
+            }
+
+            if not rounds or n < rounds:
+                time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
 # Route print
+RTF_GATEWAY = 0x0002
+RTF_REJECT = 0x0200
+RTF_LOCAL = 0x80000000
+
+def _proc_routes(local: bool = False) -> Optional[List[Dict[str, Any]]]:
+    """
+    Read the Linux routing tables straight from /proc/net/route and
+    /proc/net/ipv6_route (no subprocess). Returns None if they can't be read.
+
+    With local=True the local table (the machine's own addresses and
+    127.0.0.0/8, which `ip route` doesn't show) is included too, on lo,
+    since traffic to them never leaves the host.
+    """
+    routes = []
+    try:
+        with open("/proc/net/route") as f:
+            next(f)
+            for line in f:
+                # Iface Destination Gateway Flags RefCnt Use Metric Mask ...
+                parts = line.split()
+                if len(parts) < 8:
+                    continue
+                dest = socket.inet_ntoa(int(parts[1], 16).to_bytes(4, "little"))
+                mask = socket.inet_ntoa(int(parts[7], 16).to_bytes(4, "little"))
+                flags = int(parts[3], 16)
+                routes.append({
+                    "destination": str(ipaddress.ip_network(f"{dest}/{mask}", strict=False)),
+                    "gateway": socket.inet_ntoa(int(parts[2], 16).to_bytes(4, "little")) if flags & RTF_GATEWAY else None,
+                    "interface": parts[0],
+                    "metric": int(parts[6]),
+                    "family": "inet"
+                })
+    except (OSError, ValueError, StopIteration):
+        return None
+    try:
+        with open("/proc/net/ipv6_route") as f:
+            for line in f:
+                # dest plen src src_plen nexthop metric refcnt use flags iface
+                parts = line.split()
+                if len(parts) < 10:
+                    continue
+                flags = int(parts[8], 16)
+                dest = ipaddress.IPv6Network((bytes.fromhex(parts[0]), int(parts[1], 16)))
+                # Skip the local/multicast/reject entries `ip -6 route` doesn't show
+                if flags & RTF_REJECT or dest.is_multicast or (flags & RTF_LOCAL and not local):
+                    continue
+                routes.append({
+                    "destination": str(dest),
+                    "gateway": str(ipaddress.IPv6Address(bytes.fromhex(parts[4]))) if flags & RTF_GATEWAY else None,
+                    "interface": "lo" if flags & RTF_LOCAL else parts[9],
+                    "metric": int(parts[5], 16),
+                    "family": "inet6"
+                })
+    except (OSError, ValueError):
+        pass
+    if local:
+        routes.extend(_local_routes_v4())
+    return routes
+
+def _local_routes_v4() -> List[Dict[str, Any]]:
+    # IPv4 local table, which /proc/net/route leaves out: each own address as a
+    # /32 plus whole loopback prefixes (127.0.0.0/8), like the kernel builds it
+    destinations = []
+    addrs = _netlink_addresses()
+    if addrs is not None:
+        for entries in addrs.values():
+            for family, addr, plen in entries:
+                if family != socket.AF_INET:
+                    continue
+                destinations.append(f"{addr}/32")
+                if ipaddress.IPv4Address(addr).is_loopback:
+                    destinations.append(str(ipaddress.ip_network(f"{addr}/{plen}", strict=False)))
+    else:
+        for r in _ip_json(["route", "show", "table", "local"]) or []:
+            if r.get("type") == "local" and r.get("dst"):
+                destinations.append(str(ipaddress.ip_network(r["dst"], strict=False)))
+    return [{"destination": d, "gateway": None, "interface": "lo", "metric": 0, "family": "inet"}
+            for d in dict.fromkeys(destinations)]
+
 def route_print() -> Dict[str, Any]:
     """
-    Display routing table (route print on Windows, route -n on Linux)
+    Display routing table (route print on Windows, /proc or ip -j route on Linux)
     
     Returns:
-        Dictionary with routing table information
+        Dictionary with routing table information. parsed_routes holds one record
+        per route with destination in CIDR form, gateway (None when on-link),
+        interface and metric.
     """
     system = platform.system().lower()
 
@@ -514,17 +1319,35 @@ def route_print() -> Dict[str, Any]:
         "parsed_routes": [],
         "success": False
     }
-    
+
+    if system == "linux":
+        routes = _proc_routes()
+        if routes is not None:
+            result.update({"command": "/proc/net/route", "parsed_routes": routes,
+                           "total_routes": len(routes), "success": True})
+            return result
+        data = _ip_json(["route"])
+        if data is not None:
+            routes = []
+            for r in data:
+                dst = r.get("dst", "")
+                routes.append({
+                    "destination": "0.0.0.0/0" if dst == "default" else str(ipaddress.ip_network(dst, strict=False)),
+                    "gateway": r.get("gateway"),
+                    "interface": r.get("dev"),
+                    "metric": r.get("metric", 0),
+                    "family": "inet"
+                })
+            result.update({"command": "ip -j route", "parsed_routes": routes,
+                           "total_routes": len(routes), "success": True})
+            return result
+
     if system == "windows":
         cmd = ["route", "print"]
         result["command"] = "route print"
     else:
-        if which["ip"]:
-            cmd = ["ip", "route"]
-            result["command"] = "ip route"
-        else:
-            cmd = ["route", "-n"]
-            result["command"] = "route -n"
+        cmd = ["netstat", "-rn"] if which("netstat") else ["route", "-n"]
+        result["command"] = " ".join(cmd)
     rc, out, err = run_cmd(cmd, timeout=10)
 
     if rc == 0 or out:
@@ -532,145 +1355,530 @@ def route_print() -> Dict[str, Any]:
         result["success"] = True
 
         routes = []
-        lines = out.split("\n")
-
         if system == "windows":
             in_active_routes = False
-            for line in lines:
-                line = line.split()
+            for line in out.split("\n"):
+                line = line.strip()
 
-                if "Active Routes:" in line or "IPv4 Route Table" in line:
+                if "IPv4 Route Table" in line:
                     in_active_routes = True
                     continue
+                # Stop at IPv6 section
+                if "IPv6 Route Table" in line or "Persistent Routes:" in line:
+                    break
+                if not in_active_routes or not line:
+                    continue
+                if line.startswith("Network Destination") or line.startswith("=") or line.startswith("Active Routes"):
+                    continue
 
-                if in_active_routes and line:
-                    if "Network Destination" in line or "Netmask" in line or "====" in line:
+                parts = line.split()
+                if len(parts) >= 5:
+                    try:
+                        routes.append({
+                            "destination": str(ipaddress.ip_network(f"{parts[0]}/{parts[1]}", strict=False)),
+                            "gateway": None if parts[2] == "On-link" else parts[2],
+                            "interface": parts[3],
+                            "metric": int(parts[4]),
+                            "family": "inet"
+                        })
+                    except (OSError, ValueError):
                         continue
-
-                    parts = line.split()
-                    if len(parts) >= 5:
-                        try:
-                            route = {
-                                "destination": parts[0],
-                                "netmask": parts[1],
-                                "gateway": parts[2],
-                                "interface": parts[3],
-                                "metric": parts[4]
-                            }
-
-                            routes.append(route)
-                        except (IndexError, ValueError):
-                            continue
-                    # Stop at IPv6 section
-                    if "IPv6 Route Table" in line or "Persistent Routes:" in line:
-                        break
-                else:
-                    for line in lines:
-                        line = line.strip()
-                        if not line or line.startswith("Kernel") or line.startswith("Destination"):
-                            if "via" in line or "dev" in line:
-                                route_info = {"raw": line}
-                                if line.startswith("default"):
-                                    route_info["destination"] = "0.0.0.0/0"
-                                else:
-                                    dest_match = re.search(r'^(\S+)', line)
-                                    if dest_match:
-                                        route_info["destination"] = dest_match.group[1]
-
-                                # Extract gateway
-                                gateway_match = re.search(r"via\s+(\S+)", line)
-                                if gateway_match:
-                                    route_info["gateway"] = gateway_match.group(1)
-
-                                # Extract interface
-                                iface_match = re.search(r"dev\s+(\S+)", line)
-                                if iface_match:
-                                    route_info["interface"] = iface_match.group(1)
-
-                                # Extract metric
-                                metric_match = re.search(r"metric\s+(\d+)", line)
-                                if metric_match:
-                                    route_info["metric"] = metric_match.group(1)
-                                routes.append(route_info)
-
-                result["parsed_routes"] = routes
-                result["total_routes"] = len(routes)
+        result["parsed_routes"] = routes
+        result["total_routes"] = len(routes)
     else:
         result["error"] = err or "Failed to retrieve routing table"
         result["success"] = False
     return result
 
 
-def run_all(host: str, options: Dict[str, Any], ports: Optional[List[int]] = None) -> Dict[str, Any]:
+# Route lookup (longest prefix match)
+class _TrieNode:
+    __slots__ = ("key", "plen", "route", "children")
+
+    def __init__(self, key: int, plen: int, route: Optional[Dict[str, Any]] = None):
+        self.key = key
+        self.plen = plen
+        self.route = route
+        self.children = [None, None]
+
+
+def _addr_to_int(addr: str) -> tuple:
+    # Fast path for literal addresses: (family width, integer value)
+    try:
+        return 32, int.from_bytes(socket.inet_pton(socket.AF_INET, addr), "big")
+    except OSError:
+        return 128, int.from_bytes(socket.inet_pton(socket.AF_INET6, addr.split("%", 1)[0]), "big")
+
+
+class RouteTable:
+    """
+    Longest-prefix-match lookup over route_print() records.
+
+    Routes are stored in a path-compressed binary (Patricia) trie per address
+    family, so a lookup walks at most one node per distinct prefix length on
+    the path instead of every route. When several routes share a prefix the
+    one with the lowest metric wins, like the kernel does.
+    """
+
+    def __init__(self, routes: Optional[List[Dict[str, Any]]] = None):
+        self._roots = {32: _TrieNode(0, 0), 128: _TrieNode(0, 0)}
+        self.size = 0
+        for r in routes or []:
+            self.add(r)
+
+    @classmethod
+    def from_system(cls) -> "RouteTable":
+        # On Linux include the local table, so the host's own addresses and
+        # loopback resolve to lo instead of falling through to the default route
+        if platform.system().lower() == "linux":
+            routes = _proc_routes(local=True)
+            if routes is not None:
+                return cls(routes)
+        return cls(route_print().get("parsed_routes", []))
+
+    def add(self, route: Dict[str, Any]):
+        try:
+            net = ipaddress.ip_network(route["destination"], strict=False)
+        except (KeyError, ValueError):
+            return
+        width = net.max_prefixlen
+        key, plen = int(net.network_address), net.prefixlen
+        node = self._roots[width]
+        while True:
+            if plen == node.plen:
+                if node.route is None or (route.get("metric") or 0) < (node.route.get("metric") or 0):
+                    if node.route is None:
+                        self.size += 1
+                    node.route = route
+                return
+            bit = (key >> (width - 1 - node.plen)) & 1
+            child = node.children[bit]
+            if child is None:
+                node.children[bit] = _TrieNode(key, plen, route)
+                self.size += 1
+                return
+            limit = min(plen, child.plen)
+            diff = key ^ child.key
+            common = min(limit, width - diff.bit_length()) if diff else limit
+            if common == child.plen:
+                node = child
+                continue
+            # Split the edge: a new branch node holds the shared prefix
+            mid = _TrieNode(key >> (width - common) << (width - common) if common else 0, common)
+            node.children[bit] = mid
+            mid.children[(child.key >> (width - 1 - common)) & 1] = child
+            if common == plen:
+                mid.route = route
+            else:
+                mid.children[(key >> (width - 1 - common)) & 1] = _TrieNode(key, plen, route)
+            self.size += 1
+            return
+
+    def lookup(self, addr: str) -> Optional[Dict[str, Any]]:
+        """Return the route that would carry traffic to `addr`, or None."""
+        width, key = _addr_to_int(addr)
+        node = self._roots[width]
+        best = None
+        while node is not None:
+            shift = width - node.plen
+            if (key >> shift) != (node.key >> shift):
+                break
+            if node.route is not None:
+                best = node.route
+            if node.plen == width:
+                break
+            node = node.children[(key >> (shift - 1)) & 1]
+        return best
+
+    def group_by_egress(self, targets: List[str]) -> Dict[tuple, List[str]]:
+        """Group targets by the (interface, gateway, family) that would carry them."""
+        groups: Dict[tuple, List[str]] = {}
+        for t in targets:
+            try:
+                r = self.lookup(t)
+            except (OSError, ValueError):
+                r = None
+            key = (r.get("interface"), r.get("gateway"), r.get("family")) if r else (None, None, None)
+            groups.setdefault(key, []).append(t)
+        return groups
+
+
+def _source_address(target: str) -> Optional[str]:
+    # Let the kernel pick the source address for a target (no packet is sent)
+    family = socket.AF_INET6 if ":" in target else socket.AF_INET
+    try:
+        with socket.socket(family, socket.SOCK_DGRAM) as s:
+            s.connect((target, 9))
+            return s.getsockname()[0]
+    except OSError:
+        return None
+
+
+def route_lookup(targets: List[str], table: Optional[RouteTable] = None) -> Dict[str, Any]:
+    """
+    Resolve which interface/gateway carries traffic to each target.
+
+    Args:
+        targets: IP address literals
+        table: Prebuilt RouteTable (default: built from the system routing table)
+
+    Returns:
+        Dictionary with per-target routes and source addresses (the one the
+        kernel would pick for each target), and targets grouped by egress with
+        the distinct source addresses used in each group
+    """
+    table = table or RouteTable.from_system()
+    result = {"total_targets": len(targets), "routes": {}, "sources": {}, "groups": [], "invalid": []}
+    valid = []
+    for t in targets:
+        try:
+            result["routes"][t] = table.lookup(t)
+            result["sources"][t] = _source_address(t)
+            valid.append(t)
+        except (OSError, ValueError):
+            result["invalid"].append(t)
+    for (iface, gateway, family), members in table.group_by_egress(valid).items():
+        result["groups"].append({
+            "interface": iface,
+            "gateway": gateway,
+            "family": family,
+            "sources": [s for s in dict.fromkeys(result["sources"][t] for t in members) if s],
+            "count": len(members),
+            "targets": members
+        })
+    result["success"] = True
+    return result
+
+
+# Result cache
+# Seconds each check's result stays valid; checks not listed are always re-run
+CHECK_TTLS = {"dns": 300, "ssl": 3600, "interfaces": 60, "route": 60, "arp": 30}
+# Checks whose result depends on the target; the rest describe the local machine
+HOST_CHECKS = {"dns", "ssl", "http", "ports", "ping", "traceroute", "pathping"}
+
+
+class MemoryStore:
+    """In-process LRU store of (stored_at, value) pairs."""
+
+    def __init__(self, max_entries: int = 256):
+        from collections import OrderedDict
+        import threading
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                self._data.move_to_end(key)
+            return item
+
+    def set(self, key: str, stored_at: float, value: Dict[str, Any]):
+        with self._lock:
+            self._data[key] = (stored_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class DiskStore:
+    """One JSON file per key, so separate CLI runs can share results."""
+
+    def __init__(self, path: Optional[str] = None):
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        self.path = path or os.path.join(base, "netdiag")
+
+    def _file(self, key: str) -> str:
+        import hashlib
+        return os.path.join(self.path, hashlib.sha1(key.encode()).hexdigest() + ".json")
+
+    def get(self, key: str):
+        try:
+            with open(self._file(key)) as f:
+                item = json.load(f)
+            return item["stored_at"], item["value"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def set(self, key: str, stored_at: float, value: Dict[str, Any]):
+        import tempfile
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump({"key": key, "stored_at": stored_at, "value": value}, f, default=str)
+            os.replace(tmp, self._file(key))
+        except (OSError, TypeError, ValueError) as e:
+            LOG.debug("disk cache write failed for %s: %s", key, e)
+
+    def clear(self):
+        import glob
+        for f in glob.glob(os.path.join(self.path, "*.json")):
+            try:
+                os.remove(f)
+            except OSError:
+                pass
+
+
+class ResultCache:
+    """
+    Per-check TTL cache for run_all() results. Stores are consulted in order
+    (memory first, then disk); a disk hit is promoted into memory. Failed
+    results are never cached.
+    """
+
+    def __init__(self, stores: Optional[List[Any]] = None, ttls: Optional[Dict[str, float]] = None):
+        self.stores = stores if stores is not None else [MemoryStore()]
+        self.ttls = dict(CHECK_TTLS, **(ttls or {}))
+
+    @classmethod
+    def with_disk(cls, path: Optional[str] = None, ttls: Optional[Dict[str, float]] = None) -> "ResultCache":
+        return cls([MemoryStore(), DiskStore(path)], ttls)
+
+    @staticmethod
+    def key(check: str, host: Optional[str]) -> str:
+        return f"{check}:{host.lower() if host and check in HOST_CHECKS else ''}"
+
+    def get(self, check: str, host: Optional[str] = None, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Cached result marked with from_cache/cache_age_s/cache_source, or None."""
+        limit = self.ttls.get(check, 0)
+        if max_age is not None:
+            limit = min(limit, max_age)
+        if limit <= 0:
+            return None
+        key = self.key(check, host)
+        now = time.time()
+        for i, store in enumerate(self.stores):
+            item = store.get(key)
+            if item is None:
+                continue
+            stored_at, value = item
+            age = now - stored_at
+            if age > limit:
+                continue
+            for earlier in self.stores[:i]:
+                earlier.set(key, stored_at, value)
+            return dict(value, from_cache=True, cache_age_s=round(age, 1),
+                        cache_source=type(store).__name__.replace("Store", "").lower())
+        return None
+
+    def put(self, check: str, host: Optional[str], value: Any):
+        if self.ttls.get(check, 0) <= 0 or not isinstance(value, dict) or "error" in value:
+            return
+        key, now = self.key(check, host), time.time()
+        for store in self.stores:
+            store.set(key, now, value)
+
+    def clear(self):
+        for store in self.stores:
+            store.clear()
+
+
+RESULT_CACHE = ResultCache()
+
+
+# Default per-check budgets in seconds (roughly each check's own worst case);
+# "resolve" bounds the up-front resolution of the target
+CHECK_BUDGETS = {
+    "resolve": 10, "ping": 40, "traceroute": 60, "pathping": 900, "dns": 15, "http": 20, "ssl": 15,
+    "interfaces": 15, "arp": 15, "conns": 30, "sockets": 30, "route": 15, "ports": 120, "speed": 120,
+}
+
+
+def _start_check(scope: CheckScope, fn, *args, **kwargs):
+    """
+    Run fn in a daemon thread bound to scope and return a Future. Daemon threads
+    (rather than a ThreadPoolExecutor) so a check that ignores cancellation,
+    like a stuck speedtest, cannot hold up interpreter exit.
+    """
+    fut = concurrent.futures.Future()
+
+    def runner():
+        _scope_local.scope = scope
+        if not fut.set_running_or_notify_cancel():
+            return
+        try:
+            fut.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            fut.set_exception(e)
+
+    threading.Thread(target=runner, name=f"netdiag-{scope.name}", daemon=True).start()
+    return fut
+
+
+def run_all(host: str, options: Dict[str, Any], ports: Optional[List[int]] = None,
+            cache: Optional[ResultCache] = RESULT_CACHE, max_age: Optional[float] = None,
+            deadline: Optional[float] = None, budgets: Optional[Dict[str, float]] = None,
+            on_event=None) -> Dict[str, Any]:
     """
-    Convenience runner. options keys: ping, traceroute, dns, http, ssl, interfaces, arp, conns, speed
+    Convenience runner. options keys: ping, traceroute, pathping, dns, http, ssl, interfaces, iface_rates, arp, conns, sockets, speed, route, syn, udp, service_detect, rate, burst
+
+    Results of checks listed in cache.ttls are reused while younger than their
+    TTL (and max_age, if given); pass cache=None to always re-run.
+
+    Every check runs concurrently under its own budget (CHECK_BUDGETS, overridden
+    by budgets) and the overall deadline in seconds. A check that overruns is
+    cancelled - its subprocesses killed, its sockets closed - and reported as
+    {"error": ..., "timed_out": True}; everything that finished is returned.
+    Resolving the host first is bounded the same way (the "resolve" budget);
+    if it overruns, resolve_error says so and the checks get the name as given.
+
+    on_event, if given, is called from the calling thread with
+    {"event": "start", host, ip, time, checks}, then {"event": "result", check,
+    result} as each check completes (cached ones first), then {"event": "end",
+    ...} carrying the report's summary fields.
     """
+    started = time.monotonic()
+    hard_stop = started + deadline if deadline else None
+    budgets = dict(CHECK_BUDGETS, **(budgets or {}))
     # Start the report dictionary with target host and current time
     report = {"host": host, "time": datetime.utcnow().isoformat()}
+
+    def expiry(budget: Optional[float]) -> Optional[float]:
+        expiries = [t for t in (started + budget if budget else None, hard_stop) if t is not None]
+        return min(expiries) if expiries else None
+
     try:
-        # Try to resolve the hostname to an IP address and save it
-        ip = socket.gethostbyname(host)
+        # Resolve once; dns_lookup, ssl_info, ping and pathping reuse the cached answer.
+        # Scoped like a check, so a slow resolver can't outlast the deadline
+        scope = CheckScope("resolve", expiry(budgets.get("resolve")))
+        fut = _start_check(scope, dns.resolve_host, host)
+        if not concurrent.futures.wait([fut], timeout=scope.remaining()).done:
+            scope.cancel()
+            raise TimeoutError(f"resolving timed out after {round(scope.expires - started, 1)}s")
+        addrs = fut.result()
+        if not addrs:
+            raise socket.gaierror(f"Could not resolve {host}")
+        ip = next((a for a in addrs if ":" not in a), addrs[0])
         report["ip"] = ip
     except Exception as e:
         # If it fails, record the resolve error
         report["resolve_error"] = str(e)
         ip = host  # Fallback to provided host
 
+    futures = {}
+    scopes: Dict[str, CheckScope] = {}
+    cached = {}
+
+    def emit(event, **fields):
+        if on_event:
+            try:
+                on_event({"event": event, **fields})
+            except Exception as e:
+                LOG.debug("on_event callback failed: %s", e)
+
+    def submit(key, fn, *args, **kwargs):
+        hit = cache.get(key, host, max_age) if cache else None
+        if hit is not None:
+            report[key] = hit
+            cached[key] = hit["cache_age_s"]
+            return
+        budget = budgets.get(key)
+        if key == "iface_rates" and key not in (budgets or {}):
+            budget = options["iface_rates"] + 10
+        scopes[key] = CheckScope(key, expiry(budget))
+        futures[key] = _start_check(scopes[key], fn, *args, **kwargs)
+
     # Run ping if enabled in options
     if options.get("ping"):
-        report["ping"] = ping_host(host)
+        submit("ping", ping_host, host)
     # Run traceroute if enabled in options
     if options.get("traceroute"):
-        report["traceroute"] = traceroute(host)
-
+        submit("traceroute", traceroute, host)
     # Run pathping if enabled (NEW)
     if options.get("pathping"):
-        report["pathping"] = pathping(host, max_hops=options.get("max_hops", 30))
-
-    # Run other checks concurrently
-    import concurrent.futures
-    futures = {}
-    # Use a thread pool to run multiple diagnostics in parallel
-    with concurrent.futures.ThreadPoolExecutor(max_workers=6) as ex:
-        # DNS lookup
-        if options.get("dns"):
-            futures["dns"] = ex.submit(dns_lookup, host)
-        # HTTP check (prepends http:// if host doesn't have a scheme)
-        if options.get("http"):
-            futures["http"] = ex.submit(http_check, ("http://" + host if not host.startswith("http") else host))
-        # SSL/TLS certificate info
-        if options.get("ssl"):
-            futures["ssl"] = ex.submit(ssl_info, host)
-        # Local network interfaces info
-        if options.get("interfaces"):
-            futures["interfaces"] = ex.submit(interfaces_info)
-        # ARP table
-        if options.get("arp"):
-            futures["arp"] = ex.submit(arp_table)
-        # Open network connections
-        if options.get("conns"):
-            futures["conns"] = ex.submit(open_connections)
-        # Network speed test
-        if options.get("speed"):
-            futures["speed"] = ex.submit(speedtest)
-        # ARP Table
-        if options.get("arp"):
-            futures["arp"] = ex.submit(arp_table)
-        if options.get("interfaces"):
-            futures["interfaces"] = ex.submit(interfaces_info)
-        # Port scanning if a port list is supplied
-        if ports:
-            futures["ports"] = ex.submit(port_scan, host, ports)
-
-        # Routing Table
-        if options.get("route"):
-            futures["route"] = ex.submit(route_print)
-        # Collect the results as tasks finish (wait for each)
-        for k, f in futures.items():
-            try:
-                report[k] = f.result()  # Save result in the report
-            except Exception as e:
-                # If something fails, record the error for this test
-                report[k] = {"error": str(e)}
+        submit("pathping", pathping, host, max_hops=options.get("max_hops", 30))
+    # DNS lookup
+    if options.get("dns"):
+        submit("dns", dns_lookup, host)
+    # HTTP check (prepends http:// if host doesn't have a scheme)
+    if options.get("http"):
+        submit("http", http_check, ("http://" + host if not host.startswith("http") else host))
+    # SSL/TLS certificate info
+    if options.get("ssl"):
+        submit("ssl", ssl_info, host)
+    # Local network interfaces info
+    if options.get("interfaces"):
+        submit("interfaces", interfaces_info)
+    # ARP table
+    if options.get("arp"):
+        submit("arp", arp_table)
+    # Open network connections
+    if options.get("conns"):
+        submit("conns", open_connections)
+    # Interface throughput/error rates
+    if options.get("iface_rates"):
+        submit("iface_rates", interface_rates, options["iface_rates"], options.get("iface_interval", 1.0))
+    # Bulk socket inventory (aggregates, optionally filtered by state)
+    if options.get("sockets"):
+        submit("sockets", socket_inventory, states=options.get("socket_states"), columns=False)
+    # Network speed test
+    if options.get("speed"):
+        submit("speed", speedtest)
+    # Port scanning if a port list is supplied
+    pacer = Pacer(options["rate"], options.get("burst")) if options.get("rate") else None
+    if ports:
+        submit("ports", port_scan, host, ports, use_syn=bool(options.get("syn")), use_udp=bool(options.get("udp")),
+               detect=bool(options.get("service_detect")), pacer=pacer)
+    # Routing Table
+    if options.get("route"):
+        submit("route", route_print)
+
+    emit("start", host=host, ip=report.get("ip"), time=report["time"],
+         checks=list(cached) + list(futures), resolve_error=report.get("resolve_error"))
+    for k in cached:
+        emit("result", check=k, result=report[k])
+
+    # Collect results as they finish; cancel whatever outlives its budget
+    pending = dict(futures)
+    timed_out = []
+    try:
+        while pending:
+            expiries = [scopes[k].expires for k in pending if scopes[k].expires is not None]
+            wait_for = max(0.0, min(expiries) - time.monotonic()) if expiries else None
+            done, _ = concurrent.futures.wait(pending.values(), timeout=wait_for,
+                                              return_when=concurrent.futures.FIRST_COMPLETED)
+            for k in [k for k, f in pending.items() if f in done]:
+                f = pending.pop(k)
+                try:
+                    report[k] = f.result()  # Save result in the report
+                    if cache:
+                        cache.put(k, host, report[k])
+                except Exception as e:
+                    # If something fails, record the error for this test
+                    report[k] = {"error": str(e)}
+                emit("result", check=k, result=report[k])
+            now = time.monotonic()
+            for k in [k for k in pending if scopes[k].expires is not None and scopes[k].expires <= now]:
+                pending.pop(k)
+                scopes[k].cancel()
+                budget = round(scopes[k].expires - started, 1)
+                report[k] = {"error": f"timed out after {budget}s", "timed_out": True, "budget_s": budget}
+                timed_out.append(k)
+                emit("result", check=k, result=report[k])
+    finally:
+        # Ctrl+C or an unexpected error: don't leave children running
+        for k in pending:
+            scopes[k].cancel()
+
+    if cached:
+        # Check name -> age in seconds of the reused result
+        report["cached"] = cached
+    if timed_out:
+        report["timed_out"] = timed_out
+    if pacer is not None and pacer.sent:
+        report["pacing"] = pacer.stats()
+    if GOVERNOR.waits or GOVERNOR.pressure:
+        # Port checks queued on the open-file limit or retried EMFILE/ENOBUFS (counts since start)
+        report["fd_governor"] = GOVERNOR.stats()
+    report["partial"] = bool(timed_out)
+    report["elapsed_s"] = round(time.monotonic() - started, 2)
+    emit("end", **{k: report[k] for k in ("cached", "timed_out", "pacing", "fd_governor", "partial", "elapsed_s")
+                   if k in report})
     # Return the complete report dictionary
     return report
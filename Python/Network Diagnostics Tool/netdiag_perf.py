@@ -0,0 +1,384 @@
+"""
+Local throughput testing (iperf-style) for NetDiag.
+A small server and client measure link capacity between our own nodes
+without speedtest-cli or any public server.
+
+Protocol (all over the server's TCP port):
+    control connection:  client sends one JSON line with the test parameters,
+                         server answers with {"session": id, "udp_port": n}
+    data connections:    "DATA <session>\\n" followed by raw payload (TCP mode)
+    UDP datagrams:       sent to udp_port, each starting with UDP_HEADER
+    end of test:         client sends "DONE <json>\\n" on the control connection,
+                         server answers with its receive-side report
+"""
+from __future__ import annotations
+import json, socket, socketserver, struct, tempfile, threading, time, uuid, os
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+LOG = logging.getLogger("netdiag_perf")
+
+DEFAULT_PORT = 5201
+TCP_LENGTH = 128 * 1024
+UDP_LENGTH = 1400
+# sequence number, sender timestamp (time.time()), stream index
+UDP_HEADER = struct.Struct("!QdI")
+
+
+def _recv_line(sock: socket.socket, limit: int = 65536) -> bytes:
+    # Read one '\n'-terminated line without buffering past it (payload may follow)
+    buf = bytearray()
+    while len(buf) < limit:
+        ch = sock.recv(1)
+        if not ch:
+            break
+        if ch == b"\n":
+            return bytes(buf)
+        buf += ch
+    return bytes(buf)
+
+
+class _Session:
+    """Receive-side accounting for one test run."""
+
+    def __init__(self, params: Dict[str, Any]):
+        self.params = params
+        self.lock = threading.Lock()
+        self.start: Optional[float] = None
+        self.bytes = 0
+        self.intervals: Dict[int, int] = {}
+        self.active_streams = 0
+        self.streams_done = threading.Event()
+        # UDP
+        self.packets = 0
+        self.out_of_order = 0
+        self.last_seq: Dict[int, int] = {}
+        self.transit: Dict[int, float] = {}
+        self.jitter: Dict[int, float] = {}
+        self.udp_sock: Optional[socket.socket] = None
+
+    def add(self, n: int, now: float):
+        with self.lock:
+            if self.start is None:
+                self.start = now
+            self.bytes += n
+            sec = int(now - self.start)
+            self.intervals[sec] = self.intervals.get(sec, 0) + n
+
+    def add_datagram(self, data: memoryview, now: float):
+        if len(data) < UDP_HEADER.size:
+            return
+        seq, sent_at, stream = UDP_HEADER.unpack_from(data)
+        self.add(len(data), now)
+        with self.lock:
+            self.packets += 1
+            last = self.last_seq.get(stream, -1)
+            if seq < last:
+                self.out_of_order += 1
+            else:
+                self.last_seq[stream] = seq
+            # RFC 3550 interarrival jitter; the clock offset between hosts cancels out
+            transit = now - sent_at
+            prev = self.transit.get(stream)
+            if prev is not None:
+                j = self.jitter.get(stream, 0.0)
+                self.jitter[stream] = j + (abs(transit - prev) - j) / 16.0
+            self.transit[stream] = transit
+
+    def report(self) -> Dict[str, Any]:
+        with self.lock:
+            report = {
+                "received_bytes": self.bytes,
+                "intervals": [{"second": k, "bytes": v, "mbps": round(v * 8 / 1e6, 2)}
+                              for k, v in sorted(self.intervals.items())],
+            }
+            if self.params.get("protocol") == "udp":
+                report["received_packets"] = self.packets
+                report["out_of_order"] = self.out_of_order
+                report["jitter_ms"] = round(sum(self.jitter.values()) / len(self.jitter) * 1000, 3) if self.jitter else 0.0
+            return report
+
+
+class _PerfHandler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        sock = self.request
+        sock.settimeout(None)
+        line = _recv_line(sock)
+        if line.startswith(b"DATA "):
+            self._data(sock, line.split()[1].decode(errors="ignore"))
+        elif line.startswith(b"{"):
+            try:
+                params = json.loads(line)
+            except ValueError:
+                return
+            self._control(sock, params)
+
+    def _data(self, sock: socket.socket, sid: str):
+        session = self.server.sessions.get(sid)
+        if session is None:
+            return
+        rcvbuf = session.params.get("window")
+        if rcvbuf:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        buf = bytearray(max(TCP_LENGTH, session.params.get("length") or 0))
+        view = memoryview(buf)
+        try:
+            while True:
+                n = sock.recv_into(view)
+                if not n:
+                    break
+                session.add(n, time.monotonic())
+        except OSError:
+            pass
+        finally:
+            with session.lock:
+                session.active_streams -= 1
+                if session.active_streams <= 0:
+                    session.streams_done.set()
+
+    def _udp_receiver(self, session: _Session):
+        buf = bytearray(65535)
+        view = memoryview(buf)
+        while True:
+            try:
+                n = session.udp_sock.recv_into(view)
+            except OSError:
+                break
+            session.add_datagram(view[:n], time.monotonic())
+
+    def _control(self, sock: socket.socket, params: Dict[str, Any]):
+        sid = uuid.uuid4().hex
+        session = _Session(params)
+        session.active_streams = int(params.get("streams", 1))
+        self.server.sessions[sid] = session
+        reply: Dict[str, Any] = {"session": sid}
+        receiver = None
+        try:
+            if params.get("protocol") == "udp":
+                session.udp_sock = socket.socket(sock.family, socket.SOCK_DGRAM)
+                session.udp_sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, params.get("window") or 4 * 1024 * 1024)
+                session.udp_sock.bind((sock.getsockname()[0], 0))
+                reply["udp_port"] = session.udp_sock.getsockname()[1]
+                receiver = threading.Thread(target=self._udp_receiver, args=(session,), daemon=True)
+                receiver.start()
+            sock.sendall((json.dumps(reply) + "\n").encode())
+            LOG.info(f"Perf test {sid[:8]} from {self.client_address[0]}: {params}")
+
+            done = _recv_line(sock)
+            if params.get("protocol") == "udp":
+                time.sleep(0.25)  # let in-flight datagrams land
+            else:
+                session.streams_done.wait(timeout=5)
+            report = session.report()
+            if done.startswith(b"DONE "):
+                try:
+                    sent = json.loads(done[5:]).get("sent_packets")
+                except ValueError:
+                    sent = None
+                if sent is not None:
+                    lost = max(0, sent - session.packets)
+                    report["lost_packets"] = lost
+                    report["loss_percent"] = round(lost / sent * 100, 3) if sent else 0.0
+            sock.sendall((json.dumps(report) + "\n").encode())
+        finally:
+            if session.udp_sock:
+                session.udp_sock.close()
+            self.server.sessions.pop(sid, None)
+
+
+class PerfServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "0.0.0.0", port: int = DEFAULT_PORT):
+        if ":" in host:
+            self.address_family = socket.AF_INET6
+        super().__init__((host, port), _PerfHandler)
+        self.sessions: Dict[str, _Session] = {}
+
+
+def perf_server(host: str = "0.0.0.0", port: int = DEFAULT_PORT):
+    """Run the throughput test server until interrupted."""
+    with PerfServer(host, port) as server:
+        LOG.info(f"Perf server listening on {host}:{server.server_address[1]}")
+        server.serve_forever()
+
+
+def _tcp_stream(host: str, port: int, sid: str, deadline: float, length: int, window: Optional[int],
+                zerocopy: bool, counters: List[int], idx: int):
+    with socket.create_connection((host, port), timeout=10) as sock:
+        if window:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, window)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.sendall(f"DATA {sid}\n".encode())
+        if zerocopy:
+            # Kernel copies straight from the page cache; nothing passes through Python
+            with tempfile.TemporaryFile() as f:
+                f.write(os.urandom(length))
+                f.flush()
+                while time.monotonic() < deadline:
+                    counters[idx] += sock.sendfile(f, 0, length)
+        else:
+            view = memoryview(os.urandom(length))
+            while time.monotonic() < deadline:
+                counters[idx] += sock.send(view)
+
+
+def _udp_stream(host: str, port: int, deadline: float, length: int, rate: float, window: Optional[int],
+                counters: List[int], packets: List[int], idx: int):
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    with socket.socket(family, socket.SOCK_DGRAM) as sock:
+        if window:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, window)
+        sock.connect((host, port))
+        buf = bytearray(os.urandom(max(length, UDP_HEADER.size)))
+        gap = len(buf) * 8 / rate if rate else 0.0
+        next_send = time.monotonic()
+        seq = 0
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if now < next_send:
+                time.sleep(min(next_send - now, 0.01))
+                continue
+            UDP_HEADER.pack_into(buf, 0, seq, time.time(), idx)
+            try:
+                counters[idx] += sock.send(buf)
+                packets[idx] += 1
+                seq += 1
+            except OSError:
+                # ENOBUFS: socket buffer full, retry on the next tick
+                pass
+            next_send += gap
+
+
+def _run_stream(target: Callable[..., None], errors: List[Optional[str]], idx: int, *args):
+    # Stream thread body: an exception ends only this stream and is kept for the report
+    try:
+        target(*args)
+    except Exception as e:
+        errors[idx] = f"{type(e).__name__}: {e}"
+
+
+def perf_client(host: str, port: int = DEFAULT_PORT, streams: int = 1, duration: float = 10.0,
+                udp: bool = False, rate: Optional[float] = None, length: Optional[int] = None,
+                window: Optional[int] = None, zerocopy: bool = False,
+                on_interval: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Run a throughput test against a perf_server.
+
+    Args:
+        host: Server hostname or IP
+        port: Server control port (default 5201)
+        streams: Number of parallel streams
+        duration: Test length in seconds
+        udp: Send UDP datagrams instead of TCP streams
+        rate: Target rate in bits/s for UDP (split across streams, default 1 Mbit/s)
+        length: Bytes per send() call / datagram size
+        window: SO_SNDBUF/SO_RCVBUF size in bytes
+        zerocopy: Use sendfile() for TCP streams
+        on_interval: Called with each per-second sender report
+
+    Returns:
+        Dictionary with per-second intervals, sender totals and the server's receive report.
+        If a stream fails, stream_errors lists [{"stream", "error"}] and success is False
+        (the totals still cover what was sent).
+    """
+    protocol = "udp" if udp else "tcp"
+    length = length or (UDP_LENGTH if udp else TCP_LENGTH)
+    if udp:
+        rate = rate or 1e6
+    params = {"protocol": protocol, "streams": streams, "duration": duration,
+              "length": length, "window": window}
+    result: Dict[str, Any] = {"host": host, "port": port, "protocol": protocol, "streams": streams,
+                              "duration": duration, "length": length, "zerocopy": zerocopy and not udp}
+    if udp:
+        result["target_rate_mbps"] = round(rate / 1e6, 3)
+
+    try:
+        ctrl = socket.create_connection((host, port), timeout=10)
+    except OSError as e:
+        result["error"] = f"Cannot reach perf server: {e}"
+        result["success"] = False
+        return result
+
+    with ctrl:
+        try:
+            ctrl.sendall((json.dumps(params) + "\n").encode())
+            hello = json.loads(_recv_line(ctrl) or b"{}")
+            sid = hello["session"]
+        except (OSError, ValueError, KeyError) as e:
+            result["error"] = f"Handshake failed: {e}"
+            result["success"] = False
+            return result
+
+        counters = [0] * streams
+        packets = [0] * streams
+        errors: List[Optional[str]] = [None] * streams
+        start = time.monotonic()
+        deadline = start + duration
+        if udp:
+            threads = [threading.Thread(target=_run_stream, daemon=True,
+                                        args=(_udp_stream, errors, i, host, hello["udp_port"], deadline, length,
+                                              rate / streams, window, counters, packets, i))
+                       for i in range(streams)]
+        else:
+            threads = [threading.Thread(target=_run_stream, daemon=True,
+                                        args=(_tcp_stream, errors, i, host, port, sid, deadline, length, window,
+                                              zerocopy, counters, i))
+                       for i in range(streams)]
+        for t in threads:
+            t.start()
+
+        # Per-second sender-side reports while the streams run
+        intervals = []
+        last_total, second = 0, 0
+        while any(t.is_alive() for t in threads):
+            for t in threads:
+                t.join(timeout=max(0.0, start + second + 1 - time.monotonic()))
+            total = sum(counters)
+            span = min(time.monotonic(), deadline) - (start + second)
+            if span > 0.05:
+                entry = {"second": second, "bytes": total - last_total,
+                         "mbps": round((total - last_total) * 8 / 1e6 / span, 2)}
+                intervals.append(entry)
+                if on_interval:
+                    on_interval(entry)
+            last_total = total
+            second += 1
+        elapsed = time.monotonic() - start
+
+        sent = sum(counters)
+        result["intervals"] = intervals
+        result["sent_bytes"] = sent
+        result["sender_mbps"] = round(sent * 8 / 1e6 / elapsed, 2) if elapsed else 0.0
+        if udp:
+            result["sent_packets"] = sum(packets)
+        failed = [{"stream": i, "error": e} for i, e in enumerate(errors) if e]
+        if failed:
+            result["stream_errors"] = failed
+
+        try:
+            ctrl.settimeout(15)
+            ctrl.sendall(("DONE " + json.dumps({"sent_packets": sum(packets) if udp else None}) + "\n").encode())
+            server = json.loads(_recv_line(ctrl) or b"{}")
+        except (OSError, ValueError) as e:
+            result["error"] = f"No report from server: {e}"
+            result["success"] = False
+            return result
+
+    result["server"] = server
+    received = server.get("received_bytes", 0)
+    result["received_bytes"] = received
+    result["receiver_mbps"] = round(received * 8 / 1e6 / elapsed, 2) if elapsed else 0.0
+    for k in ("lost_packets", "loss_percent", "jitter_ms", "out_of_order"):
+        if k in server:
+            result[k] = server[k]
+    if failed:
+        result["error"] = f"{len(failed)} of {streams} stream(s) failed: {failed[0]['error']}"
+        result["success"] = False
+        return result
+    result["success"] = True
+    return result
@@ -0,0 +1,145 @@
+"""
+Asyncio subprocess runner for NetDiag.
+All child processes (ping, traceroute, ip, arp, ...) are started and
+supervised from one shared event loop, so waiting on a tool costs no thread.
+A global semaphore caps how many children run at once, stdout can be streamed
+line by line to a parser, and a timeout or cancellation kills the child's
+whole process group. The process handling itself is netscan's runner
+(netscan._aio.execute), which the scan engines use too.
+"""
+from __future__ import annotations
+import asyncio, concurrent.futures, os, sys, threading
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+
+# The shared scanning package (netscan) lives next to the tool folders
+_PYTHON_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+if _PYTHON_ROOT not in sys.path:
+    sys.path.insert(0, _PYTHON_ROOT)
+from netscan import _aio
+
+MAX_PROCS = 64
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+_sem: Optional[asyncio.Semaphore] = None
+_stats = {"running": 0, "peak": 0, "started": 0, "timeouts": 0, "cancelled": 0}
+
+
+def _runner_loop() -> asyncio.AbstractEventLoop:
+    """Start the shared loop thread on first use."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def serve():
+                global _sem
+                asyncio.set_event_loop(loop)
+                _sem = asyncio.Semaphore(MAX_PROCS)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            threading.Thread(target=serve, name="netdiag-proc", daemon=True).start()
+            ready.wait()
+            _loop = loop
+    return _loop
+
+
+def set_max_procs(n: int):
+    """Change the global child-process limit. Takes effect for processes not yet queued."""
+    global MAX_PROCS
+    MAX_PROCS = max(1, n)
+    if _loop is not None:
+        async def swap():
+            global _sem
+            _sem = asyncio.Semaphore(MAX_PROCS)
+        asyncio.run_coroutine_threadsafe(swap(), _loop).result()
+
+
+def stats() -> dict:
+    """Counters: running, peak, started, timeouts, cancelled."""
+    return dict(_stats)
+
+
+async def _execute(cmd: List[str], timeout: float,
+                   on_line: Optional[Callable[[str], None]]) -> Tuple[int, str, str]:
+    async with _sem:
+        _stats["started"] += 1
+        _stats["running"] += 1
+        _stats["peak"] = max(_stats["peak"], _stats["running"])
+        try:
+            rc, out, err = await _aio.execute(cmd, timeout, on_line)
+        except asyncio.CancelledError:
+            _stats["cancelled"] += 1
+            raise
+        finally:
+            _stats["running"] -= 1
+        if rc == -1 and err == "timeout":
+            _stats["timeouts"] += 1
+        return rc, out, err
+
+
+def submit(cmd: List[str], timeout: float = 30,
+           on_line: Optional[Callable[[str], None]] = None) -> concurrent.futures.Future:
+    """
+    Queue a command on the shared runner and return a concurrent Future for
+    (returncode, stdout, stderr). Cancelling the Future kills the process group.
+    on_line is called from the runner thread for each stdout line.
+    """
+    return asyncio.run_coroutine_threadsafe(_execute(list(cmd), timeout, on_line), _runner_loop())
+
+
+async def run(cmd: List[str], timeout: float = 30,
+              on_line: Optional[Callable[[str], None]] = None) -> Tuple[int, str, str]:
+    """
+    Await a command from any event loop. Returns (returncode, stdout, stderr);
+    returncode is -1 and stderr "timeout" when the deadline passes, or the
+    error text when the command cannot be started.
+    """
+    loop = _runner_loop()
+    fut = None
+    try:
+        if asyncio.get_running_loop() is loop:
+            return await _execute(list(cmd), timeout, on_line)
+        fut = submit(cmd, timeout, on_line)
+        return await asyncio.wrap_future(fut)
+    except asyncio.CancelledError:
+        if fut is not None:
+            fut.cancel()
+        raise
+    except Exception as e:
+        return -1, "", str(e)
+
+
+def run_sync(cmd: List[str], timeout: float = 30,
+             on_line: Optional[Callable[[str], None]] = None) -> Tuple[int, str, str]:
+    """Blocking form of run() for code that has no event loop."""
+    try:
+        return submit(cmd, timeout, on_line).result()
+    except concurrent.futures.CancelledError:
+        return -1, "", "cancelled"
+    except Exception as e:
+        return -1, "", str(e)
+
+
+async def lines(cmd: List[str], timeout: float = 30) -> AsyncIterator[str]:
+    """Async-iterate a command's stdout lines on the caller's loop as they are printed."""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+    fut = submit(cmd, timeout, lambda line: loop.call_soon_threadsafe(queue.put_nowait, line))
+    fut.add_done_callback(lambda _f: loop.call_soon_threadsafe(queue.put_nowait, done))
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            yield item
+    finally:
+        if not fut.done():
+            fut.cancel()
+
+
+# Run a coroutine from sync code, even inside a running loop; re-raises what the coroutine raises
+run_coroutine = _aio.run_sync
@@ -0,0 +1,50 @@
+"""
+Consistency check for sharded sweeps.
+
+Sweeps one block (loopback by default, where every address answers) in a
+single process and then with --processes workers, and compares the live-host
+counts. Exits 1 if the sharded sweep finds fewer hosts than the single one,
+e.g. because the workers' ICMP sockets are drowning in each other's replies.
+
+    python check_sharded.py
+    python check_sharded.py --network 127.0.0.0/18 --processes 8 --concurrency 2048
+"""
+import argparse, asyncio, os, sys, time
+
+# The shared scanning package (netscan) lives next to the tool folders
+_PYTHON_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+if _PYTHON_ROOT not in sys.path:
+    sys.path.insert(0, _PYTHON_ROOT)
+
+from netscan import discovery, parallel, targets
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare sharded and single-process sweeps")
+    ap.add_argument("--network", default="127.0.0.0/18", help="Block to sweep (default: 127.0.0.0/18)")
+    ap.add_argument("--processes", type=int, default=4, help="Worker processes (default: 4)")
+    ap.add_argument("--concurrency", type=int, default=512, help="Probes in flight per process (default: 512)")
+    ap.add_argument("--timeout", type=float, default=1.0, help="Echo timeout in seconds (default: 1)")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    single = asyncio.run(discovery.discover(targets.expand(args.network), args.timeout, args.concurrency,
+                                            details=False))
+    single_up = sum(1 for h in single if h.alive)
+    print(f"1 process     {single_up:8d} up of {len(single)}  ({time.perf_counter() - t0:.1f}s)")
+
+    t0 = time.perf_counter()
+    sharded = parallel.sweep_processes(args.network, args.processes, timeout=args.timeout,
+                                       concurrency=args.concurrency, details=False)
+    print(f"{sharded['processes']} processes   {len(sharded['alive']):8d} up of {sharded['scanned']}  "
+          f"({time.perf_counter() - t0:.1f}s)")
+
+    failed = len(sharded["alive"]) < single_up or sharded["scanned"] != len(single) or bool(sharded["errors"])
+    for error in sharded["errors"]:
+        print(f"  error: {error}")
+    print("\nFAIL" if failed else "\nOK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
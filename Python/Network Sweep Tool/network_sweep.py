@@ -1,12 +1,22 @@
+import asyncio
 import ipaddress
-import platform
-import subprocess
-import concurrent.futures
-import re
+import os
 import socket
-from typing import List, Dict, Any, Optional
+import sys
+from typing import Dict, Any, List, Optional
 import time
 
+# The shared scanning package (netscan) lives next to the tool folders
+_PYTHON_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+if _PYTHON_ROOT not in sys.path:
+    sys.path.insert(0, _PYTHON_ROOT)
+
+from netscan import discovery, distributed, parallel, targets
+from netscan.checkpoint import Checkpoint, default_path
+from netscan.pacing import Pacer
+from netscan.icmp import guess_os
+from netscan.results import HostResult
+
 class Colors:
     HEADER = '\033[95m'
     OKBLUE = '\033[94m'
@@ -18,155 +28,90 @@ class Colors:
     BOLD = '\033[1m'
     UNDERLINE = '\033[4m'
 
-# Retrieve MAC Address for an IP using ARP Table
-def get_mac_address(ip: str) -> Optional[str]:
-    system = platform.system().lower()
-
-    try:
-        if system == "windows":
-            # Windows: arp -a ip
-            cmd = ["arp", "-a", ip]
-        else:
-            # Linux: ip neigh show IP or arp -n IP
-            cmd = ["ip", "neigh", "show", ip]
-        # Run the OS Commands
-        result = subprocess.run(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            timeout=2
-        )
-
-        output = result.stdout
-
-        # Extract MAC address using regex
-        # Matches: AA:BB:CC:DD:EE:FF or AA-BB-CC-DD-EE-FF
-        mac_pattern = r'([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})'
-        match = re.search(mac_pattern, output)
-
-        if match:
-            mac = match.group(0)
-            mac = mac.replace('-', ':').upper()
-            return mac
-        return None
-
-    except Exception:
-        return None
-
-
-# Retrieve hostname for an IP using reverse DNS lookup
-def get_hostname(ip: str) -> Optional[str]:
-    try:
-        hostname, _, _ = socket.gethostbyaddr(ip)
-        return hostname
-    # Host-related, address-related and timeout related error
-    except (socket.herror, socket.gaierror, socket.timeout):
-        return None
-
-
-# Identify device vendor from MAC address using mac-vendor-lookup library
-from mac_vendor_lookup import MacLookup
-
-_mac_lookup = MacLookup()
-
-def get_vendor_from_mac(mac: str) -> str:
-    if not mac or len(mac) < 8:
-        return "Unknown"
-    try:
-        return _mac_lookup.lookup(mac)
-    except Exception:
-        return "Unknown"
-
-# Ping a single host and gather additional info.
-def ping_single_host(ip: str, timeout: int = 1) -> Dict[str, Any]:
-    system = platform.system().lower()
-
-    if system == "windows":
-        cmd = ["ping", "-n", "1", "-w", str(timeout * 1000), ip]
-    else:
-        cmd = ["ping", "-c", "1", "-W", str(timeout), ip]
-
-    try:
-        result = subprocess.run(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            timeout=timeout * 2
-        )
-
-        output = result.stdout
-
-        # Check for TTL in output (indicates successful ping)
-        if system == "windows":
-            # Extract TTL values
-            ttl_match = re.search(r'TTL=(\d+)', output, re.IGNORECASE)
-            ttl = int(ttl_match.group(1)) if ttl_match else None
-
-            # Extract Response time
-            time_match = re.search(r'time[=<](\d+)ms', output, re.IGNORECASE)
-            rtt = int(time_match.group(1)) if time_match else None
-
-            # Get MAC and hostname
-            mac = get_mac_address(ip)
-            hostname = get_hostname(ip)
-            vendor = get_vendor_from_mac(mac) if mac else "Unknown"
-
-            return {
-                "ip": ip,
-                "status": "up",
-                "ttl": ttl,
-                "rtt_ms": rtt,
-                "mac": mac,
-                "hostname": hostname,
-                "vendor": vendor
-            }
-        else:
-            if "ttl=" in output.lower():
-                # Extract TTL values
-                ttl_match = re.search(r'TTL=(\d+)', output, re.IGNORECASE)
-                ttl = int(ttl_match.group(1)) if ttl_match else None
-
-                # Extract Response time
-                time_match = re.search(r'time[=<]([\d.]+)\s*ms', output, re.IGNORECASE)
-                rtt = int(time_match.group(1)) if time_match else None
-
-                # Get MAC and hostname
-                mac = get_mac_address(ip)
-                hostname = get_hostname(ip)
-                vendor = get_vendor_from_mac(mac) if mac else "Unknown"
-
-                return {
-                    "ip": ip,
-                    "status": "up",
-                    "ttl": ttl,
-                    "rtt_ms": rtt,
-                    "mac": mac,
-                    "hostname": hostname,
-                    "vendor": vendor
-                }
-            return {"ip": ip, "status": "down"}
-    except subprocess.TimeoutExpired:
-        return {"ip": ip, "status": "timeout"}
-    except Exception as e:
-        return {"ip": ip, "status": "error", "error": str(e)}
+# Convert a discovery result into this tool's per-host record
+def host_record(host: HostResult) -> Dict[str, Any]:
+    if host.error:
+        return {"ip": host.ip, "status": "error", "error": host.error}
+    if not host.alive:
+        return {"ip": host.ip, "status": "down"}
+    return {
+        "ip": host.ip,
+        "status": "up",
+        "ttl": host.ttl,
+        "rtt_ms": host.rtt_ms,
+        "mac": host.mac,
+        "hostname": host.hostname,
+        "vendor": host.vendor or "Unknown"
+    }
+
+
+# Addresses net.hosts() yields, without listing them
+def count_hosts(net) -> int:
+    total = net.num_addresses
+    if net.version == 4 and net.prefixlen < 31:
+        total -= 2
+    elif net.version == 6 and net.prefixlen < 127:
+        total -= 1
+    return total
+
+
+# Print one live host as soon as it is found
+def print_host(ping_result: Dict[str, Any]):
+    ttl = ping_result.get("ttl", "?")
+    rtt = ping_result.get("rtt_ms", "?")
+    mac = ping_result.get("mac", "N/A")
+    hostname = ping_result.get("hostname", "N/A")
+    vendor = ping_result.get("vendor", "Unknown")
+
+    print(f"{Colors.OKGREEN}[✓] {ping_result['ip']:15}{Colors.ENDC} - "
+          f"{Colors.BOLD}UP{Colors.ENDC} | "
+          f"TTL={Colors.WARNING}{ttl}{Colors.ENDC} | "
+          f"RTT={Colors.OKCYAN}{str(rtt) + 'ms' if rtt is not None else 'N/A'}{Colors.ENDC} | "
+          f"MAC={Colors.OKBLUE}{mac}{Colors.ENDC} | "
+          f"Name={Colors.HEADER}{hostname}{Colors.ENDC} | "
+          f"Vendor={Colors.WARNING}{vendor}{Colors.ENDC}"
+          + (f" | Worker={Colors.OKCYAN}{ping_result['worker']}{Colors.ENDC}" if ping_result.get("worker") else ""))
 
 
 # Sweep a network subnet to discover active hosts
-def network_sweep(network: str, timeout: int = 1, max_workers: int = 50) -> Dict[str, Any]:
+# rate (echo requests per second), burst and fairness configure an optional netscan Pacer
+# processes > 1 shards the network across that many worker processes (0 = one per CPU)
+# Progress is checkpointed to `checkpoint` (default: sweep_<network>.checkpoint) while the sweep
+# runs and removed when it completes; resume skips the addresses an interrupted run finished
+def network_sweep(network: str, timeout: int = 1, max_workers: int = 50, rate: Optional[float] = None,
+                  burst: Optional[float] = None, fairness: str = "subnet", processes: int = 1,
+                  checkpoint: Optional[str] = None, resume: bool = False) -> Dict[str, Any]:
+    try:
+        pacer = Pacer(rate, burst, fairness) if rate else None
+    except ValueError as e:
+        return {"error": f"Invalid pacing: {e}"}
     try:
         # Parse the network
         net = ipaddress.ip_network(network, strict=False)
-        # Generate the list of hosts (exclude network and broadcast address)
-        hosts = [str(ip) for ip in net.hosts()]
+    except ValueError as e:
+        return {"error": f"Invalid network format: {str(e)}"}
+    try:
+        ck = Checkpoint(checkpoint or default_path("sweep", str(net)),
+                        {"tool": "network_sweep", "network": str(net)}, resume)
+    except (ValueError, OSError) as e:
+        return {"error": f"Cannot resume: {e}"}
+    try:
+        sharded = processes != 1
+        if sharded:
+            # Workers expand their own chunks; only count the hosts here
+            hosts = []
+            total = count_hosts(net)
+        else:
+            # Generate the list of hosts (exclude network and broadcast address)
+            hosts = [str(ip) for ip in net.hosts()]
 
-        if not hosts:
-            hosts = [str(net.network_address)]
+            if not hosts:
+                hosts = [str(net.network_address)]
+            total = len(hosts)
 
         result = {
             "network": str(net),
-            "total_hosts": len(hosts),
+            "total_hosts": total,
             "scanned": 0,
             "up": 0,
             "down": 0,
@@ -175,59 +120,115 @@ def network_sweep(network: str, timeout: int = 1, max_workers: int = 50) -> Dict
             "start_time": time.time()
         }
 
+        # Hosts an interrupted run already found
+        resumed = set()
+        if ck.resumed:
+            for record in ck.records():
+                resumed.add(record["ip"])
+                result["active_hosts"].append(record)
+                result["all_results"].append(record)
+            result["up"] = len(resumed)
+            result["scanned"] = min(ck.count(), total)
+            result["down"] = result["scanned"] - result["up"]
+            result["resumed"] = result["scanned"]
+            if not sharded:
+                hosts = [ip for ip in hosts if not ck.finished(ip)]
+
         print(f"{Colors.HEADER}{Colors.BOLD}{'=' * 80}{Colors.ENDC}")
         print(f"{Colors.HEADER}{Colors.BOLD}Network Sweep Tool{Colors.ENDC}")
         print(f"{Colors.HEADER}{Colors.BOLD}{'=' * 80}{Colors.ENDC}\n")
         print(f"{Colors.OKCYAN}Scanning network: {Colors.BOLD}{net}{Colors.ENDC}")
-        print(f"{Colors.OKCYAN}Total hosts to scan: {Colors.BOLD}{len(hosts)}{Colors.ENDC}")
-        print(f"{Colors.OKCYAN}Using {Colors.BOLD}{max_workers}{Colors.ENDC}{Colors.OKCYAN} concurrent workers{Colors.ENDC}")
+        print(f"{Colors.OKCYAN}Total hosts to scan: {Colors.BOLD}{total}{Colors.ENDC}")
+        print(f"{Colors.OKCYAN}Using {Colors.BOLD}{max_workers}{Colors.ENDC}{Colors.OKCYAN} concurrent workers"
+              f"{' per process' if sharded else ''}{Colors.ENDC}")
+        if pacer:
+            print(f"{Colors.OKCYAN}Paced at {Colors.BOLD}{pacer.rate:g}{Colors.ENDC}{Colors.OKCYAN} probes/s "
+                  f"(burst {pacer.burst:g}, fair per {fairness}){Colors.ENDC}")
+        if ck.resumed:
+            print(f"{Colors.OKCYAN}Resuming from {ck.path}: {Colors.BOLD}{result['scanned']}{Colors.ENDC}"
+                  f"{Colors.OKCYAN} hosts already swept, {result['up']} up{Colors.ENDC}")
         print(f"{Colors.OKBLUE}{'-' * 80}{Colors.ENDC}\n")
 
-        # Perform concurrent ping sweep
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all ping tasks
-            future_to_ip = {executor.submit(ping_single_host, ip, timeout): ip for ip in hosts}
-
-            # Process results as they complete
-            for future in concurrent.futures.as_completed(future_to_ip):
-                ip = future_to_ip[future]
-                try:
-                    ping_result = future.result()   # Retrieves the actual return value from ping_single_host()
-                    result["scanned"] += 1   #
-                    result["all_results"].append(ping_result)   # Stores every host whether up or down
-
-                    if ping_result["status"] == "up":
-                        result["up"] += 1
-                        result["active_hosts"].append(ping_result)   # Stores Only online hosts
-
-                        # Print active host immediately with colors
-                        ttl = ping_result.get("ttl", "?")
-                        rtt = ping_result.get("rtt_ms", "?")
-                        mac = ping_result.get("mac", "N/A")
-                        hostname = ping_result.get("hostname", "N/A")
-                        vendor = ping_result.get("vendor", "Unknown")
-
-                        print(f"{Colors.OKGREEN}[✓] {ip:15}{Colors.ENDC} - "
-                              f"{Colors.BOLD}UP{Colors.ENDC} | "
-                              f"TTL={Colors.WARNING}{ttl}{Colors.ENDC} | "
-                              f"RTT={Colors.OKCYAN}{str(rtt) + 'ms' if rtt is not None else 'N/A'}{Colors.ENDC} | "
-                              f"MAC={Colors.OKBLUE}{mac}{Colors.ENDC} | "
-                              f"Name={Colors.HEADER}{hostname}{Colors.ENDC} | "
-                              f"Vendor={Colors.WARNING}{vendor}{Colors.ENDC}")
-                    else:
-                        result["down"] += 1
-
-                    # Progress indicator every 25 hosts
-                    if result["scanned"] % 25 == 0:
-                        progress = (result["scanned"] / len(hosts)) * 100
-
-                        print(f"{Colors.OKCYAN}Progress: {result['scanned']}/{len(hosts)} ({progress:.1f}%){Colors.ENDC}")
-                except Exception as e:
-                    result["down"] += 1
-                    print(f"{Colors.FAIL}[!] Error Scanning {ip}: {str(e)}{Colors.ENDC}")
+        def show_progress():
+            progress = (result["scanned"] / total) * 100
+
+            print(f"{Colors.OKCYAN}Progress: {result['scanned']}/{total} ({progress:.1f}%){Colors.ENDC}")
+
+        # Called as each host finishes (after MAC/name/vendor lookups for live ones)
+        def report(host: HostResult, counted: bool = True):
+            ping_result = host_record(host)
+            ip = ping_result["ip"]
+            if counted:
+                result["scanned"] += 1
+            if ping_result["status"] != "error":   # Errors are retried by --resume
+                ck.done(ip, record=ping_result if ping_result["status"] == "up" else None)
+            if ip in resumed:
+                return   # Found again in a chunk the interrupted run left half done
+            result["all_results"].append(ping_result)   # Stores every host whether up or down
+
+            if ping_result["status"] == "up":
+                result["up"] += 1
+                result["active_hosts"].append(ping_result)   # Stores Only online hosts
+
+                # Print active host immediately with colors
+                print_host(ping_result)
+            else:
+                result["down"] += 1
+                if ping_result["status"] == "error":
+                    print(f"{Colors.FAIL}[!] Error Scanning {ip}: {ping_result['error']}{Colors.ENDC}")
+
+            # Progress indicator every 25 hosts
+            if counted and result["scanned"] % 25 == 0:
+                show_progress()
+
+        try:
+            if sharded:
+                # Worker processes stream back live hosts only, and a probed count per chunk
+                base = result["scanned"]
+
+                def chunk_done(chunk: str, probed: int, scanned: int, error: Optional[str]):
+                    result["scanned"] = min(base + scanned, total)
+                    if error is None:   # A failed chunk stays open for --resume
+                        ck.done_block(chunk)
+                    show_progress()
+
+                skip = {c for c in targets.chunks(str(net)) if ck.finished_block(c)} if ck.resumed else ()
+                sweep = parallel.sweep_processes(str(net), processes or None, timeout=timeout,
+                                                 concurrency=max_workers, rate=rate, burst=burst,
+                                                 fairness=fairness, skip=skip,
+                                                 on_host=lambda host: report(host, counted=False),
+                                                 on_chunk=chunk_done)
+                result["down"] = result["scanned"] - result["up"]
+                result["processes"] = sweep["processes"]
+                for error in sweep["errors"]:
+                    print(f"{Colors.FAIL}[!] {error}{Colors.ENDC}")
+                if sweep["errors"]:
+                    result["errors"] = sweep["errors"]
+            else:
+                # Concurrent ping sweep on the shared ICMP engine
+                asyncio.run(discovery.discover(hosts, timeout=timeout, concurrency=max_workers, on_result=report,
+                                               pacer=pacer))
+        except KeyboardInterrupt:
+            ck.save()
+            return {"error": f"Interrupted after {result['scanned']} of {total} hosts; progress saved to "
+                             f"{ck.path} (run again with --resume to continue)"}
+
+        if result.get("errors"):
+            # Some chunks were lost; keep the checkpoint so --resume can sweep them
+            ck.save()
+            result["checkpoint"] = ck.path
+        else:
+            ck.remove()
 
         result["end_time"] = time.time()
         result["duration_seconds"] = round(result["end_time"] - result["start_time"], 2)
+        if pacer and sharded:
+            # Each worker paces its share; the combined rate is probes over wall time
+            elapsed = result["end_time"] - result["start_time"]
+            result["pacing"] = {"rate": pacer.rate, "burst": pacer.burst, "fairness": fairness,
+                                "achieved_pps": round(result["scanned"] / elapsed, 1) if elapsed else None}
+        elif pacer:
+            result["pacing"] = pacer.stats()
 
         # Sort active hosts by IP
         result["active_hosts"].sort(key=lambda x: ipaddress.ip_address(x["ip"]))
@@ -239,6 +240,97 @@ def network_sweep(network: str, timeout: int = 1, max_workers: int = 50) -> Dict
         return {"error": str(e)}
 
 
+# Coordinate a sweep of one or more networks carried out by workers (--serve);
+# workers connect with --worker, and state (a checkpoint file) lets a restarted coordinator resume
+def distributed_sweep(networks: List[str], listen: str = "", timeout: int = 1, token: Optional[str] = None,
+                      state: Optional[str] = None) -> Dict[str, Any]:
+    found: Dict[str, str] = {}   # ip -> worker that reported it
+
+    def on_host(host: HostResult, worker: str):
+        found[host.ip] = worker
+        record = host_record(host)
+        record["worker"] = worker
+        print_host(record)
+
+    def on_chunk(chunk: str, worker: str, done: int, scanned: int):
+        print(f"{Colors.OKCYAN}Progress: {done}/{len(coordinator.chunks)} chunks, {scanned}/{total} hosts "
+              f"({chunk} by {worker}){Colors.ENDC}")
+
+    try:
+        host, port = distributed.parse_address(listen)
+        coordinator = distributed.Coordinator(networks, timeout=timeout, token=token, state=state,
+                                              on_host=on_host, on_chunk=on_chunk)
+    except ValueError as e:
+        return {"error": f"Invalid network format: {str(e)}"}
+    except OSError as e:
+        return {"error": f"Cannot read state file: {e}"}
+    total = sum(count_hosts(ipaddress.ip_network(n)) for n in coordinator.networks)
+
+    result = {
+        "network": ", ".join(coordinator.networks),
+        "networks": coordinator.networks,
+        "total_hosts": total,
+        "start_time": time.time()
+    }
+
+    print(f"{Colors.HEADER}{Colors.BOLD}{'=' * 80}{Colors.ENDC}")
+    print(f"{Colors.HEADER}{Colors.BOLD}Network Sweep Tool - Coordinator{Colors.ENDC}")
+    print(f"{Colors.HEADER}{Colors.BOLD}{'=' * 80}{Colors.ENDC}\n")
+    print(f"{Colors.OKCYAN}Networks: {Colors.BOLD}{len(coordinator.networks)}{Colors.ENDC}{Colors.OKCYAN} "
+          f"({total} hosts in {len(coordinator.chunks)} chunks){Colors.ENDC}")
+    if coordinator.done:
+        print(f"{Colors.OKCYAN}Resuming from {state}: {Colors.BOLD}{len(coordinator.done)}{Colors.ENDC}"
+              f"{Colors.OKCYAN} chunks done, {len(coordinator.hosts)} hosts found{Colors.ENDC}")
+
+    def listening(addr: str, bound: int):
+        print(f"{Colors.OKCYAN}Waiting for workers on {Colors.BOLD}{addr}:{bound}{Colors.ENDC}")
+        print(f"{Colors.OKBLUE}{'-' * 80}{Colors.ENDC}\n")
+
+    try:
+        asyncio.run(coordinator.serve(host, port, on_listen=listening))
+    except OSError as e:
+        return {"error": f"Cannot listen on {host}:{port}: {e}"}
+
+    result["end_time"] = time.time()
+    result["duration_seconds"] = round(result["end_time"] - result["start_time"], 2)
+    result["active_hosts"] = []
+    for host in coordinator.hosts.values():
+        record = host_record(host)
+        if host.ip in found:
+            record["worker"] = found[host.ip]
+        result["active_hosts"].append(record)
+    result["active_hosts"].sort(key=lambda x: ipaddress.ip_address(x["ip"]))
+    result["all_results"] = result["active_hosts"]
+    result["scanned"] = coordinator.scanned
+    result["up"] = len(result["active_hosts"])
+    result["down"] = coordinator.scanned - result["up"]
+    result["distributed"] = coordinator.stats()
+    return result
+
+
+# Sweep chunks handed out by a coordinator (--worker) until it has none left
+def sweep_worker(coordinator: str, name: Optional[str] = None, max_workers: int = 50,
+                 rate: Optional[float] = None, burst: Optional[float] = None, fairness: str = "subnet",
+                 token: Optional[str] = None) -> Dict[str, Any]:
+    try:
+        pacer = Pacer(rate, burst, fairness) if rate else None
+        distributed.parse_address(coordinator)
+    except ValueError as e:
+        return {"error": f"Invalid option: {e}"}
+    name = name or socket.gethostname()
+    print(f"{Colors.OKCYAN}Worker {Colors.BOLD}{name}{Colors.ENDC}{Colors.OKCYAN} taking chunks from "
+          f"{Colors.BOLD}{coordinator}{Colors.ENDC}")
+
+    def on_chunk(chunk: str, done: int, scanned: int):
+        print(f"{Colors.OKCYAN}Swept {chunk} ({done} chunks, {scanned} hosts so far){Colors.ENDC}")
+
+    stats = asyncio.run(distributed.work(coordinator, name=name, token=token, concurrency=max_workers,
+                                         pacer=pacer, on_chunk=on_chunk))
+    if pacer:
+        stats["pacing"] = pacer.stats()
+    return stats
+
+
 # Automatically detect the local network subnet.
 def auto_detect_local_network() -> Optional[str]:
     try:
@@ -258,16 +350,7 @@ def auto_detect_local_network() -> Optional[str]:
 
 # Guess device type based on TTL value.
 def identify_device_type(ttl: int) -> str:
-    if ttl is None:
-        return "Unknown"
-    elif ttl <= 64:
-        return "Linux/Unix"
-    elif ttl <= 128:
-        return "Windows"
-    elif ttl <= 255:
-        return "Network Device"
-    else:
-        return "Unknown"
+    return guess_os(ttl)
 
 
 # CLI interface for standalone use
@@ -278,9 +361,41 @@ if __name__ == "__main__":
     # python network_sweep.py 192.168.1.0/24
     parser.add_argument(
         "network",
-        nargs="?",   # 0 or 1
+        nargs="*",   # 0 or more (more than one only with --serve)
         help="Network to scan in CIDR notation (e.g., 192.168.1.0/24). If Not provided, auto-detects local network."
     )
+    # python network_sweep.py --serve 0.0.0.0:7878 -iL sites.txt
+    parser.add_argument(
+        "-iL",
+        dest="networks_file",
+        help="Read networks from a file (one or more per line, # comments), for --serve"
+    )
+    parser.add_argument(
+        "--serve",
+        nargs="?",
+        const=f":{distributed.PORT}",
+        metavar="ADDR",
+        help=f"Coordinate the sweep: hand chunks of the networks to --worker processes (default :{distributed.PORT})"
+    )
+    # python network_sweep.py --worker coordinator.example:7878 --name site-a
+    parser.add_argument(
+        "--worker",
+        metavar="ADDR",
+        help="Run as a worker: sweep chunks leased from the coordinator at ADDR"
+    )
+    parser.add_argument(
+        "--name",
+        help="Worker name reported to the coordinator (default: this host's name)"
+    )
+    parser.add_argument(
+        "--token",
+        help="Shared secret between the coordinator and its workers"
+    )
+    parser.add_argument(
+        "--state",
+        metavar="FILE",
+        help="Coordinator checkpoint file; an unfinished sweep in it is resumed"
+    )
     # python network_sweep.py --timeout 2
     parser.add_argument(
         "--timeout",
@@ -295,6 +410,41 @@ if __name__ == "__main__":
         default=50,
         help="Number of concurrent workers (default: 50)"
     )
+    # python network_sweep.py --rate 200 --burst 20
+    parser.add_argument(
+        "--rate",
+        type=float,
+        help="Maximum echo requests per second (default: unpaced)"
+    )
+    parser.add_argument(
+        "--burst",
+        type=float,
+        help="Echo requests that may go out back to back under --rate (default: rate/20, at least 1)"
+    )
+    parser.add_argument(
+        "--fair",
+        choices=["host", "subnet", "none"],
+        default="subnet",
+        help="Share the --rate fairly per host, per /24 (default) or not at all"
+    )
+    # python network_sweep.py 10.0.0.0/12 --processes 8
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Shard the sweep across N worker processes, 0 = one per CPU (default: 1, for /16 and larger)"
+    )
+    # python network_sweep.py 10.0.0.0/16 --resume
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted sweep from its checkpoint file"
+    )
+    parser.add_argument(
+        "--checkpoint",
+        metavar="FILE",
+        help="Checkpoint file, written every few seconds while sweeping (default: sweep_<network>.checkpoint)"
+    )
     # python network_sweep.py --json
     parser.add_argument(
         "--json",
@@ -311,19 +461,54 @@ if __name__ == "__main__":
         )
     """
     args = parser.parse_args()
+    if args.processes < 0:
+        parser.error("--processes must be 0 or more")
+    if args.serve is not None and args.worker:
+        parser.error("--serve and --worker cannot be combined")
+
+    if args.worker:
+        stats = sweep_worker(args.worker, name=args.name, max_workers=args.workers, rate=args.rate,
+                             burst=args.burst, fairness=args.fair, token=args.token)
+        if "error" in stats and not stats.get("chunks"):
+            print(f"{Colors.FAIL}Error: {stats['error']}{Colors.ENDC}")
+            exit(1)
+        if args.json:
+            import json
+            print(json.dumps(stats, indent=2))
+        else:
+            print(f"{Colors.OKGREEN}Done: {stats['chunks']} chunks, {stats['scanned']} hosts swept, "
+                  f"{stats['hosts']} up{Colors.ENDC}")
+        exit(0)
+
+    if args.networks_file:
+        from netscan.targets import read_hosts_file
+        try:
+            args.network += list(read_hosts_file(args.networks_file))
+        except OSError as e:
+            print(f"{Colors.FAIL}Error: {e}{Colors.ENDC}")
+            exit(1)
+    if len(args.network) > 1 and args.serve is None:
+        parser.error("several networks need --serve (and workers to sweep them)")
 
     # Auto-detect network if not provided
     if not args.network:
         print(f"{Colors.WARNING}No network specified. Auto-detecting local network...{Colors.ENDC}")
-        args.network = auto_detect_local_network()   # 192.168.1.0/24
-        if not args.network:
+        detected = auto_detect_local_network()   # 192.168.1.0/24
+        if not detected:
             print(f"{Colors.FAIL}Error: Could not auto-detect network. Please specify manually.{Colors.ENDC}")
             exit(1)
-        print(f"{Colors.OKGREEN}Detected network: {Colors.BOLD}{args.network}{Colors.ENDC}\n")
+        print(f"{Colors.OKGREEN}Detected network: {Colors.BOLD}{detected}{Colors.ENDC}\n")
+        args.network = [detected]
 
     # Perform sweep
     start = time.time()
-    results = network_sweep(args.network, timeout=args.timeout, max_workers=args.workers)
+    if args.serve is not None:
+        results = distributed_sweep(args.network, listen=args.serve, timeout=args.timeout,
+                                    token=args.token, state=args.state)
+    else:
+        results = network_sweep(args.network[0], timeout=args.timeout, max_workers=args.workers,
+                                rate=args.rate, burst=args.burst, fairness=args.fair, processes=args.processes,
+                                checkpoint=args.checkpoint, resume=args.resume)
 
     if "error" in results:
         print(f"{Colors.FAIL}Error: {results['error']}{Colors.ENDC}")
@@ -339,9 +524,20 @@ if __name__ == "__main__":
         print(f"{Colors.HEADER}{Colors.BOLD}{'=' * 80}{Colors.ENDC}")
         print(f"{Colors.OKCYAN}Network: {Colors.BOLD}{results['network']}{Colors.ENDC}")
         print(f"{Colors.OKCYAN}Total hosts scanned: {Colors.BOLD}{results['total_hosts']}{Colors.ENDC}")
+        if results.get("processes"):
+            print(f"{Colors.OKCYAN}Worker processes: {Colors.BOLD}{results['processes']}{Colors.ENDC}")
+        if results.get("distributed"):
+            dist = results["distributed"]
+            workers = ", ".join(f"{name} ({w['chunks']} chunks)" for name, w in dist["workers"].items())
+            print(f"{Colors.OKCYAN}Workers: {Colors.BOLD}{workers or 'none'}{Colors.ENDC}"
+                  f"{Colors.OKCYAN}; {dist['reassigned']} chunks reassigned{Colors.ENDC}")
         print(f"{Colors.OKGREEN}Active hosts: {Colors.BOLD}{results['up']}{Colors.ENDC}")
         print(f"{Colors.FAIL}Inactive hosts: {Colors.BOLD}{results['down']}{Colors.ENDC}")
         print(f"{Colors.WARNING}Duration: {Colors.BOLD}{results['duration_seconds']} seconds{Colors.ENDC}")
+        if results.get("pacing"):
+            pacing = results["pacing"]
+            print(f"{Colors.WARNING}Rate: {Colors.BOLD}{pacing['achieved_pps']} probes/s achieved "
+                  f"(limit {pacing['rate']:g}){Colors.ENDC}")
         print(f"{Colors.HEADER}{Colors.BOLD}{'=' * 80}{Colors.ENDC}\n")
 
         if results['active_hosts']:
@@ -1,47 +1,198 @@
 #!/usr/bin/env python3
-import socket
+import argparse
+import asyncio
+import os
 import sys
+import time
+from collections import Counter
 from datetime import datetime
 
-# Top 100 common TCP ports
-TOP_100_PORTS = [
-    20,21,22,23,25,53,67,68,69,80,110,111,123,135,137,138,139,143,161,389,
-    443,445,514,587,631,636,873,902,989,990,993,995,1025,1026,1027,1028,
-    1433,1434,1723,2049,2082,2083,2181,2375,2376,2484,2487,3050,3128,
-    3306,3389,3690,4369,5000,5432,5555,5672,5900,5985,5986,6379,6443,
-    6667,6881,7001,7002,7077,8000,8008,8080,8081,8123,8443,8888,9000,
-    9001,9042,9092,9200,9300,9418,11211,27017,27018,27019,28017
-]
+# The shared scanning package (netscan) lives next to the tool folders
+_PYTHON_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+if _PYTHON_ROOT not in sys.path:
+    sys.path.insert(0, _PYTHON_ROOT)
+
+from netscan import fingerprint, governor, syn, tcp, targets, udp
+from netscan.pacing import Pacer
+from netscan.ports import parse_ports
+
+DEFAULT_WINDOW = 500   # connects in flight
 
 def scan_port(ip, port, timeout=0.8):
     """Return True if port is open."""
+    results = tcp.scan_ports(ip, [port], timeout=timeout, concurrency=1)
+    return bool(results) and results[0].is_open
+
+def parse_args():
+    p = argparse.ArgumentParser(
+        description="Concurrent TCP connect / SYN / UDP port scanner (top 100 ports by default)",
+        epilog="examples: portscan100.py 192.168.1.10 | portscan100.py -p 1-65535 10.0.0.5 | "
+               "portscan100.py -p 22,80,443 192.168.1.0/24 | portscan100.py -iL hosts.txt")
+    p.add_argument("targets", nargs="*", help="IP addresses, hostnames or CIDR blocks")
+    p.add_argument("-iL", "--hosts-file", metavar="FILE",
+                   help="Read more targets from FILE (one or more per line, '-' for stdin)")
+    p.add_argument("-p", "--ports",
+                   help="Ports: list/ranges such as 22,80,8000-8100, 'top100' (TCP default), "
+                        "'topudp' (UDP default) or 'all'")
+    p.add_argument("-c", "--concurrency", type=int, default=DEFAULT_WINDOW,
+                   help=f"Connects in flight at once (default: {DEFAULT_WINDOW})")
+    p.add_argument("-t", "--timeout", type=float, default=0.8,
+                   help="Seconds to wait for each connect (default: 0.8)")
+    p.add_argument("-sV", "--service", "--banner", dest="service", action="store_true",
+                   help="Identify the service on each open TCP port (greeting wait, HTTP, TLS, "
+                        "Redis, ... probes) instead of guessing from the port number")
+    p.add_argument("-sS", "--syn", action="store_true",
+                   help="Half-open SYN scan from one raw socket (root / CAP_NET_RAW, IPv4); "
+                        "no socket per probe")
+    p.add_argument("-sU", "--udp", action="store_true",
+                   help="UDP scan with service payloads (DNS, NTP, SNMP, ...); paced per host "
+                        "to stay under ICMP rate limits")
+    p.add_argument("--rate", type=float, metavar="PPS",
+                   help="Maximum probes per second (default: as fast as the window allows)")
+    p.add_argument("--burst", type=float,
+                   help="Probes that may go out back to back under --rate (default: rate/20, at least 1)")
+    p.add_argument("--fair", choices=["host", "subnet", "none"], default="host",
+                   help="Share --rate round-robin per host (default), per /24 or not at all")
+    p.add_argument("--ulimit", type=int, metavar="N",
+                   help="Raise the open-file limit to N (up to the hard limit) before scanning; "
+                        "otherwise the window is capped to fit the current limit")
+    args = p.parse_args()
+    if not args.targets and not args.hosts_file:
+        p.error("give at least one target or --hosts-file")
+    if args.syn and args.udp:
+        p.error("choose one of --syn and --udp")
     try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(timeout)
-        result = sock.connect_ex((ip, port))
-        sock.close()
-        return result == 0
-    except Exception:
-        return False
+        args.ports = parse_ports(args.ports or ("topudp" if args.udp else "top100"))
+    except ValueError as e:
+        p.error(f"--ports: {e}")
+    if not args.ports:
+        p.error("--ports: no ports given")
+    if args.udp and args.service:
+        p.error("-sV identifies TCP services (UDP replies are shown anyway)")
+    if args.rate is not None and args.rate <= 0:
+        p.error("--rate must be positive")
+    if args.syn and not syn.available():
+        p.error("--syn needs root or CAP_NET_RAW")
+    return args
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python portscan100.py <target-ip>")
+    args = parse_args()
+    try:
+        # The same address can come from a name, a CIDR and the host file
+        hosts = list(dict.fromkeys(targets.expand_all(args.targets, args.hosts_file)))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
         sys.exit(1)
 
-    target = sys.argv[1]
-    print(f"\n🔎 Scanning top 100 ports on {target}")
+    if args.syn:
+        v6 = [ip for ip in hosts if ":" in ip]
+        if v6:
+            print(f"Error: --syn is IPv4 only ({v6[0]})")
+            sys.exit(1)
+
+    if args.ulimit:
+        governor.raise_nofile(args.ulimit)
+    # Every connect holds a descriptor: more in flight than the governor allows would only queue
+    window = max(1, min(args.concurrency, governor.GOVERNOR.ceiling))
+    total = len(hosts) * len(args.ports)
+    single = len(hosts) == 1
+
+    label = hosts[0] if single else f"{len(hosts)} hosts"
+    mode = "SYN scan" if args.syn else "UDP scan" if args.udp else f"{window} in flight"
+    if args.rate:
+        mode += f", {args.rate:g} probes/s"
+    print(f"\n🔎 Scanning {len(args.ports)} port(s) on {label}  ({mode})")
     print("Start time:", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
     print("-" * 50)
 
-    for port in TOP_100_PORTS:
-        if scan_port(target, port):
-            print(f"OPEN   →  Port {port}")
+    found = []
+    states = Counter()
+    scanned = 0
+    start = time.monotonic()
+    last_progress = start
+    progress = sys.stderr.isatty()
+
+    # -sV: open ports are fingerprinted while discovery carries on, and printed once identified
+    identifying = set()
+
+    def report_open(result):
+        where = f"Port {result.port}" if single else f"{result.ip}:{result.port}"
+        if result.proto == "udp":
+            where += "/udp"
+        detail = result.product or result.banner
+        extra = f"  {detail[:40]}" if detail else ""
+        if progress:
+            sys.stderr.write("\r\033[K")
+        print(f"OPEN   →  {where:<22} {result.service:<14} {result.latency_ms:>7.1f} ms{extra}", flush=True)
+
+    def on_result(result):
+        nonlocal scanned, last_progress
+        scanned += 1
+        states[result.state] += 1
+        if result.is_open:
+            found.append(result)
+            if fp is not None and result.proto == "tcp":
+                task = asyncio.ensure_future(fp.identify(result))
+                identifying.add(task)
+                task.add_done_callback(lambda t, r=result: (identifying.discard(t), report_open(r)))
+            else:
+                report_open(result)
+        now = time.monotonic()
+        if progress and now - last_progress >= 0.5:
+            last_progress = now
+            rate = scanned / (now - start)
+            sys.stderr.write(f"\r  {scanned}/{total} probes  ({rate:,.0f}/s)")
+            sys.stderr.flush()
+
+    # Port-major order spreads each host's probes out, so one slow host doesn't fill the window
+    pairs = ((ip, port) for port in args.ports for ip in hosts)
+    fp = None
+    # Every engine waits on the same Pacer, so --burst and --fair apply (and are reported) in all modes
+    pacer = Pacer(args.rate, args.burst, args.fair) if args.rate else None
+
+    async def run():
+        nonlocal fp
+        if args.service:
+            fp = fingerprint.Fingerprinter()
+        if args.syn:
+            await syn.scan(pairs, timeout=args.timeout, on_result=on_result, pacer=pacer)
+        elif args.udp:
+            await udp.scan(pairs, timeout=args.timeout, on_result=on_result, pacer=pacer)
         else:
-            pass  # silent for closed ports
+            await tcp.scan(pairs, timeout=args.timeout, concurrency=window, on_result=on_result, pacer=pacer)
+        if identifying:
+            await asyncio.gather(*identifying)
+
+    interrupted = False
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        interrupted = True
+    if progress:
+        sys.stderr.write("\r\033[K")
 
+    elapsed = time.monotonic() - start
     print("-" * 50)
-    print("Scan completed.")
+    if not single and found:
+        by_host = {}
+        for r in found:
+            by_host.setdefault(r.ip, []).append(r.port)
+        for ip in hosts:
+            if ip in by_host:
+                print(f"{ip:<18} {', '.join(str(p) for p in sorted(by_host[ip]))}")
+        print("-" * 50)
+    # Closed ports answered with an RST (or ICMP port-unreachable); filtered ones never answered
+    tally = ", ".join(f"{states[s]} {s}" for s in ("closed", "filtered", "open|filtered") if states[s])
+    print(f"{len(found)} open port(s){', ' + tally if tally else ''}, {scanned}/{total} probes in {elapsed:.2f}s "
+          f"({scanned / elapsed if elapsed else 0:,.0f} probes/s)")
+    if pacer and pacer.achieved:
+        print(f"Paced at {pacer.achieved:,.0f} probes/s (limit {pacer.rate:g}, burst {pacer.burst:g}, "
+              f"{pacer.delayed} probes held back)")
+    # Waits on the descriptor limit and EMFILE/ENOBUFS retries slowed the scan down instead of losing ports
+    pressure = governor.GOVERNOR.summary()
+    if pressure:
+        print(f"Back-pressure: {pressure}")
+    print("Scan interrupted." if interrupted else "Scan completed.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,27 @@
+"""
+Shared scanning engines for the Python networking tools.
+
+One implementation each of ICMP echo (icmp), TCP connect (tcp), SYN (syn)
+and UDP (udp) port scanning, neighbour table / MAC vendor lookup (arp) and
+DNS (dns), service fingerprinting of open ports (fingerprint), plus the port
+tables, packet pacing (pacing) and the result records they all report in. The network sweep, LAN
+scanner, port scanner and NetDiag are thin front-ends over this package, so
+engine work benefits all of them.
+"""
+from .ports import TOP_100_PORTS, TOP_UDP_PORTS, PORT_SERVICES, service_name, parse_ports
+from .results import HostResult, PortResult
+from .icmp import IcmpEngine, guess_os, sweep
+from .tcp import scan, scan_ports
+from .arp import mac_for, neighbours, vendor_for
+from .discovery import discover, enrich
+from .pacing import Pacer
+
+__all__ = [
+    "TOP_100_PORTS", "TOP_UDP_PORTS", "PORT_SERVICES", "service_name", "parse_ports",
+    "HostResult", "PortResult",
+    "IcmpEngine", "guess_os", "sweep",
+    "scan", "scan_ports",
+    "mac_for", "neighbours", "vendor_for",
+    "discover", "enrich",
+    "Pacer",
+]
@@ -0,0 +1,112 @@
+"""
+Event-loop helpers shared by the engines, and the subprocess runner that
+NetDiag's netdiag_proc builds on.
+"""
+from __future__ import annotations
+import asyncio, concurrent.futures, locale, logging, os, signal, subprocess
+from typing import Callable, List, Optional, Tuple
+
+from .governor import GOVERNOR
+
+LOG = logging.getLogger("netscan")
+
+PROCESS_FDS = 3     # descriptors a child holds open in this process (stdout and stderr pipes, its watcher)
+LINE_LIMIT = 1 << 20   # longest stdout line accepted (bytes)
+
+
+def run_sync(coro):
+    """
+    Run a coroutine from sync code, even if this thread already has a running loop
+    (it then runs on a fresh loop in a helper thread). Whatever the coroutine
+    raises is raised here.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as ex:
+        return ex.submit(asyncio.run, coro).result()
+
+
+def kill_tree(proc: asyncio.subprocess.Process):
+    """Kill a child started by execute() and everything it spawned."""
+    if proc.returncode is not None:
+        return
+    try:
+        if os.name == "posix":
+            # The child leads its own session, so this reaches anything it spawned
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            subprocess.call(["taskkill", "/F", "/T", "/PID", str(proc.pid)],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError:
+        pass
+    try:
+        proc.kill()
+    except (OSError, ProcessLookupError):
+        pass
+
+
+async def execute(cmd: List[str], timeout: float,
+                  on_line: Optional[Callable[[str], None]] = None) -> Tuple[int, str, str]:
+    """
+    Run a command on the current loop in its own process group and collect its
+    output. Returns (returncode, stdout, stderr); when the deadline passes the
+    group is killed and the result is (-1, stdout printed so far, "timeout").
+    Cancellation kills the group too. on_line is called for each stdout line
+    as it is printed.
+
+    Raises:
+        OSError: if the command cannot be started
+    """
+    encoding = locale.getpreferredencoding(False)
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        start_new_session=(os.name == "posix"), limit=LINE_LIMIT)
+    lines: List[str] = []
+
+    async def pump():
+        async for raw in proc.stdout:
+            line = raw.decode(encoding, errors="replace").rstrip("\r\n")
+            lines.append(line)
+            if on_line:
+                try:
+                    on_line(line)
+                except Exception as e:
+                    LOG.debug("on_line callback failed: %s", e)
+
+    work = asyncio.gather(pump(), proc.stderr.read(), proc.wait())
+    # Mark the outcome as retrieved so a cancelled run doesn't log "never retrieved"
+    work.add_done_callback(lambda f: f.cancelled() or f.exception())
+    try:
+        _, err, rc = await asyncio.wait_for(work, timeout)
+        return rc, "\n".join(lines).strip(), err.decode(encoding, errors="replace").strip()
+    except asyncio.TimeoutError:
+        kill_tree(proc)
+        await proc.wait()
+        # Whatever the tool printed before the deadline is often still useful to a parser
+        return -1, "\n".join(lines).strip(), "timeout"
+    except asyncio.CancelledError:
+        kill_tree(proc)
+        raise
+
+
+async def run_process(cmd: List[str], timeout: float = 30) -> Tuple[int, str, str]:
+    """
+    Run a command on the current loop with execute(). Returns (returncode,
+    stdout, stderr); returncode is -1 and stderr "timeout" when the deadline
+    passes, or the error text when it cannot be started. The pipes count
+    against GOVERNOR, and a start that fails for lack of descriptors is retried.
+    """
+    attempt = 0
+    while True:
+        async with GOVERNOR.slot(PROCESS_FDS):
+            try:
+                return await execute(cmd, timeout)
+            except OSError as e:
+                if not GOVERNOR.backpressure(e.errno):
+                    return -1, "", str(e)
+                err = e
+        if not await GOVERNOR.backoff(attempt):
+            return -1, "", str(err)
+        attempt += 1
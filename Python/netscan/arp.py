@@ -0,0 +1,172 @@
+"""
+Neighbour (ARP/NDP) table access and MAC vendor lookup.
+The table is read once and shared: resolving the MACs of N hosts costs one
+read of /proc/net/arp (or one `ip neigh` / `arp -a`), not N `arp` processes.
+Vendor lookup uses the optional mac-vendor-lookup package, imported on
+first use.
+"""
+from __future__ import annotations
+import json, platform, re, shutil, subprocess, threading, time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ._aio import run_sync
+
+TABLE_TTL = 2.0        # seconds a table read is reused
+MISS_REFRESH = 0.5     # a lookup miss re-reads the table at most this often
+
+_BSD_ENTRY = re.compile(r"\((\d+\.\d+\.\d+\.\d+)\) at ([0-9A-Fa-f:]{11,17}) on (\S+)")
+
+Runner = Callable[..., Tuple[int, str, str]]
+
+
+def _run(cmd, timeout=10) -> Tuple[int, str, str]:
+    try:
+        p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=timeout)
+        return p.returncode, p.stdout.strip(), p.stderr.strip()
+    except (OSError, subprocess.SubprocessError) as e:
+        return -1, "", str(e)
+
+
+def normalise_mac(mac: str) -> str:
+    """AA:BB:CC:DD:EE:FF form of a MAC written with '-' or unpadded octets."""
+    return ":".join(part.zfill(2) for part in re.split(r"[:-]", mac)).upper()
+
+
+def _proc_arp() -> Optional[list]:
+    # /proc/net/arp: IP address, HW type, Flags, HW address, Mask, Device
+    try:
+        with open("/proc/net/arp") as f:
+            next(f)
+            entries = []
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 6:
+                    entries.append({"ip": parts[0], "mac": parts[3].upper(), "iface": parts[5],
+                                    "state": "COMPLETE" if int(parts[2], 16) & 0x2 else "INCOMPLETE"})
+            return entries
+    except (OSError, ValueError, StopIteration):
+        return None
+
+
+def neighbours(run: Optional[Runner] = None) -> Dict[str, Any]:
+    """
+    The system neighbour table.
+
+    Args:
+        run: Command runner called as run(cmd, timeout=...) -> (rc, stdout, stderr)
+
+    Returns:
+        Dictionary with entries (ip, mac, iface, state/type), count and source,
+        or raw command output when it could not be parsed
+    """
+    run = run or _run
+    entries = []
+    if platform.system().lower() == "windows":
+        rc, out, err = run(["arp", "-a"], timeout=10)
+        iface = None
+        for line in out.splitlines():
+            parts = line.split()
+            if line.startswith("Interface:") and len(parts) >= 2:
+                iface = parts[1]
+            elif len(parts) == 3 and parts[1].count("-") == 5:
+                entries.append({"ip": parts[0], "mac": normalise_mac(parts[1]),
+                                "iface": iface, "type": parts[2]})
+        if not entries:
+            return {"raw": out or err}
+        return {"entries": entries, "count": len(entries), "source": "arp -a"}
+
+    if shutil.which("ip"):
+        rc, out, err = run(["ip", "-j", "neigh"], timeout=10)
+        try:
+            neigh = json.loads(out) if rc == 0 and out else None
+        except ValueError:
+            neigh = None
+        if neigh is not None:
+            for n in neigh:
+                entries.append({
+                    "ip": n.get("dst"),
+                    "mac": n["lladdr"].upper() if n.get("lladdr") else None,
+                    "iface": n.get("dev"),
+                    "state": ",".join(n.get("state", [])) or None
+                })
+            return {"entries": entries, "count": len(entries), "source": "ip -j neigh"}
+    proc = _proc_arp()
+    if proc is not None:
+        return {"entries": proc, "count": len(proc), "source": "/proc/net/arp"}
+    rc, out, err = run(["arp", "-an"], timeout=10)
+    # BSD/macOS: "? (192.168.1.1) at 0:11:22:33:44:55 on en0 ifscope [ethernet]"
+    for m in _BSD_ENTRY.finditer(out):
+        entries.append({"ip": m.group(1), "mac": normalise_mac(m.group(2)), "iface": m.group(3)})
+    if not entries:
+        return {"raw": out or err}
+    return {"entries": entries, "count": len(entries), "source": "arp -an"}
+
+
+_table: Dict[str, str] = {}
+_table_at = 0.0
+_table_lock = threading.Lock()
+
+
+def mac_table(max_age: float = TABLE_TTL) -> Dict[str, str]:
+    """{ip: MAC} for resolved neighbours, re-read when older than max_age seconds."""
+    global _table, _table_at
+    with _table_lock:
+        if time.monotonic() - _table_at >= max_age:
+            entries = _proc_arp()
+            if entries is None:
+                entries = neighbours().get("entries", [])
+            _table = {e["ip"]: e["mac"] for e in entries
+                      if e.get("ip") and e.get("mac") and e["mac"] != "00:00:00:00:00:00"}
+            _table_at = time.monotonic()
+        return _table
+
+
+def mac_for(ip: str) -> Optional[str]:
+    """MAC of a neighbour; a miss re-reads the table (rate-limited) since the probe may have just added it."""
+    mac = mac_table().get(ip)
+    if mac is None:
+        mac = mac_table(MISS_REFRESH).get(ip)
+    return mac
+
+
+# Vendors
+_vendors = None
+_vendors_lock = threading.Lock()
+
+
+def _vendor_db():
+    global _vendors
+    with _vendors_lock:
+        if _vendors is None:
+            try:
+                from mac_vendor_lookup import AsyncMacLookup
+                _vendors = AsyncMacLookup()
+            except Exception:
+                _vendors = False
+    return _vendors
+
+
+async def vendor_async(mac: Optional[str]) -> str:
+    """Vendor for a MAC from inside an event loop; "Unknown" if not found or unavailable."""
+    db = _vendor_db()
+    if not mac or len(mac) < 8 or not db:
+        return "Unknown"
+    try:
+        return await db.lookup(mac)
+    except Exception:
+        return "Unknown"
+
+
+def vendor_for(mac: Optional[str]) -> str:
+    """Blocking form of vendor_async()."""
+    return run_sync(vendor_async(mac))
+
+
+def load_vendors():
+    """Load (downloading if needed) the vendor list once, before many lookups start."""
+    db = _vendor_db()
+    if db:
+        try:
+            run_sync(db.load_vendors())
+        except Exception:
+            pass
@@ -0,0 +1,167 @@
+"""
+Checkpoints for long scans.
+A Checkpoint records which addresses each stage of a scan has finished and
+what it found there, and writes both to disk every CHECKPOINT_EVERY seconds.
+Finished addresses are kept as merged [first, last] integer ranges, so a swept
+/16 costs a few bytes rather than 65k entries; findings are kept as the
+front-end's own JSON records, keyed by address. The file is replaced
+atomically (a temporary file is renamed over it), so an interrupted write
+leaves the previous checkpoint intact.
+
+Opened with resume=True, a checkpoint for the same scan (the `scan` dict:
+tool, targets, options) is reloaded and finished() tells the front-end which
+addresses to skip. A scan that completes removes its checkpoint.
+"""
+from __future__ import annotations
+import bisect, ipaddress, json, os, re, time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+CHECKPOINT_EVERY = 10.0   # seconds between writes while a scan runs
+VERSION = 1
+
+
+def default_path(prefix: str, network: str) -> str:
+    """"<prefix>_10.0.0.0-16.checkpoint" in the working directory."""
+    return f"{prefix}_{re.sub(r'[^0-9A-Za-z._]+', '-', network.replace(':', '_'))}.checkpoint"
+
+
+def _span(network: str) -> Tuple[int, int]:
+    net = ipaddress.ip_network(network, strict=False)
+    return int(net.network_address), int(net.broadcast_address)
+
+
+class _Stage:
+    __slots__ = ("ranges", "fresh", "records")
+
+    def __init__(self):
+        self.ranges: List[List[int]] = []      # sorted, merged, inclusive
+        self.fresh: Set[int] = set()            # finished since the last merge
+        self.records: Dict[str, Any] = {}
+
+    def add(self, first: int, last: int):
+        self.merge([[first, last]])
+
+    def merge(self, extra: Optional[List[List[int]]] = None):
+        spans = sorted(self.ranges + [[ip, ip] for ip in self.fresh] + (extra or []))
+        self.fresh.clear()
+        merged: List[List[int]] = []
+        for first, last in spans:
+            if merged and first <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], last)
+            else:
+                merged.append([first, last])
+        self.ranges = merged
+
+    def covers(self, first: int, last: int) -> bool:
+        if self.fresh:
+            self.merge()
+        i = bisect.bisect_right(self.ranges, [first, float("inf")]) - 1
+        return i >= 0 and self.ranges[i][0] <= first and last <= self.ranges[i][1]
+
+    def count(self) -> int:
+        if self.fresh:
+            self.merge()
+        return sum(last - first + 1 for first, last in self.ranges)
+
+
+class Checkpoint:
+    """
+    Progress of one scan, saved periodically to `path`.
+
+    Args:
+        path: Checkpoint file
+        scan: What is being scanned (tool, targets, options); a checkpoint for
+            anything else is not resumed
+        resume: Load `path` if it exists, instead of starting over
+
+    Raises:
+        ValueError: if resume=True and `path` holds a checkpoint for a different scan
+            or is not a checkpoint at all
+    """
+
+    def __init__(self, path: str, scan: Dict[str, Any], resume: bool = False):
+        self.path = path
+        self.scan = scan
+        self.resumed = False
+        self._stages: Dict[str, _Stage] = {}
+        self._saved = time.monotonic()
+        if resume and os.path.exists(path):
+            self._load()
+
+    def _stage(self, stage: str) -> _Stage:
+        s = self._stages.get(stage)
+        if s is None:
+            s = self._stages[stage] = _Stage()
+        return s
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{self.path} is not a checkpoint: {e}") from None
+        if not isinstance(data, dict) or data.get("version") != VERSION:
+            raise ValueError(f"{self.path} is not a checkpoint")
+        if data.get("scan") != self.scan:
+            raise ValueError(f"{self.path} is a checkpoint of a different scan")
+        for name, saved in data.get("stages", {}).items():
+            stage = self._stage(name)
+            stage.ranges = [list(r) for r in saved.get("ranges", [])]
+            stage.records = saved.get("records", {})
+        self.resumed = True
+
+    def done(self, ip: str, stage: str = "sweep", record: Any = None):
+        """Mark `ip` finished in `stage`, with what was found there (None: nothing worth keeping)."""
+        s = self._stage(stage)
+        s.fresh.add(int(ipaddress.ip_address(ip)))
+        if record is not None:
+            s.records[ip] = record
+        self.tick()
+
+    def done_block(self, network: str, stage: str = "sweep"):
+        """Mark every address of a CIDR block finished in `stage`."""
+        self._stage(stage).add(*_span(network))
+        self.tick()
+
+    def finished(self, ip: str, stage: str = "sweep") -> bool:
+        n = int(ipaddress.ip_address(ip))
+        s = self._stage(stage)
+        return n in s.fresh or s.covers(n, n)
+
+    def finished_block(self, network: str, stage: str = "sweep") -> bool:
+        return self._stage(stage).covers(*_span(network))
+
+    def records(self, stage: str = "sweep") -> List[Any]:
+        """What was found in `stage`, in address order."""
+        s = self._stage(stage)
+        return [s.records[ip] for ip in sorted(s.records, key=ipaddress.ip_address)]
+
+    def count(self, stage: str = "sweep") -> int:
+        """Addresses finished in `stage`."""
+        return self._stage(stage).count()
+
+    def tick(self):
+        """Save if CHECKPOINT_EVERY seconds have passed since the last save."""
+        if time.monotonic() - self._saved >= CHECKPOINT_EVERY:
+            self.save()
+
+    def save(self):
+        """Write the checkpoint now."""
+        stages = {}
+        for name, s in self._stages.items():
+            s.merge()
+            stages[name] = {"ranges": s.ranges, "records": s.records}
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": VERSION, "scan": self.scan, "saved": time.time(), "stages": stages},
+                      f, separators=(",", ":"), default=str)
+        os.replace(tmp, self.path)
+        self._saved = time.monotonic()
+
+    def remove(self):
+        """Delete the checkpoint once the scan has completed."""
+        for path in (self.path, self.path + ".tmp"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
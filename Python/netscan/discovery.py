@@ -0,0 +1,73 @@
+"""
+Host discovery: an ICMP sweep, then MAC, vendor, reverse-DNS name and OS
+guess for every host that answers. Shared by the LAN scanner, the network
+sweep tool and NetDiag.
+"""
+from __future__ import annotations
+import asyncio
+from typing import Callable, Iterable, List, Optional
+
+from . import arp, icmp
+from .dns import AsyncResolver
+from .pacing import Pacer
+from .results import HostResult
+
+
+async def enrich(host: HostResult, resolver: Optional[AsyncResolver] = None) -> HostResult:
+    """Fill in mac, vendor, hostname and os for a host that answered."""
+    loop = asyncio.get_running_loop()
+    host.mac = await loop.run_in_executor(None, arp.mac_for, host.ip)
+    host.vendor = await arp.vendor_async(host.mac) if host.mac else "Unknown"
+    if resolver is not None:
+        host.hostname = await resolver.reverse(host.ip)
+    else:
+        async with AsyncResolver(timeout=1.0, retries=1) as r:
+            host.hostname = await r.reverse(host.ip)
+    host.os = icmp.guess_os(host.ttl, host.vendor)
+    return host
+
+
+async def discover(hosts: Iterable, timeout: float = 1.0, concurrency: int = 256, retries: int = 0,
+                   details: bool = True, on_result: Optional[Callable[[HostResult], None]] = None,
+                   run=None, pacer: Optional[Pacer] = None) -> List[HostResult]:
+    """
+    Sweep addresses and describe the live ones.
+
+    Args:
+        hosts: Addresses to probe; consumed lazily
+        timeout: Seconds to wait for each echo reply
+        concurrency: Probes in flight at once
+        retries: Extra echo requests sent to silent hosts
+        details: Look up MAC, vendor, hostname and OS for live hosts
+        on_result: Optional callback(HostResult) once each host is finished
+            (after its details, for live hosts)
+        run: Subprocess coroutine for the ping-command fallback (see icmp.IcmpEngine)
+        pacer: Optional Pacer for the echo requests
+
+    Returns:
+        One HostResult per address, in completion order
+    """
+    if not details:
+        return await icmp.sweep(hosts, timeout, concurrency, retries, on_result, run, pacer=pacer)
+
+    tasks = set()
+    async with AsyncResolver(timeout=1.0, retries=1) as resolver:
+        async def describe(host: HostResult):
+            await enrich(host, resolver)
+            if on_result:
+                on_result(host)
+
+        def probed(host: HostResult):
+            if not host.alive:
+                if on_result:
+                    on_result(host)
+                return
+            # Look the host up while the sweep carries on
+            task = asyncio.ensure_future(describe(host))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        results = await icmp.sweep(hosts, timeout, concurrency, retries, probed, run, pacer=pacer)
+        if tasks:
+            await asyncio.gather(*list(tasks))
+    return results
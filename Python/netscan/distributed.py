@@ -0,0 +1,426 @@
+"""
+Distributed sweeps: one coordinator, many workers.
+The coordinator splits the target blocks into chunks (targets.chunks()) and
+leases them to workers over TCP, one JSON object per line. A worker sweeps
+its chunk with discovery.discover() from its own vantage point, reports each
+live host as soon as it has been described, sends heartbeats while it works
+and marks the chunk complete at the end. A lease that is not renewed within
+`lease_s` (the worker died, hung or was cut off) goes back to the queue for
+another worker, and a dropped connection gives up its leases at once. Hosts
+reported twice for a reassigned chunk are merged by address.
+
+The coordinator checkpoints completed chunks and the hosts found so far to a
+state file, so a restarted coordinator carries on where it stopped.
+
+Protocol (worker request, coordinator reply):
+    {"op": "hello", "worker": name, "token": t}  -> {"op": "welcome", "lease_s": s}
+    {"op": "lease"}                               -> {"op": "chunk", "id", "network", "chunk",
+                                                      "timeout", "retries", "details"}
+                                                     | {"op": "wait", "retry_s": s} | {"op": "done"}
+    {"op": "host", "id": i, "host": {...}}        (no reply)
+    {"op": "heartbeat", "id": i}                  (no reply)
+    {"op": "complete", "id": i, "scanned": n}     -> {"op": "ok"}
+A bad token or message is answered with {"op": "error", "error": text} and
+the connection is closed.
+"""
+from __future__ import annotations
+import asyncio, collections, hmac, ipaddress, json, os, time
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from . import discovery, targets
+from .pacing import Pacer
+from .results import HostResult
+
+PORT = 7878
+LEASE_SECONDS = 60.0      # a lease not renewed for this long is handed to another worker
+WAIT_SECONDS = 2.0        # how long a worker waits when every chunk left is leased
+CHECKPOINT_EVERY = 5.0    # seconds between state file writes
+RECONNECTS = 5            # failed connection attempts before a worker gives up
+LINE_LIMIT = 1 << 20      # longest message accepted, in bytes
+
+HOST_FIELDS = ("ip", "ttl", "rtt_ms", "method", "mac", "vendor", "hostname", "os")
+
+
+def parse_address(text: str, default_host: str = "0.0.0.0") -> Tuple[str, int]:
+    """"host:port", "host", ":port" or "[v6]:port" as (host, port); PORT if none is given."""
+    text = text.strip()
+    if text.startswith("["):
+        host, _, rest = text[1:].partition("]")
+        return host, int(rest[1:]) if rest.startswith(":") else PORT
+    if text.count(":") != 1:
+        return text or default_host, PORT
+    host, _, port = text.partition(":")
+    return host or default_host, int(port)
+
+
+def host_to_json(host: HostResult) -> Dict[str, Any]:
+    return {k: getattr(host, k) for k in HOST_FIELDS}
+
+
+def host_from_json(data: Dict[str, Any]) -> HostResult:
+    host = HostResult(str(data["ip"]), alive=True)
+    for k in HOST_FIELDS[1:]:
+        if data.get(k) is not None:
+            setattr(host, k, data[k])
+    return host
+
+
+def _line(msg: Dict[str, Any]) -> bytes:
+    return (json.dumps(msg, separators=(",", ":")) + "\n").encode()
+
+
+async def _send(writer: asyncio.StreamWriter, msg: Dict[str, Any]):
+    writer.write(_line(msg))
+    await writer.drain()
+
+
+async def _read(reader: asyncio.StreamReader) -> Optional[Dict[str, Any]]:
+    line = await reader.readline()
+    if not line:
+        return None
+    msg = json.loads(line)
+    if not isinstance(msg, dict):
+        raise ValueError("message is not an object")
+    return msg
+
+
+class _Lease:
+    __slots__ = ("worker", "conn", "expires")
+
+    def __init__(self, worker: str, conn: object, expires: float):
+        self.worker = worker
+        self.conn = conn
+        self.expires = expires
+
+
+class Coordinator:
+    """
+    Hands out chunks of `networks` to workers and collects what they find.
+
+    Args:
+        networks: CIDR blocks to sweep
+        chunk_size: Addresses per chunk
+        timeout: Echo timeout the workers use, in seconds
+        retries: Extra echo requests the workers send to silent hosts
+        details: Whether workers look up MAC, vendor and hostname
+        lease_s: Seconds a lease lasts without a heartbeat or report
+        token: Shared secret workers must present (None = any worker)
+        state: Checkpoint file; an existing one for the same sweep is resumed
+        on_host: Optional callback(HostResult, worker name) for every new live host
+        on_chunk: Optional callback(chunk, worker name, chunks done, addresses scanned)
+
+    Raises:
+        ValueError: on a malformed network or a state file from a different sweep
+    """
+
+    def __init__(self, networks: Iterable[str], chunk_size: int = targets.CHUNK_HOSTS,
+                 timeout: float = 1.0, retries: int = 0, details: bool = True,
+                 lease_s: float = LEASE_SECONDS, token: Optional[str] = None,
+                 state: Optional[str] = None,
+                 on_host: Optional[Callable[[HostResult, str], None]] = None,
+                 on_chunk: Optional[Callable[[str, str, int, int], None]] = None):
+        self.networks = [str(ipaddress.ip_network(n, strict=False)) for n in networks]
+        self.chunk_size = chunk_size
+        self.chunks: List[Tuple[str, str]] = [(n, c) for n in self.networks for c in targets.chunks(n, chunk_size)]
+        self.timeout, self.retries, self.details = timeout, retries, details
+        self.lease_s = lease_s
+        self.token = token
+        self.state = state
+        self.on_host, self.on_chunk = on_host, on_chunk
+        self.pending: Deque[int] = collections.deque(range(len(self.chunks)))
+        self.leases: Dict[int, _Lease] = {}
+        self.done: Set[int] = set()
+        self.hosts: Dict[str, HostResult] = {}
+        self.scanned = 0
+        self.reassigned = 0
+        self.workers: Dict[str, Dict[str, Any]] = {}
+        self._conns: Dict[object, asyncio.StreamWriter] = {}
+        self._dirty = False
+        self._saved = 0.0
+        self._finished: Optional[asyncio.Event] = None
+        if state and os.path.exists(state):
+            self._load()
+
+    @property
+    def complete(self) -> bool:
+        return len(self.done) == len(self.chunks)
+
+    # -- checkpoints --
+
+    def _load(self):
+        with open(self.state) as f:
+            data = json.load(f)
+        if data.get("networks") != self.networks or data.get("chunk_size") != self.chunk_size:
+            raise ValueError(f"state file {self.state} belongs to a different sweep")
+        self.done = set(data.get("done", []))
+        self.scanned = data.get("scanned", 0)
+        for record in data.get("hosts", []):
+            host = host_from_json(record)
+            self.hosts[host.ip] = host
+        self.pending = collections.deque(i for i in range(len(self.chunks)) if i not in self.done)
+
+    def save(self):
+        """Write the state file now (atomically: a temporary file is renamed over it)."""
+        if not self.state:
+            return
+        data = {"networks": self.networks, "chunk_size": self.chunk_size, "scanned": self.scanned,
+                "done": sorted(self.done), "hosts": [host_to_json(h) for h in self.hosts.values()]}
+        tmp = self.state + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, self.state)
+        self._dirty = False
+        self._saved = time.monotonic()
+
+    # -- leases --
+
+    def _lease(self, worker: str, conn: object) -> Dict[str, Any]:
+        if self.complete:
+            return {"op": "done"}
+        while self.pending:
+            i = self.pending.popleft()
+            if i in self.done:
+                continue
+            self.leases[i] = _Lease(worker, conn, time.monotonic() + self.lease_s)
+            network, chunk = self.chunks[i]
+            return {"op": "chunk", "id": i, "network": network, "chunk": chunk,
+                    "timeout": self.timeout, "retries": self.retries, "details": self.details}
+        return {"op": "wait", "retry_s": min(WAIT_SECONDS, self.lease_s)}
+
+    def _renew(self, conn: object, i: Any):
+        lease = self.leases.get(i)
+        if lease is not None and lease.conn is conn:
+            lease.expires = time.monotonic() + self.lease_s
+
+    def _requeue(self, i: int):
+        del self.leases[i]
+        if i not in self.done:
+            self.pending.appendleft(i)
+            self.reassigned += 1
+
+    def _release(self, conn: object):
+        for i in [i for i, lease in self.leases.items() if lease.conn is conn]:
+            self._requeue(i)
+
+    def _expire(self):
+        now = time.monotonic()
+        for i in [i for i, lease in self.leases.items() if lease.expires <= now]:
+            self._requeue(i)
+
+    # -- reports --
+
+    def _host(self, worker: str, conn: object, msg: Dict[str, Any]):
+        host = host_from_json(msg["host"])
+        self._renew(conn, msg.get("id"))
+        new = host.ip not in self.hosts
+        self.hosts[host.ip] = host
+        self._dirty = True
+        if new:
+            self.workers[worker]["hosts"] += 1
+            if self.on_host:
+                self.on_host(host, worker)
+
+    def _complete(self, worker: str, msg: Dict[str, Any]):
+        i = msg["id"]
+        if not isinstance(i, int) or not 0 <= i < len(self.chunks):
+            return
+        # Done is done, whoever holds the lease now
+        self.leases.pop(i, None)
+        if i in self.done:
+            return
+        self.done.add(i)
+        self.scanned += int(msg.get("scanned", 0))
+        self.workers[worker]["chunks"] += 1
+        self._dirty = True
+        if self.on_chunk:
+            self.on_chunk(self.chunks[i][1], worker, len(self.done), self.scanned)
+        if self.complete:
+            self._finished.set()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        conn = object()
+        self._conns[conn] = writer
+        try:
+            hello = await _read(reader)
+            if not hello or hello.get("op") != "hello":
+                return
+            if self.token and not hmac.compare_digest(str(hello.get("token") or ""), self.token):
+                await _send(writer, {"op": "error", "error": "bad token"})
+                return
+            peer = writer.get_extra_info("peername")
+            worker = str(hello.get("worker") or (peer[0] if peer else "worker"))
+            stats = self.workers.setdefault(worker, {"chunks": 0, "hosts": 0, "connections": 0})
+            stats["connections"] += 1
+            await _send(writer, {"op": "welcome", "lease_s": self.lease_s})
+            while True:
+                msg = await _read(reader)
+                if msg is None:
+                    return
+                op = msg.get("op")
+                if op == "lease":
+                    reply = self._lease(worker, conn)
+                    await _send(writer, reply)
+                    if reply["op"] == "done":
+                        return
+                elif op == "host":
+                    self._host(worker, conn, msg)
+                elif op == "heartbeat":
+                    self._renew(conn, msg.get("id"))
+                elif op == "complete":
+                    self._complete(worker, msg)
+                    await _send(writer, {"op": "ok"})
+                else:
+                    await _send(writer, {"op": "error", "error": f"unknown op {op!r}"})
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, KeyError, TypeError):
+            pass
+        finally:
+            self._release(conn)
+            self._conns.pop(conn, None)
+            writer.close()
+
+    async def _housekeeping(self):
+        while True:
+            await asyncio.sleep(1.0)
+            self._expire()
+            if self._dirty and time.monotonic() - self._saved >= CHECKPOINT_EVERY:
+                self.save()
+
+    async def serve(self, host: str = "0.0.0.0", port: int = PORT,
+                    on_listen: Optional[Callable[[str, int], None]] = None):
+        """
+        Accept workers until every chunk is complete, then give connected
+        workers a moment to be told so and write a final checkpoint.
+        """
+        self._finished = asyncio.Event()
+        if self.complete:
+            self._finished.set()
+        server = await asyncio.start_server(self._handle, host, port, limit=LINE_LIMIT)
+        if on_listen:
+            addr = server.sockets[0].getsockname()
+            on_listen(addr[0], addr[1])
+        keeper = asyncio.create_task(self._housekeeping())
+        try:
+            await self._finished.wait()
+            server.close()
+            deadline = time.monotonic() + WAIT_SECONDS + 1
+            while self._conns and time.monotonic() < deadline:
+                await asyncio.sleep(0.1)
+            # Workers still connected (stuck, or paused) see the connection close
+            for writer in list(self._conns.values()):
+                writer.close()
+            await asyncio.sleep(0.1)
+        finally:
+            keeper.cancel()
+            server.close()
+            self.save()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"chunks": len(self.chunks), "done": len(self.done), "leased": len(self.leases),
+                "reassigned": self.reassigned, "workers": self.workers}
+
+
+async def _heartbeat(writer: asyncio.StreamWriter, chunk_id: int, every: float):
+    try:
+        while True:
+            await asyncio.sleep(every)
+            await _send(writer, {"op": "heartbeat", "id": chunk_id})
+    except ConnectionError:
+        pass
+
+
+async def _session(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, name: Optional[str],
+                   token: Optional[str], concurrency: int, pacer: Optional[Pacer], stats: Dict[str, Any],
+                   on_chunk: Optional[Callable[[str, int, int], None]]) -> bool:
+    # True once the coordinator is finished with this worker
+    await _send(writer, {"op": "hello", "worker": name, "token": token})
+    welcome = await _read(reader)
+    if welcome is None:
+        raise ConnectionError("coordinator closed the connection")
+    if welcome.get("op") != "welcome":
+        stats["error"] = welcome.get("error", "unexpected reply from coordinator")
+        return True
+    every = max(1.0, float(welcome.get("lease_s", LEASE_SECONDS)) / 3)
+    while True:
+        await _send(writer, {"op": "lease"})
+        msg = await _read(reader)
+        if msg is None:
+            raise ConnectionError("coordinator closed the connection")
+        op = msg.get("op")
+        if op == "done":
+            return True
+        if op == "wait":
+            await asyncio.sleep(float(msg.get("retry_s", WAIT_SECONDS)))
+            continue
+        if op != "chunk":
+            stats["error"] = msg.get("error", f"unexpected reply {op!r} from coordinator")
+            return True
+        chunk_id = msg["id"]
+
+        def found(host: HostResult):
+            if host.alive and not reader.at_eof():
+                writer.write(_line({"op": "host", "id": chunk_id, "host": host_to_json(host)}))
+                stats["hosts"] += 1
+
+        beat = asyncio.create_task(_heartbeat(writer, chunk_id, every))
+        try:
+            results = await discovery.discover(targets.chunk_hosts(msg["network"], msg["chunk"]),
+                                               msg.get("timeout", 1.0), concurrency, msg.get("retries", 0),
+                                               details=msg.get("details", True), on_result=found, pacer=pacer)
+        finally:
+            beat.cancel()
+        await _send(writer, {"op": "complete", "id": chunk_id, "scanned": len(results)})
+        if await _read(reader) is None:
+            raise ConnectionError("coordinator closed the connection")
+        stats["chunks"] += 1
+        stats["scanned"] += len(results)
+        if on_chunk:
+            on_chunk(msg["chunk"], stats["chunks"], stats["scanned"])
+
+
+async def work(address: str, name: Optional[str] = None, token: Optional[str] = None,
+               concurrency: int = 256, pacer: Optional[Pacer] = None,
+               on_chunk: Optional[Callable[[str, int, int], None]] = None) -> Dict[str, Any]:
+    """
+    Sweep chunks leased from the coordinator at `address` until it has none
+    left. A lost connection is retried (RECONNECTS attempts in a row, backing
+    off); the chunk in hand is then swept again by whoever leases it next.
+
+    Args:
+        address: Coordinator "host:port"
+        name: Name reported to the coordinator (default: the worker's address)
+        token: Shared secret, if the coordinator requires one
+        concurrency: Probes in flight
+        pacer: Optional Pacer for this worker's probes
+        on_chunk: Optional callback(chunk, chunks done, addresses scanned)
+
+    Returns:
+        {"worker", "chunks", "scanned", "hosts"}, plus "error" if the
+        coordinator refused the worker or could not be reached
+    """
+    host, port = parse_address(address, "127.0.0.1")
+    stats: Dict[str, Any] = {"worker": name, "chunks": 0, "scanned": 0, "hosts": 0}
+    failures = 0
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port, limit=LINE_LIMIT)
+        except OSError as e:
+            failures += 1
+            if failures > RECONNECTS:
+                stats["error"] = f"cannot reach coordinator {address}: {e}"
+                return stats
+            await asyncio.sleep(min(30, 2 ** failures))
+            continue
+        chunks = stats["chunks"]
+        try:
+            if await _session(reader, writer, name, token, concurrency, pacer, stats, on_chunk):
+                return stats
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+        failures = 0 if stats["chunks"] > chunks else failures + 1
+        if failures > RECONNECTS:
+            stats["error"] = f"lost the coordinator at {address}"
+            return stats
+        await asyncio.sleep(min(30, 2 ** failures))
@@ -0,0 +1,672 @@
+"""
+Asyncio DNS client.
+Sends every record-type query for a name concurrently over a single UDP
+socket, retries over TCP when an answer is truncated, and keeps a shared
+TTL-honouring cache so one run resolves each name once. Reverse (PTR)
+lookups for scanners go through the same socket.
+Standard library only (no dnspython needed).
+"""
+from __future__ import annotations
+import asyncio, ipaddress, json, os, random, socket, struct, sys, threading, time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import logging
+
+from ._aio import run_sync as _run
+from .pacing import Pacer
+
+LOG = logging.getLogger("netscan.dns")
+
+QTYPES = {"A": 1, "NS": 2, "CNAME": 5, "SOA": 6, "PTR": 12, "MX": 15, "TXT": 16, "AAAA": 28}
+QTYPE_NAMES = {v: k for k, v in QTYPES.items()}
+RCODES = {0: "NOERROR", 1: "FORMERR", 2: "SERVFAIL", 3: "NXDOMAIN", 4: "NOTIMP", 5: "REFUSED"}
+DEFAULT_TYPES = ("A", "AAAA", "MX", "NS", "TXT", "CNAME")
+NEGATIVE_TTL = 60
+EDNS_UDP_SIZE = 1232
+
+_HEADER = struct.Struct("!6H")
+_RR = struct.Struct("!HHIH")
+
+
+# Wire format
+def build_query(qid: int, name: str, qtype: str, rd: bool = True) -> bytes:
+    """Encode a single-question query with an EDNS0 OPT record."""
+    labels = b"".join(bytes([len(l)]) + l for l in name.rstrip(".").encode("idna").split(b".") if l)
+    header = _HEADER.pack(qid, 0x0100 if rd else 0, 1, 0, 0, 1)
+    opt = b"\x00" + struct.pack("!HHIH", 41, EDNS_UDP_SIZE, 0, 0)
+    return header + labels + b"\x00" + struct.pack("!HH", QTYPES[qtype], 1) + opt
+
+
+def _read_name(data: bytes, off: int) -> Tuple[str, int]:
+    # Decode a possibly compressed name; returns (name, offset after the name)
+    labels = []
+    end = None
+    for _ in range(128):
+        length = data[off]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = off + 2
+            off = ((length & 0x3F) << 8) | data[off + 1]
+            continue
+        off += 1
+        if length == 0:
+            break
+        labels.append(data[off:off + length].decode("ascii", errors="replace"))
+        off += length
+    else:
+        raise ValueError("compression loop")
+    return ".".join(labels), (end if end is not None else off)
+
+
+def parse_response(data: bytes) -> Dict[str, Any]:
+    """Decode a response into id, rcode, truncation flag, answers and negative TTL."""
+    qid, flags, qd, an, ns, _ar = _HEADER.unpack_from(data)
+    off = _HEADER.size
+    qname = None
+    for _ in range(qd):
+        qname, off = _read_name(data, off)
+        off += 4
+
+    def records(count, off):
+        out = []
+        for _ in range(count):
+            name, off = _read_name(data, off)
+            rtype, _cls, ttl, rdlen = _RR.unpack_from(data, off)
+            off += _RR.size
+            rdata = data[off:off + rdlen]
+            if rtype == 1 and rdlen == 4:
+                value = socket.inet_ntop(socket.AF_INET, rdata)
+            elif rtype == 28 and rdlen == 16:
+                value = socket.inet_ntop(socket.AF_INET6, rdata)
+            elif rtype in (2, 5, 12):
+                value = _read_name(data, off)[0]
+            elif rtype == 15:
+                value = {"preference": struct.unpack_from("!H", data, off)[0],
+                         "exchange": _read_name(data, off + 2)[0]}
+            elif rtype == 16:
+                parts, i = [], 0
+                while i < rdlen:
+                    n = rdata[i]
+                    parts.append(rdata[i + 1:i + 1 + n].decode("utf-8", errors="replace"))
+                    i += 1 + n
+                value = "".join(parts)
+            elif rtype == 6:
+                _mname, o = _read_name(data, off)
+                _rname, o = _read_name(data, o)
+                value = {"minimum": struct.unpack_from("!5I", data, o)[4]}
+            else:
+                value = rdata.hex()
+            out.append((name, rtype, ttl, value))
+            off += rdlen
+        return out, off
+
+    answers, off = records(an, off)
+    authority, off = records(ns, off)
+    soa = [(ttl, v["minimum"]) for _n, t, ttl, v in authority if t == 6]
+    return {
+        "id": qid,
+        "qname": qname,
+        "rcode": RCODES.get(flags & 0xF, str(flags & 0xF)),
+        "truncated": bool(flags & 0x0200),
+        "answers": answers,
+        "negative_ttl": min(soa[0]) if soa else NEGATIVE_TTL,
+    }
+
+
+def system_nameservers() -> List[str]:
+    # Nameservers from /etc/resolv.conf (empty on systems without one, e.g. Windows)
+    servers = []
+    try:
+        with open("/etc/resolv.conf") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == "nameserver":
+                    servers.append(parts[1].split("%")[0])
+    except OSError:
+        pass
+    return servers
+
+
+_HOSTS: Optional[Dict[str, List[str]]] = None
+
+def _hosts_file() -> Dict[str, List[str]]:
+    global _HOSTS
+    if _HOSTS is None:
+        hosts: Dict[str, List[str]] = {}
+        path = r"C:\Windows\System32\drivers\etc\hosts" if os.name == "nt" else "/etc/hosts"
+        try:
+            with open(path) as f:
+                for line in f:
+                    parts = line.split("#", 1)[0].split()
+                    for name in parts[1:]:
+                        hosts.setdefault(name.lower(), []).append(parts[0])
+        except OSError:
+            pass
+        _HOSTS = hosts
+    return _HOSTS
+
+
+def _hosts_by_address() -> Dict[str, str]:
+    # First name listed for each address in the hosts file
+    out: Dict[str, str] = {}
+    for name, addrs in _hosts_file().items():
+        for a in addrs:
+            out.setdefault(a, name)
+    return out
+
+
+# Cache
+class DNSCache:
+    """Thread-safe cache keyed by (name, type) that honours record TTLs."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._data: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str, qtype: str) -> Optional[Dict[str, Any]]:
+        key = (name.lower().rstrip("."), qtype)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self.hits += 1
+            expires, result = entry
+        cached = dict(result)
+        cached["ttl"] = int(expires - time.monotonic())
+        cached["cached"] = True
+        return cached
+
+    def put(self, name: str, qtype: str, result: Dict[str, Any]):
+        ttl = result.get("ttl") or 0
+        if ttl <= 0:
+            return
+        with self._lock:
+            if len(self._data) >= self.max_entries:
+                # Drop the entry closest to expiry
+                del self._data[min(self._data, key=lambda k: self._data[k][0])]
+            self._data[(name.lower().rstrip("."), qtype)] = (time.monotonic() + ttl, result)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+CACHE = DNSCache()
+
+
+# Resolver
+class _UDPProtocol(asyncio.DatagramProtocol):
+
+    def __init__(self, resolver: "AsyncResolver"):
+        self.resolver = resolver
+
+    def datagram_received(self, data, addr):
+        self.resolver._on_datagram(data, addr)
+
+    def error_received(self, exc):
+        LOG.debug(f"DNS socket error: {exc}")
+
+
+class AsyncResolver:
+    """
+    Minimal stub resolver. All queries made through one instance share one
+    UDP socket and are matched to their answers by query id.
+
+        async with AsyncResolver() as r:
+            result = await r.resolve("example.com")
+
+    With a pacer, every query that goes out - retries and TCP fallbacks
+    included - first waits for a token keyed on the nameserver.
+    """
+
+    def __init__(self, nameservers: Optional[List[str]] = None, timeout: float = 2.0,
+                 retries: int = 2, cache: Optional[DNSCache] = CACHE, port: int = 53,
+                 pacer: Optional[Pacer] = None):
+        self.nameservers = nameservers or system_nameservers()
+        self.port = port
+        self.timeout = timeout
+        self.retries = retries
+        self.cache = cache
+        self.pacer = pacer
+        self._transports: Dict[int, asyncio.DatagramTransport] = {}
+        self._pending: Dict[int, Tuple[str, asyncio.Future]] = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for t in self._transports.values():
+            t.close()
+        self._transports.clear()
+
+    async def _transport(self, family: int) -> asyncio.DatagramTransport:
+        t = self._transports.get(family)
+        if t is None:
+            loop = asyncio.get_running_loop()
+            t, _ = await loop.create_datagram_endpoint(lambda: _UDPProtocol(self), family=family)
+            try:
+                # Bulk runs keep hundreds of answers in flight; don't let the kernel drop them
+                t.get_extra_info("socket").setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+            except (OSError, AttributeError):
+                pass
+            self._transports[family] = t
+        return t
+
+    def _on_datagram(self, data: bytes, addr):
+        if len(data) < _HEADER.size:
+            return
+        qid = struct.unpack_from("!H", data)[0]
+        pending = self._pending.get(qid)
+        if pending and pending[0] == addr[0] and not pending[1].done():
+            pending[1].set_result(data)
+
+    async def _udp_exchange(self, ns: str, query: bytes, qid: int) -> bytes:
+        family = socket.AF_INET6 if ":" in ns else socket.AF_INET
+        transport = await self._transport(family)
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[qid] = (str(ipaddress.ip_address(ns)), fut)
+        try:
+            transport.sendto(query, (ns, self.port))
+            return await asyncio.wait_for(fut, self.timeout)
+        finally:
+            self._pending.pop(qid, None)
+
+    async def _tcp_exchange(self, ns: str, query: bytes) -> bytes:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(ns, self.port), self.timeout)
+        try:
+            writer.write(struct.pack("!H", len(query)) + query)
+            await writer.drain()
+            length = struct.unpack("!H", await asyncio.wait_for(reader.readexactly(2), self.timeout))[0]
+            return await asyncio.wait_for(reader.readexactly(length), self.timeout)
+        finally:
+            writer.close()
+
+    async def query(self, name: str, qtype: str = "A", use_cache: bool = True,
+                    nameserver: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Resolve one record type. Returns a dict with records, ttl, rcode,
+        time_ms and cached; "error" is set on timeout or failure.
+        """
+        if use_cache and self.cache:
+            hit = self.cache.get(name, qtype)
+            if hit is not None:
+                return hit
+
+        servers = [nameserver] if nameserver else self.nameservers
+        if not servers:
+            return {"name": name, "type": qtype, "records": [], "error": "no nameservers configured"}
+        error = "timeout"
+        start = time.perf_counter()
+        for attempt in range(self.retries + 1):
+            ns = servers[attempt % len(servers)]
+            qid = random.randrange(65536)
+            while qid in self._pending:
+                qid = random.randrange(65536)
+            query = build_query(qid, name, qtype)
+            try:
+                if self.pacer is not None:
+                    await self.pacer.wait(ns)
+                data = await self._udp_exchange(ns, query, qid)
+                resp = parse_response(data)
+                if resp["truncated"]:
+                    if self.pacer is not None:
+                        await self.pacer.wait(ns)
+                    resp = parse_response(await self._tcp_exchange(ns, query))
+            except asyncio.TimeoutError:
+                error = "timeout"
+                continue
+            except (OSError, ValueError, struct.error, IndexError) as e:
+                error = str(e) or type(e).__name__
+                continue
+            if resp["rcode"] == "SERVFAIL" and attempt < self.retries:
+                error = "SERVFAIL"
+                continue
+
+            code = QTYPES[qtype]
+            answers = [(ttl, v) for _n, t, ttl, v in resp["answers"] if t == code]
+            result = {
+                "name": name,
+                "type": qtype,
+                "rcode": resp["rcode"],
+                "records": [v for _ttl, v in answers],
+                "ttl": min(t for t, _v in answers) if answers else resp["negative_ttl"],
+                "nameserver": ns,
+                "time_ms": round((time.perf_counter() - start) * 1000, 2),
+                "cached": False,
+            }
+            if self.cache and use_cache and resp["rcode"] in ("NOERROR", "NXDOMAIN"):
+                self.cache.put(name, qtype, result)
+            return result
+        return {"name": name, "type": qtype, "records": [], "error": error,
+                "time_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+    async def resolve(self, name: str, qtypes=DEFAULT_TYPES) -> Dict[str, Dict[str, Any]]:
+        """Fire every record type at once and gather the answers."""
+        results = await asyncio.gather(*(self.query(name, t) for t in qtypes))
+        return dict(zip(qtypes, results))
+
+    async def reverse(self, ip: str, fallback: bool = True) -> Optional[str]:
+        """
+        Name for an address: hosts file first, then a PTR query. With
+        fallback, addresses DNS could not answer for (timeout, no servers)
+        go to gethostbyaddr in a worker thread; NXDOMAIN is taken as final.
+        """
+        try:
+            addr = ipaddress.ip_address(ip)
+        except ValueError:
+            return None
+        local = _hosts_by_address().get(str(addr))
+        if local:
+            return local
+        if self.nameservers:
+            res = await self.query(addr.reverse_pointer, "PTR")
+            if res.get("records"):
+                return res["records"][0].rstrip(".")
+            if "error" not in res:
+                return None
+        if not fallback:
+            return None
+        try:
+            return (await asyncio.get_running_loop().run_in_executor(None, socket.gethostbyaddr, str(addr)))[0]
+        except (OSError, UnicodeError):
+            return None
+
+
+def lookup(name: str, qtypes=DEFAULT_TYPES, nameservers: Optional[List[str]] = None,
+           timeout: float = 2.0) -> Dict[str, Dict[str, Any]]:
+    """Blocking wrapper around AsyncResolver.resolve()."""
+    async def go():
+        async with AsyncResolver(nameservers, timeout=timeout) as r:
+            return await r.resolve(name, qtypes)
+    return _run(go())
+
+
+def reverse_lookup(ip: str, timeout: float = 1.0) -> Optional[str]:
+    """Blocking wrapper around AsyncResolver.reverse()."""
+    async def go():
+        async with AsyncResolver(timeout=timeout, retries=1) as r:
+            return await r.reverse(ip)
+    return _run(go())
+
+
+def resolve_host(name: str, timeout: float = 2.0) -> List[str]:
+    """
+    Addresses for a host (A then AAAA), served from the shared cache when
+    possible. IP literals and /etc/hosts entries skip DNS entirely; names
+    DNS cannot answer fall back to getaddrinfo.
+    """
+    try:
+        return [str(ipaddress.ip_address(name))]
+    except ValueError:
+        pass
+    hosts = _hosts_file().get(name.lower())
+    if hosts:
+        return hosts
+
+    res = lookup(name, ("A", "AAAA"), timeout=timeout) if system_nameservers() else {}
+    addrs = [a for t in ("A", "AAAA") for a in res.get(t, {}).get("records", [])]
+    if addrs:
+        return addrs
+    try:
+        return list(dict.fromkeys(ai[4][0] for ai in socket.getaddrinfo(name, None)))
+    except socket.gaierror:
+        return []
+
+
+# Bulk resolution
+def read_names(path: str) -> Iterator[str]:
+    """Yield names from a file (or stdin for "-"), one per line, skipping blanks and # comments."""
+    f = sys.stdin if path == "-" else open(path)
+    try:
+        for line in f:
+            name = line.split("#", 1)[0].strip()
+            if name:
+                yield name
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+async def _bulk(names, output, qtypes, window, timeout, retries, pacer, nameservers, on_result):
+    stats = {"total": 0, "resolved": 0, "nxdomain": 0, "failed": 0}
+    sem = asyncio.Semaphore(window)
+    tasks = set()
+
+    async with AsyncResolver(nameservers, timeout=timeout, retries=retries, cache=None, pacer=pacer) as r:
+        async def one(name):
+            try:
+                answers = await r.resolve(name, qtypes)
+            finally:
+                sem.release()
+            line = {"name": name,
+                    "records": {t: a["records"] for t, a in answers.items() if a.get("records")},
+                    "rcode": {t: a.get("rcode") for t, a in answers.items() if "rcode" in a},
+                    "time_ms": max(a.get("time_ms", 0) for a in answers.values())}
+            errors = {t: a["error"] for t, a in answers.items() if "error" in a}
+            if errors:
+                line["errors"] = errors
+            if line["records"]:
+                stats["resolved"] += 1
+            elif "NXDOMAIN" in line["rcode"].values():
+                stats["nxdomain"] += 1
+            else:
+                stats["failed"] += 1
+            if output is not None:
+                output.write(json.dumps(line) + "\n")
+                output.flush()
+            if on_result:
+                on_result(line, stats)
+
+        for name in names:
+            # The resolver paces each query it sends (retries too); the window bounds names in flight
+            await sem.acquire()
+            stats["total"] += 1
+            task = asyncio.create_task(one(name))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+    return stats
+
+
+def bulk_resolve(names: Iterable[str], output=None, qtypes=("A",), window: int = 256,
+                 timeout: float = 2.0, retries: int = 1, rate: Optional[float] = None,
+                 nameservers: Optional[List[str]] = None, on_result=None,
+                 burst: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Resolve a large stream of names with a fixed number of names in flight.
+
+    Args:
+        names: Iterable of names; consumed lazily, so a generator over a huge file is fine
+        output: Text stream that receives one JSON line per name as soon as it completes
+        qtypes: Record types queried for every name
+        window: Maximum names in flight at once
+        timeout: Per-query timeout in seconds
+        retries: Retries per query after a timeout or SERVFAIL
+        rate: Maximum queries per second (None = unpaced)
+        nameservers: Servers to use (default: system resolvers)
+        on_result: Optional callback(line, stats) after each name
+        burst: Queries that may go out back to back under `rate` (see pacing.Pacer)
+
+    Returns:
+        Dictionary with total/resolved/nxdomain/failed counts, elapsed time,
+        names/s and, when paced, the query rate achieved
+    """
+    qtypes = tuple(t.upper() for t in qtypes)
+    unknown = [t for t in qtypes if t not in QTYPES]
+    if unknown:
+        return {"error": f"Unsupported record type(s): {', '.join(unknown)}"}
+    if not (nameservers or system_nameservers()):
+        return {"error": "no nameservers configured"}
+    # Query IDs are 16 bits; keep the in-flight total well inside that space
+    window = max(1, min(window, 20000 // len(qtypes)))
+
+    pacer = Pacer(rate, burst, fairness="none") if rate else None
+    start = time.perf_counter()
+    stats = _run(_bulk(iter(names), output, qtypes, window, timeout, retries, pacer, nameservers, on_result))
+    elapsed = time.perf_counter() - start
+    stats.update({"elapsed_s": round(elapsed, 2),
+                  "names_per_s": round(stats["total"] / elapsed, 1) if elapsed else 0.0,
+                  "success": True})
+    if pacer is not None:
+        stats["pacing"] = pacer.stats()
+    return stats
+
+
+# Resolver benchmark
+BENCH_NAMES = ("google.com", "cloudflare.com", "amazon.com", "wikipedia.org", "github.com",
+               "microsoft.com", "apple.com", "netflix.com", "youtube.com", "facebook.com")
+PUBLIC_NAMESERVERS = ("1.1.1.1", "8.8.8.8", "9.9.9.9")
+
+
+def _percentile(values: List[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))], 2)
+
+
+def _phase_stats(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # Only usable answers count towards latency; SERVFAIL/REFUSED are errors, not fast answers
+    times = [s["time_ms"] for s in samples if s.get("rcode") in ("NOERROR", "NXDOMAIN")]
+    timeouts = sum(1 for s in samples if s.get("error") == "timeout")
+    total = len(samples)
+    return {
+        "queries": total,
+        "answered": len(times),
+        "p50_ms": _percentile(times, 0.50),
+        "p95_ms": _percentile(times, 0.95),
+        "p99_ms": _percentile(times, 0.99),
+        "mean_ms": round(sum(times) / len(times), 2) if times else None,
+        "timeouts": timeouts,
+        "timeout_rate": round(timeouts / total * 100, 2) if total else 0.0,
+        "errors": total - len(times) - timeouts,
+    }
+
+
+def _answer_key(sample: Dict[str, Any]) -> Tuple:
+    if "error" in sample:
+        return ("ERROR",)
+    return (sample["rcode"], tuple(sorted(str(v) for v in sample["records"])))
+
+
+async def _benchmark(nameservers, names, qtypes, rounds, timeout, concurrency, cache_bust):
+    queries = [(n, t) for n in names for t in qtypes]
+    samples = {ns: {"cold": [], "warm": []} for ns in nameservers}
+    last: Dict[str, Dict[Tuple[str, str], Dict[str, Any]]] = {ns: {} for ns in nameservers}
+
+    # No retries and no local cache: every sample is exactly one round trip to one server
+    async with AsyncResolver(nameservers, timeout=timeout, retries=0, cache=None) as r:
+        async def run_server(ns):
+            sem = asyncio.Semaphore(concurrency)
+
+            async def one(name, qtype, phase):
+                async with sem:
+                    res = await r.query(name, qtype, use_cache=False, nameserver=ns)
+                if phase:
+                    samples[ns][phase].append(res)
+                if phase == "warm" or (phase == "cold" and not cache_bust):
+                    last[ns][(name, qtype)] = res
+
+            if cache_bust:
+                # A random label is never in the server's cache, so it forces full recursion
+                nonce = "%08x" % random.getrandbits(32)
+                await asyncio.gather(*(one(f"{nonce}.{n}", t, "cold") for n, t in queries))
+                await asyncio.gather(*(one(n, t, None) for n, t in queries))
+            else:
+                await asyncio.gather(*(one(n, t, "cold") for n, t in queries))
+            for _ in range(rounds):
+                await asyncio.gather(*(one(n, t, "warm") for n, t in queries))
+
+        await asyncio.gather(*(run_server(ns) for ns in nameservers))
+
+    # Answer consistency: compare each server's final answer with the majority answer
+    majority = {}
+    for key in queries:
+        votes: Dict[Tuple, int] = {}
+        for ns in nameservers:
+            if key in last[ns]:
+                k = _answer_key(last[ns][key])
+                if k != ("ERROR",):
+                    votes[k] = votes.get(k, 0) + 1
+        if votes:
+            majority[key] = max(votes, key=votes.get)
+
+    servers = []
+    for ns in nameservers:
+        entry = {"nameserver": ns, "cold": _phase_stats(samples[ns]["cold"]),
+                 "warm": _phase_stats(samples[ns]["warm"]),
+                 "consistency_percent": None, "mismatches": []}
+        if len(nameservers) > 1:
+            compared = agree = 0
+            for key, want in majority.items():
+                got = last[ns].get(key)
+                if got is None or "error" in got:
+                    continue
+                compared += 1
+                if _answer_key(got) == want:
+                    agree += 1
+                elif len(entry["mismatches"]) < 10:
+                    entry["mismatches"].append({"name": key[0], "type": key[1], "rcode": got["rcode"],
+                                                "answer": got["records"], "majority": list(want[1])})
+            entry["consistency_percent"] = round(agree / compared * 100, 2) if compared else None
+        servers.append(entry)
+
+    # Fastest reliable servers first
+    servers.sort(key=lambda e: (e["warm"]["timeout_rate"], e["warm"]["p95_ms"] is None,
+                                e["warm"]["p95_ms"] or 0.0))
+    return servers
+
+
+def benchmark_resolvers(nameservers: Optional[List[str]] = None, names: Optional[List[str]] = None,
+                        qtypes=("A",), rounds: int = 3, timeout: float = 2.0,
+                        concurrency: int = 4, cache_bust: bool = False) -> Dict[str, Any]:
+    """
+    Benchmark several nameservers with the same query mix, all servers in parallel.
+
+    Args:
+        nameservers: Servers to compare (default: system resolvers plus 1.1.1.1, 8.8.8.8, 9.9.9.9)
+        names: Query names (default: BENCH_NAMES)
+        qtypes: Record types sent for every name
+        rounds: Warm-cache rounds after the cold pass
+        timeout: Per-query timeout in seconds (timeouts are not retried)
+        concurrency: Queries in flight per server
+        cache_bust: Prefix cold queries with a random label to force full recursion
+
+    Returns:
+        Dictionary with per-server cold/warm p50/p95/p99, timeout rate, error count
+        and answer consistency against the majority, fastest server first
+    """
+    if not nameservers:
+        nameservers = list(dict.fromkeys(system_nameservers() + list(PUBLIC_NAMESERVERS)))
+    names = list(names or BENCH_NAMES)
+    qtypes = tuple(t.upper() for t in qtypes)
+    unknown = [t for t in qtypes if t not in QTYPES]
+    if unknown:
+        return {"error": f"Unsupported record type(s): {', '.join(unknown)}"}
+    try:
+        for ns in nameservers:
+            ipaddress.ip_address(ns)
+    except ValueError as e:
+        return {"error": f"Nameservers must be IP addresses: {e}"}
+
+    start = time.perf_counter()
+    servers = _run(_benchmark(nameservers, names, qtypes, max(0, rounds), timeout,
+                              max(1, concurrency), cache_bust))
+    return {
+        "names": len(names),
+        "qtypes": list(qtypes),
+        "rounds": rounds,
+        "cache_bust": cache_bust,
+        "servers": servers,
+        "elapsed_s": round(time.perf_counter() - start, 2),
+        "success": True,
+    }
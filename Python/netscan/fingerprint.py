@@ -0,0 +1,342 @@
+"""
+Service fingerprinting: a separate stage that runs on the open ports once
+discovery is done.
+
+Each port is connected to again and identified from what it says:
+- ports with a known client-speaks-first service (HTTP, Redis, PostgreSQL,
+  ...) get that protocol's probe straight away;
+- other ports first get a quiet wait for a greeting (SSH, SMTP, FTP, POP3,
+  IMAP, MySQL, VNC, ... speak first), then HTTP, TLS and a bare CRLF;
+- every answer is checked against RULES, so a service on an unusual port is
+  still named correctly.
+TLS ports are wrapped with the stdlib ssl module (no verification) and then
+identified again inside the tunnel, which yields HTTPS, IMAPS, and so on.
+
+The first exchange with a port is always made: the greeting wait (and, if
+the port stays silent, the first probe) or the port's own probe. When that
+answer doesn't identify the service, the outcome of the remaining probes is
+cached by (ip, port, hash of that answer). A re-scan of an unchanged service
+therefore costs one exchange - for a silent port the greeting wait plus one
+probe timeout - and a service that starts answering differently is
+re-identified. A semaphore bounds how many ports are fingerprinted at once.
+"""
+from __future__ import annotations
+import asyncio, hashlib, re, ssl, threading, time
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Pattern, Tuple
+
+from ._aio import run_sync
+from .governor import GOVERNOR
+from .ports import service_name
+from .results import PortResult
+
+CONCURRENCY = 32          # ports fingerprinted at once
+TIMEOUT = 2.0             # connect / read timeout per step
+GREETING_WAIT = 1.5       # how long a silent port gets to speak first
+MAX_PROBES = 3            # probe connections per port after the greeting wait
+CACHE_TTL = 900.0
+
+
+@dataclass(frozen=True)
+class Probe:
+    """Bytes to send to provoke an answer; {host} is replaced by the target address."""
+    name: str
+    payload: bytes
+    ports: FrozenSet[int] = frozenset()
+    tls: bool = False
+
+
+@dataclass(frozen=True)
+class Rule:
+    """A pattern an answer must match; product(1) extracts software/version text."""
+    service: str                            # "" = keep the port's conventional name
+    pattern: Pattern[bytes]
+    product: Optional[Pattern[bytes]] = None
+
+
+def _rule(service: str, pattern: bytes, product: Optional[bytes] = None) -> Rule:
+    return Rule(service, re.compile(pattern, re.S), re.compile(product, re.S | re.I) if product else None)
+
+
+_HTTP_HEAD = b"HEAD / HTTP/1.0\r\nHost: {host}\r\nUser-Agent: netscan\r\nAccept: */*\r\n\r\n"
+
+PROBES: List[Probe] = [
+    Probe("http", _HTTP_HEAD, frozenset({80, 591, 2375, 3128, 5000, 5985, 7001, 8000, 8008, 8080,
+                                         8081, 8123, 8888, 9000, 9001, 9200, 10000})),
+    Probe("tls", _HTTP_HEAD, frozenset({443, 465, 563, 636, 853, 989, 990, 993, 995, 2376, 2484,
+                                        5986, 6443, 8443, 9443}), tls=True),
+    Probe("redis", b"*1\r\n$4\r\nPING\r\n", frozenset({6379})),
+    Probe("memcached", b"version\r\n", frozenset({11211})),
+    Probe("postgres", b"\x00\x00\x00\x08\x04\xd2\x16\x2f", frozenset({5432})),    # SSLRequest
+    Probe("rdp", b"\x03\x00\x00\x13\x0e\xe0\x00\x00\x00\x00\x00\x01\x00\x08\x00\x03\x00\x00\x00",
+          frozenset({3389})),                                                   # X.224 connect request
+    Probe("zookeeper", b"ruok", frozenset({2181})),
+    Probe("amqp", b"AMQP\x00\x00\x09\x01", frozenset({5672})),
+    Probe("generic", b"\r\n\r\n"),
+]
+_BY_NAME = {p.name: p for p in PROBES}
+_FALLBACK = ("http", "tls", "generic")
+
+RULES: List[Rule] = [
+    _rule("SSH", rb"^SSH-\d", rb"^SSH-[\d.]+-([^\r\n]+)"),
+    _rule("HTTP", rb"^HTTP/\d(?:\.\d)? \d{3}", rb"\r\nServer:[ \t]*([^\r\n]+)"),
+    _rule("SMTP", rb"^220[ -][^\r\n]*(?:SMTP|Postfix|Exim|Sendmail|Mail)", rb"^220[ -]\S+ ([^\r\n]+)"),
+    _rule("FTP", rb"^220[ -][^\r\n]*FTP", rb"^220[ -]([^\r\n]+)"),
+    _rule("", rb"^220[ -]", rb"^220[ -]([^\r\n]+)"),                        # FTP or SMTP: go by port
+    _rule("POP3", rb"^\+OK", rb"^\+OK ([^\r\n]+)"),
+    _rule("IMAP", rb"^\* (?:OK|PREAUTH|BYE)", rb"^\* OK (?:\[[^\]]*\] )?([^\r\n]+)"),
+    _rule("MySQL", rb"^.\x00\x00\x00\x0a\d", rb"^.\x00\x00\x00\x0a([^\x00]+)"),
+    _rule("MySQL", rb"^.\x00\x00\x00\xff..(?:Host|#HY000)"),
+    _rule("PostgreSQL", rb"^[SN]$"),
+    _rule("PostgreSQL", rb"^E\x00\x00\x00.S(?:FATAL|ERROR)"),
+    _rule("Redis", rb"^(?:\+PONG|-NOAUTH|-DENIED|-ERR[^\r\n]*auth)"),
+    _rule("Memcached", rb"^VERSION ", rb"^VERSION ([^\r\n]+)"),
+    _rule("VNC", rb"^RFB \d{3}\.\d{3}\n", rb"^RFB (\d{3}\.\d{3})"),
+    _rule("RDP", rb"^\x03\x00\x00[\x0b-\x13]\x0e\xd0"),
+    _rule("ZooKeeper", rb"^imok"),
+    _rule("AMQP", rb"^AMQP"),
+    _rule("Rsync", rb"^@RSYNCD: ", rb"^@RSYNCD: ([\d.]+)"),
+    _rule("Telnet", rb"^\xff[\xfb-\xfe]"),
+    _rule("XMPP", rb"^<\?xml[^>]*>\s*<stream:stream"),
+]
+
+# What a plaintext service is called when it answered inside TLS
+TLS_NAMES = {"HTTP": "HTTPS", "IMAP": "IMAPS", "POP3": "POP3S", "SMTP": "SMTPS", "FTP": "FTPS"}
+
+
+def match(data: bytes, port: int) -> Optional[Tuple[str, str]]:
+    """(service, product) for the first rule an answer matches, else None."""
+    for rule in RULES:
+        if rule.pattern.search(data):
+            product = ""
+            if rule.product:
+                m = rule.product.search(data)
+                if m:
+                    product = m.group(1).decode(errors="replace").strip()[:80]
+            return rule.service or service_name(port), product
+    return None
+
+
+def _text(data: bytes, limit: int = 120) -> str:
+    # First lines of an answer, non-printables dropped, for the banner field
+    text = "".join(ch if ch.isprintable() or ch in "\r\n" else "" for ch in data.decode("latin-1"))
+    return " | ".join(line.strip() for line in text.splitlines() if line.strip())[:limit]
+
+
+class FingerprintCache:
+    """(ip, port, first answer hash) -> (service, product, banner, detected), kept for `ttl` seconds."""
+
+    def __init__(self, ttl: float = CACHE_TTL, size: int = 4096):
+        self.ttl = ttl
+        self.size = size
+        self._data: Dict[Tuple[str, int, str], Tuple[float, Tuple[str, str, str, bool]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Optional[Tuple[str, str, str, bool]]:
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None or time.monotonic() - hit[0] > self.ttl:
+                return None
+            return hit[1]
+
+    def put(self, key, value: Tuple[str, str, str, bool]):
+        with self._lock:
+            self._data.pop(key, None)
+            if len(self._data) >= self.size:
+                self._data.pop(next(iter(self._data)))
+            self._data[key] = (time.monotonic(), value)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+CACHE = FingerprintCache()
+
+_TLS_CONTEXT: Optional[ssl.SSLContext] = None
+
+
+def _tls_context() -> ssl.SSLContext:
+    # Identification only: accept any certificate and anything the server still speaks
+    global _TLS_CONTEXT
+    if _TLS_CONTEXT is None:
+        ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        ctx.check_hostname = False
+        ctx.verify_mode = ssl.CERT_NONE
+        try:
+            ctx.minimum_version = ssl.TLSVersion.MINIMUM_SUPPORTED
+            ctx.set_ciphers("DEFAULT:@SECLEVEL=0")
+        except (ValueError, ssl.SSLError):
+            pass
+        _TLS_CONTEXT = ctx
+    return _TLS_CONTEXT
+
+
+class Fingerprinter:
+    """
+    Identifies services on open TCP ports.
+
+    Args:
+        concurrency: Ports fingerprinted at once (each holds one socket)
+        timeout: Connect and read timeout for every step
+        greeting_wait: Seconds a port without a port-specific probe gets to speak first
+        max_probes: Probe connections tried per port after the greeting wait
+        cache: FingerprintCache to consult and fill (None = no caching)
+    """
+
+    def __init__(self, concurrency: int = CONCURRENCY, timeout: float = TIMEOUT,
+                 greeting_wait: float = GREETING_WAIT, max_probes: int = MAX_PROBES,
+                 cache: Optional[FingerprintCache] = CACHE):
+        self.timeout = timeout
+        self.greeting_wait = greeting_wait
+        self.max_probes = max_probes
+        self.cache = cache
+        self._sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def _exchange(self, ip: str, port: int, probe: Optional[Probe], wait: float) -> Tuple[bytes, bytes, str]:
+        """
+        One connection: optionally wait `wait` seconds for a greeting, then
+        send the probe and read the answer. Returns (greeting, answer, tls
+        version or ""). The socket is counted against GOVERNOR, and the
+        exchange is retried if the kernel runs out of descriptors or buffers.
+        """
+        attempt = 0
+        while True:
+            async with GOVERNOR.slot():
+                try:
+                    return await self._converse(ip, port, probe, wait)
+                except OSError as e:
+                    if not GOVERNOR.backpressure(e.errno):
+                        raise
+                    err = e
+            if not await GOVERNOR.backoff(attempt):
+                raise err
+            attempt += 1
+
+    async def _converse(self, ip: str, port: int, probe: Optional[Probe], wait: float) -> Tuple[bytes, bytes, str]:
+        ctx = _tls_context() if probe is not None and probe.tls else None
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(ip, port, ssl=ctx), self.timeout)
+        try:
+            tls = ""
+            if ctx is not None:
+                obj = writer.get_extra_info("ssl_object")
+                tls = obj.version() if obj else "TLS"
+                wait = min(self.greeting_wait, 1.0)    # IMAPS/POP3S/SMTPS greet inside the tunnel
+            greeting = b""
+            if wait:
+                try:
+                    greeting = await asyncio.wait_for(reader.read(4096), wait)
+                except asyncio.TimeoutError:
+                    pass
+            if greeting or probe is None:
+                return greeting, b"", tls
+            writer.write(probe.payload.replace(b"{host}", ip.encode()))
+            await writer.drain()
+            try:
+                answer = await asyncio.wait_for(reader.read(4096), self.timeout)
+            except asyncio.TimeoutError:
+                answer = b""
+            return greeting, answer, tls
+        finally:
+            writer.close()
+
+    def _plan(self, port: int) -> Tuple[bool, List[Probe]]:
+        """(wait for a greeting first?, probes in the order to try them)."""
+        hinted = [p for p in PROBES if port in p.ports]
+        rest = [_BY_NAME[n] for n in _FALLBACK if _BY_NAME[n] not in hinted]
+        return not hinted, (hinted + rest)[:self.max_probes]
+
+    async def identify(self, r: PortResult) -> PortResult:
+        """Fill in r.service, r.product, r.banner and r.detected for one open port."""
+        async with self._sem:
+            try:
+                await self._identify(r)
+            except (OSError, asyncio.TimeoutError, ssl.SSLError, EOFError):
+                pass
+        return r
+
+    async def _identify(self, r: PortResult):
+        ip, port = r.ip, r.port
+        greet_first, probes = self._plan(port)
+        # The first connection waits for a greeting (ports without a port-specific probe)
+        # and, if none comes, carries the first probe
+        try:
+            greeting, answer, tls = await self._exchange(ip, port, probes[0],
+                                                         self.greeting_wait if greet_first else 0)
+        except (OSError, asyncio.TimeoutError, ssl.SSLError, EOFError):
+            if greet_first:
+                raise
+            # The port's own probe failed (e.g. no TLS on a TLS port): the fallbacks may still work
+            greeting = answer = b""
+            tls = ""
+        first = greeting or answer
+        if self._apply(r, first, tls):
+            return
+        # Keyed on the first answer, so a service that now answers differently is probed again
+        key = (ip, port, hashlib.sha1(tls.encode() + b"\0" + first).hexdigest())
+        hit = self.cache.get(key) if self.cache is not None else None
+        if hit is not None:
+            r.service, r.product, r.banner, r.detected = hit
+            return
+        for probe in probes[1:]:
+            try:
+                extra, answer, tls = await self._exchange(ip, port, probe, 0)
+            except (OSError, asyncio.TimeoutError, ssl.SSLError, EOFError):
+                continue
+            if self._apply(r, extra or answer, tls):
+                break
+        # Undetected ports are cached too: they are the expensive ones to probe again
+        if self.cache is not None:
+            self.cache.put(key, (r.service, r.product, r.banner, r.detected))
+
+    def _apply(self, r: PortResult, data: bytes, tls: str) -> bool:
+        found = match(data, r.port) if data else None
+        if found is None:
+            if tls:
+                # Handshake worked but nothing recognisable inside
+                r.service, r.product, r.detected = "TLS", tls, True
+                return True
+            if data and not r.banner:
+                r.banner = _text(data)
+            return False
+        service, product = found
+        if tls:
+            service = TLS_NAMES.get(service, f"{service}/TLS")
+            product = f"{product} ({tls})" if product else tls
+        r.service, r.product, r.banner, r.detected = service, product, _text(data), True
+        return True
+
+
+async def fingerprint(results: Iterable[PortResult], concurrency: int = CONCURRENCY,
+                      timeout: float = TIMEOUT, on_result: Optional[Callable[[PortResult], None]] = None,
+                      cache: Optional[FingerprintCache] = CACHE) -> List[PortResult]:
+    """
+    Identify the services on the open TCP ports among `results`, in place.
+
+    Args:
+        results: PortResults from any engine; closed, filtered and UDP ones are passed over
+        concurrency: Ports fingerprinted at once
+        timeout: Connect / read timeout per step
+        on_result: Optional callback(PortResult) as each port is identified
+        cache: FingerprintCache to use (None = always probe)
+
+    Returns:
+        The open TCP PortResults, service/product/banner filled in where detected
+    """
+    fp = Fingerprinter(concurrency, timeout, cache=cache)
+    targets = [r for r in results if r.is_open and r.proto == "tcp"]
+
+    async def one(r: PortResult):
+        await fp.identify(r)
+        if on_result:
+            on_result(r)
+
+    await asyncio.gather(*(one(r) for r in targets))
+    return targets
+
+
+def fingerprint_ports(results: Iterable[PortResult], concurrency: int = CONCURRENCY,
+                      timeout: float = TIMEOUT) -> List[PortResult]:
+    """Blocking fingerprint(); returns the open TCP PortResults sorted by (ip, port)."""
+    found = run_sync(fingerprint(results, concurrency, timeout))
+    return sorted(found, key=lambda r: (r.ip, r.port))
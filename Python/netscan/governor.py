@@ -0,0 +1,264 @@
+"""
+File-descriptor governor shared by the engines.
+Engines that open a socket per probe (tcp, fingerprint) or spawn a process
+per probe (the ping fallback) take slots from one process-wide FdGovernor,
+so however many scans run at once - several event loops in NetDiag's thread
+pool, port scanning and fingerprinting side by side in the LAN scanner -
+the descriptors in flight stay under RLIMIT_NOFILE.
+
+When the kernel refuses anyway (EMFILE, ENFILE, ENOBUFS, EADDRNOTAVAIL) the
+governor lowers its limit and the probe waits and retries instead of being
+reported closed; the limit creeps back up as probes complete. Those events
+are counted and reported by stats().
+"""
+from __future__ import annotations
+import asyncio, collections, errno, threading, time
+from typing import Any, Deque, Dict, Optional, Tuple
+
+RESERVE = 64              # descriptors kept back for the process (stdio, logs, DNS, pipes)
+DEFAULT_CEILING = 4096    # where there is no RLIMIT_NOFILE to go by (Windows)
+MIN_LIMIT = 8             # the limit never shrinks below this
+GROW_EVERY = 32           # completed slots per +1 on a lowered limit
+BACKOFF = 0.05            # seconds before the first retry after back-pressure, doubling
+MAX_BACKOFF = 1.0
+MAX_RETRIES = 30          # retries before a probe gives up and reports the error
+
+# The kernel is short of descriptors, buffers or ephemeral ports - not an answer from the target
+PRESSURE_ERRNOS = {
+    errno.EMFILE: "EMFILE", errno.ENFILE: "ENFILE", errno.ENOBUFS: "ENOBUFS",
+    errno.ENOMEM: "ENOMEM", errno.EADDRNOTAVAIL: "EADDRNOTAVAIL",
+}
+for _name in ("WSAEMFILE", "WSAENOBUFS", "WSAEADDRNOTAVAIL"):
+    if hasattr(errno, _name):
+        PRESSURE_ERRNOS[getattr(errno, _name)] = _name[3:]
+
+
+def nofile_limit() -> Tuple[Optional[int], Optional[int]]:
+    """(soft, hard) RLIMIT_NOFILE; None for unlimited, or both None where there is no such limit."""
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    except (ImportError, ValueError, OSError):
+        return None, None
+    unlimited = resource.RLIM_INFINITY
+    return (None if soft == unlimited else soft), (None if hard == unlimited else hard)
+
+
+def raise_nofile(want: int) -> Optional[int]:
+    """
+    Raise the soft RLIMIT_NOFILE to `want` (capped at the hard limit) if it is
+    lower, and size GOVERNOR to the result. Never lowers the limit.
+
+    Returns:
+        The soft limit now in force (None if unlimited or not applicable)
+    """
+    soft, hard = nofile_limit()
+    if soft is None or soft >= want:
+        return soft
+    import resource
+    target = want if hard is None else min(want, hard)
+    for value in (target, min(target, 10240)):      # macOS refuses more than OPEN_MAX
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (value, hard if hard is not None else resource.RLIM_INFINITY))
+            break
+        except (ValueError, OSError):
+            continue
+    GOVERNOR.configure()
+    return nofile_limit()[0]
+
+
+def default_ceiling() -> int:
+    """Descriptors the engines may hold together: the soft limit less RESERVE."""
+    soft, _hard = nofile_limit()
+    if soft is None:
+        return DEFAULT_CEILING
+    return max(MIN_LIMIT, soft - RESERVE)
+
+
+class FdGovernor:
+    """
+    A counting limit on descriptors in flight, shared across threads and
+    event loops. Waiters are woken in FIFO order on their own loop.
+
+    Args:
+        ceiling: Most descriptors in flight (None = default_ceiling(), read on first use)
+    """
+
+    def __init__(self, ceiling: Optional[int] = None):
+        self._lock = threading.Lock()
+        self._fixed = ceiling
+        self._ceiling: Optional[int] = ceiling
+        self._limit = ceiling if ceiling is not None else 0     # set with the ceiling on first use
+        self._since_shrink = 0
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future, int]] = collections.deque()
+        self.in_flight = 0
+        self.peak = 0
+        self.slots = 0
+        self.waits = 0
+        self.wait_s = 0.0
+        self.retries = 0
+        self.gave_up = 0
+        self.pressure: Dict[str, int] = collections.Counter()
+
+    @property
+    def ceiling(self) -> int:
+        if self._ceiling is None:
+            self._ceiling = default_ceiling()
+            self._limit = self._ceiling
+        return self._ceiling
+
+    @property
+    def limit(self) -> int:
+        return self._limit if self._ceiling is not None else self.ceiling
+
+    def configure(self, ceiling: Optional[int] = None):
+        """Set a new ceiling (None = re-read the open-file limit) and reset the limit to it."""
+        with self._lock:
+            self._fixed = ceiling if ceiling is not None else self._fixed
+            self._ceiling = self._fixed if self._fixed is not None else default_ceiling()
+            self._limit = self._ceiling
+            self._wake()
+
+    def _take(self, n: int) -> bool:
+        # An idle governor always admits, so a request larger than the limit cannot stall
+        if self.in_flight and self.in_flight + n > self.limit:
+            return False
+        self.in_flight += n
+        self.slots += 1
+        self.peak = max(self.peak, self.in_flight)
+        return True
+
+    def _wake(self):
+        while self._waiters:
+            loop, fut, n = self._waiters[0]
+            if not self._take(n):
+                return
+            self._waiters.popleft()
+            try:
+                loop.call_soon_threadsafe(self._grant, fut, n)
+            except RuntimeError:
+                # The waiter's loop has closed
+                self.in_flight -= n
+
+    def _grant(self, fut: asyncio.Future, n: int):
+        if fut.cancelled():
+            self.release(n)
+        else:
+            fut.set_result(None)
+
+    async def acquire(self, n: int = 1):
+        """Wait for `n` descriptor slots."""
+        with self._lock:
+            if not self._waiters and self._take(n):
+                return
+            loop = asyncio.get_running_loop()
+            fut = loop.create_future()
+            entry = (loop, fut, n)
+            self._waiters.append(entry)
+            self.waits += 1
+        start = time.perf_counter()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            granted = False
+            with self._lock:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+                    self._wake()
+                else:
+                    granted = fut.done() and not fut.cancelled()
+            if granted:
+                self.release(n)
+            raise
+        finally:
+            with self._lock:
+                self.wait_s += time.perf_counter() - start
+
+    def release(self, n: int = 1):
+        with self._lock:
+            self.in_flight -= n
+            if self._limit < self.ceiling:
+                self._since_shrink += n
+                if self._since_shrink >= GROW_EVERY:
+                    self._since_shrink = 0
+                    self._limit += 1
+            self._wake()
+
+    def slot(self, n: int = 1) -> "_Slot":
+        """`async with GOVERNOR.slot(): ...` holds `n` slots for the block."""
+        return _Slot(self, n)
+
+    def note(self, err: Optional[int]) -> bool:
+        """Count a resource-exhaustion errno; True if `err` is one."""
+        name = PRESSURE_ERRNOS.get(err) if err else None
+        if name is None:
+            return False
+        with self._lock:
+            self.pressure[name] += 1
+        return True
+
+    def backpressure(self, err: Optional[int]) -> bool:
+        """
+        Count `err` and, if the kernel is out of descriptors or buffers, lower
+        the limit to three quarters of what was in flight.
+
+        Returns:
+            True if the caller should back off and retry rather than report a result
+        """
+        if not self.note(err):
+            return False
+        with self._lock:
+            self._limit = max(MIN_LIMIT, min(self._limit, self.in_flight) * 3 // 4)
+            self._since_shrink = 0
+        return True
+
+    async def backoff(self, attempt: int) -> bool:
+        """Sleep before retry number `attempt`; False once MAX_RETRIES is reached."""
+        if attempt >= MAX_RETRIES:
+            self.gave_up += 1
+            return False
+        self.retries += 1
+        await asyncio.sleep(min(MAX_BACKOFF, BACKOFF * 2 ** attempt))
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Limit, usage and back-pressure counters, for reports."""
+        soft, hard = nofile_limit()
+        return {
+            "nofile": soft, "nofile_hard": hard, "ceiling": self.ceiling, "limit": self._limit,
+            "in_flight": self.in_flight, "peak": self.peak, "slots": self.slots,
+            "waits": self.waits, "wait_s": round(self.wait_s, 3), "retries": self.retries,
+            "gave_up": self.gave_up, "pressure": dict(self.pressure),
+        }
+
+    def summary(self) -> str:
+        """One line for front-ends; empty if nothing was throttled."""
+        if not (self.pressure or self.waits):
+            return ""
+        parts = [f"fd limit {self.ceiling}, peak {self.peak} in flight"]
+        if self.waits:
+            parts.append(f"{self.waits} waits ({self.wait_s:.1f}s in total)")
+        if self.pressure:
+            parts.append(", ".join(f"{k} x{v}" for k, v in sorted(self.pressure.items())))
+        if self.retries:
+            parts.append(f"{self.retries} retries")
+        if self.gave_up:
+            parts.append(f"{self.gave_up} gave up")
+        return "; ".join(parts)
+
+
+class _Slot:
+    __slots__ = ("gov", "n")
+
+    def __init__(self, gov: FdGovernor, n: int):
+        self.gov, self.n = gov, n
+
+    async def __aenter__(self):
+        await self.gov.acquire(self.n)
+
+    async def __aexit__(self, *exc):
+        self.gov.release(self.n)
+
+
+# The one instance the engines share
+GOVERNOR = FdGovernor()
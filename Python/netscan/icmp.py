@@ -0,0 +1,342 @@
+"""
+ICMP echo engine.
+Probes go out over one ICMP socket per engine and replies are matched back
+by (address, sequence), so a sweep costs one file descriptor and no child
+processes. A raw socket is used when the process may open one (root or
+CAP_NET_RAW), otherwise an unprivileged ping socket where the kernel allows
+it (Linux net.ipv4.ping_group_range, macOS). Failing both, and for IPv6,
+each probe runs the system ping command.
+"""
+from __future__ import annotations
+import asyncio, ctypes, math, os, platform, random, re, socket, struct, sys, time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from ._aio import run_process
+from .pacing import Pacer
+from .results import HostResult
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+# Linux value; other platforms expose it in the socket module or go without reply TTLs
+IP_RECVTTL = getattr(socket, "IP_RECVTTL", 12 if sys.platform.startswith("linux") else None)
+PROCESS_LIMIT = 64     # concurrent ping processes when no ICMP socket is available
+PAYLOAD = b"netscan-echo"
+SO_ATTACH_FILTER = getattr(socket, "SO_ATTACH_FILTER", 26 if sys.platform.startswith("linux") else None)
+
+ANDROID_VENDORS = {
+    "samsung", "xiaomi", "redmi", "realme", "oppo", "vivo", "oneplus",
+    "motorola", "google", "huawei", "honor", "sony", "asus", "nokia", "hmd",
+}
+
+_ECHO = struct.Struct("!BBHHH")
+_LOSS = (re.compile(r"([\d.]+)% packet loss"), re.compile(r"Lost = \d+ \((\d+)% loss\)"))
+_SUMMARY = re.compile(r"min/avg/max(?:/mdev|/stddev)? = ([\d.]+)/([\d.]+)/([\d.]+)")
+_WIN_AVG = re.compile(r"Average = (\d+)ms")
+_TTL = re.compile(r"ttl[=:](\d+)", re.IGNORECASE)
+_TIME = re.compile(r"time[=<]([\d.]+)\s*ms", re.IGNORECASE)
+
+Runner = Callable[..., Awaitable[Tuple[int, str, str]]]
+
+
+# Packets and parsing
+def checksum(data: bytes) -> int:
+    """RFC 1071 Internet checksum."""
+    if len(data) % 2:
+        data += b"\0"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def echo_request(ident: int, seq: int, payload: bytes = PAYLOAD) -> bytes:
+    header = _ECHO.pack(ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    return _ECHO.pack(ICMP_ECHO_REQUEST, 0, checksum(header + payload), ident, seq) + payload
+
+
+def ping_command(ip: str, timeout: float = 1.0, count: int = 1) -> List[str]:
+    """System ping invocation for one address."""
+    if platform.system().lower() == "windows":
+        return ["ping", "-n", str(count), "-w", str(int(timeout * 1000)), ip]
+    return ["ping", "-c", str(count), "-W", str(max(1, math.ceil(timeout))), ip]
+
+
+def parse_ping_output(out: str) -> Dict[str, Any]:
+    """
+    Pull loss %, min/avg/max, the first reply's TTL and time out of Linux,
+    macOS or Windows ping output. Missing values are None.
+    """
+    res: Dict[str, Any] = {"loss": None, "min": None, "avg": None, "max": None,
+                           "ttl": None, "rtt_ms": None}
+    for pattern in _LOSS:
+        m = pattern.search(out)
+        if m:
+            res["loss"] = float(m.group(1))
+            break
+    m = _SUMMARY.search(out)
+    if m:
+        res.update({"min": float(m.group(1)), "avg": float(m.group(2)), "max": float(m.group(3))})
+    else:
+        m = _WIN_AVG.search(out)
+        if m:
+            res["avg"] = float(m.group(1))
+    m = _TTL.search(out)
+    if m:
+        res["ttl"] = int(m.group(1))
+    m = _TIME.search(out)
+    if m:
+        res["rtt_ms"] = float(m.group(1))
+    return res
+
+
+def guess_os(ttl: Optional[int], vendor: str = "") -> str:
+    """
+    Infer the OS family from a reply TTL and MAC vendor. Hosts start at 64
+    (Linux/Unix, macOS, Android), 128 (Windows) or 255 (network gear) and
+    every hop takes one off, so the bands are upper-bounded by those values.
+    """
+    if ttl is None:
+        return "Unknown"
+    if ttl > 128:
+        return "Network Device"
+    if ttl > 64:
+        return "Windows"
+    vendor = (vendor or "").lower()
+    if "apple" in vendor:
+        return "Apple (macOS/iOS)"
+    for name in ANDROID_VENDORS:
+        if name in vendor:
+            return f"Android ({name.title()})"
+    return "Linux / Unix"
+
+
+def open_socket() -> Tuple[Optional[socket.socket], Optional[str]]:
+    """An ICMP socket and its kind ("raw" or "dgram"), or (None, None) if neither is allowed."""
+    if os.name != "posix":
+        # The Windows proactor loop cannot watch raw sockets; use ping.exe
+        return None, None
+    for kind, mode in ((socket.SOCK_RAW, "raw"), (socket.SOCK_DGRAM, "dgram")):
+        try:
+            sock = socket.socket(socket.AF_INET, kind, socket.IPPROTO_ICMP)
+        except OSError:
+            continue
+        sock.setblocking(False)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+            if mode == "dgram" and IP_RECVTTL is not None:
+                sock.setsockopt(socket.IPPROTO_IP, IP_RECVTTL, 1)
+        except OSError:
+            pass
+        return sock, mode
+    return None, None
+
+
+def attach_ident_filter(sock: socket.socket, ident: int) -> bool:
+    """
+    Have the kernel drop every ICMP message on a raw socket except echo
+    replies carrying `ident` (Linux classic BPF). Without it each raw socket
+    queues every ICMP message on the host, so engines in several processes
+    each read all of the others' replies and fall behind on their own.
+
+    Returns:
+        True if the filter is in place
+    """
+    if SO_ATTACH_FILTER is None:
+        return False
+    program = [
+        (0xB1, 0, 0, 0),            # ldxb 4*([0]&0xf)    X = IP header length
+        (0x50, 0, 0, 0),            # ldb [x+0]           ICMP type
+        (0x15, 0, 3, ICMP_ECHO_REPLY),
+        (0x48, 0, 0, 4),            # ldh [x+4]           ICMP identifier
+        (0x15, 0, 1, ident),
+        (0x06, 0, 0, 0xFFFF),       # accept
+        (0x06, 0, 0, 0),            # drop
+    ]
+    code = ctypes.create_string_buffer(b"".join(struct.pack("HBBI", *op) for op in program))
+    fprog = struct.pack("HP", len(program), ctypes.addressof(code))
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, fprog)
+    except OSError:
+        return False
+    return True
+
+
+# Engine
+class IcmpEngine:
+    """
+    Pings addresses concurrently from one event loop.
+
+        engine = IcmpEngine(timeout=1.0)
+        try:
+            result = await engine.ping("192.168.1.1")
+        finally:
+            engine.close()
+
+    Args:
+        timeout: Seconds to wait for each echo reply
+        retries: Extra echo requests sent to a silent host
+        run: Coroutine used to run ping when no ICMP socket is available,
+             called as run(cmd, timeout=...) -> (rc, stdout, stderr)
+        use_socket: False forces the ping-command path
+        pacer: Optional Pacer every echo request (or ping process) waits on
+    """
+
+    def __init__(self, timeout: float = 1.0, retries: int = 0, run: Optional[Runner] = None,
+                 use_socket: bool = True, pacer: Optional[Pacer] = None):
+        self.timeout = timeout
+        self.pacer = pacer
+        self.retries = retries
+        self.run = run or run_process
+        self.sock, self.mode = open_socket() if use_socket else (None, None)
+        self.method = f"icmp-{self.mode}" if self.sock else "ping"
+        self._ident = random.randrange(1, 0x10000)
+        if self.mode == "raw":
+            attach_ident_filter(self.sock, self._ident)
+        self._seq = random.randrange(0x10000)
+        self._pending: Dict[Tuple[str, int], Tuple[asyncio.Future, float]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def close(self):
+        if self.sock is None:
+            return
+        if self._loop is not None:
+            self._loop.remove_reader(self.sock.fileno())
+            self._loop = None
+        self.sock.close()
+        self.sock = None
+
+    def _watch(self):
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self._loop.add_reader(self.sock.fileno(), self._readable)
+
+    def _readable(self):
+        # Drain everything queued; each datagram is one ICMP message
+        while self.sock is not None:
+            ttl = None
+            try:
+                if self.mode == "raw":
+                    data, addr = self.sock.recvfrom(2048)
+                else:
+                    data, ancillary, _flags, addr = self.sock.recvmsg(2048, socket.CMSG_SPACE(4))
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            now = time.perf_counter()
+            if self.mode == "raw":
+                # Raw sockets see the IP header (and every ICMP message on the host)
+                if len(data) < 20:
+                    continue
+                ttl = data[8]
+                data = data[(data[0] & 0x0F) * 4:]
+            else:
+                for level, kind, value in ancillary:
+                    if level == socket.IPPROTO_IP and kind == socket.IP_TTL and value:
+                        ttl = int.from_bytes(value[:4], sys.byteorder)
+            if len(data) < _ECHO.size:
+                continue
+            itype, _code, _sum, ident, seq = _ECHO.unpack_from(data)
+            # Ping sockets get their identifier rewritten by the kernel and only see their own replies;
+            # raw sockets are filtered by attach_ident_filter() where the platform allows it
+            if itype != ICMP_ECHO_REPLY or (self.mode == "raw" and ident != self._ident):
+                continue
+            entry = self._pending.pop((addr[0], seq), None)
+            if entry and not entry[0].done():
+                entry[0].set_result((now - entry[1], ttl))
+
+    async def _send(self, packet: bytes, ip: str):
+        while True:
+            try:
+                self.sock.sendto(packet, (ip, 0))
+                return
+            except (BlockingIOError, InterruptedError):
+                await asyncio.sleep(0.001)
+
+    async def _echo(self, ip: str) -> Optional[Tuple[float, Optional[int]]]:
+        self._watch()
+        loop = asyncio.get_running_loop()
+        for _ in range(self.retries + 1):
+            self._seq = seq = (self._seq + 1) & 0xFFFF
+            key = (ip, seq)
+            fut = loop.create_future()
+            if self.pacer is not None:
+                await self.pacer.wait(ip)
+            self._pending[key] = (fut, time.perf_counter())
+            try:
+                await self._send(echo_request(self._ident, seq), ip)
+                return await asyncio.wait_for(fut, self.timeout)
+            except asyncio.TimeoutError:
+                continue
+            finally:
+                self._pending.pop(key, None)
+        return None
+
+    async def _ping_process(self, ip: str) -> HostResult:
+        parsed: Dict[str, Any] = {}
+        for _ in range(self.retries + 1):
+            if self.pacer is not None:
+                await self.pacer.wait(ip)
+            rc, out, err = await self.run(ping_command(ip, self.timeout), timeout=self.timeout + 2)
+            parsed = parse_ping_output(out)
+            # A TTL only appears on a real echo reply, not on "Destination host unreachable"
+            if parsed["ttl"] is not None:
+                return HostResult(ip, alive=True, ttl=parsed["ttl"], rtt_ms=parsed["rtt_ms"],
+                                  method="ping")
+        return HostResult(ip, method="ping")
+
+    async def ping(self, ip: str) -> HostResult:
+        """Probe one address; alive, ttl and rtt_ms are filled in on a reply."""
+        ip = str(ip)
+        if self.sock is None or ":" in ip:
+            return await self._ping_process(ip)
+        try:
+            reply = await self._echo(ip)
+        except OSError as e:
+            # EHOSTUNREACH, ENETUNREACH, ... : nothing to wait for
+            return HostResult(ip, method=self.method, error=e.strerror or str(e))
+        if reply is None:
+            return HostResult(ip, method=self.method)
+        rtt, ttl = reply
+        return HostResult(ip, alive=True, ttl=ttl, rtt_ms=round(rtt * 1000, 2), method=self.method)
+
+
+async def sweep(hosts: Iterable, timeout: float = 1.0, concurrency: int = 256, retries: int = 0,
+                on_result: Optional[Callable[[HostResult], None]] = None,
+                run: Optional[Runner] = None, use_socket: bool = True,
+                pacer: Optional[Pacer] = None) -> List[HostResult]:
+    """
+    Ping many addresses with at most `concurrency` probes in flight.
+
+    Args:
+        hosts: Addresses (str or ipaddress objects); consumed lazily
+        timeout: Seconds to wait for each reply
+        concurrency: Probes in flight at once (capped at PROCESS_LIMIT on the
+            ping-command path unless a custom runner is given)
+        retries: Extra echo requests sent to silent hosts
+        on_result: Optional callback(HostResult) as each probe completes
+        run: Subprocess coroutine for the ping-command path (see IcmpEngine)
+        use_socket: False forces the ping-command path
+        pacer: Optional Pacer that spaces out the echo requests (see pacing)
+
+    Returns:
+        One HostResult per address, in completion order
+    """
+    engine = IcmpEngine(timeout, retries, run, use_socket, pacer)
+    if engine.sock is None and run is None:
+        concurrency = min(concurrency, PROCESS_LIMIT)
+    results: List[HostResult] = []
+    pending = iter(hosts)
+
+    async def worker():
+        for ip in pending:
+            r = await engine.ping(ip)
+            results.append(r)
+            if on_result:
+                on_result(r)
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    finally:
+        engine.close()
+    return results
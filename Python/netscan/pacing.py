@@ -0,0 +1,193 @@
+"""
+Token-bucket pacing for the probe engines.
+A Pacer lets probes out at `rate` per second on average, in bursts of at
+most `burst`. Probes waiting for a token are queued per host (or per subnet)
+and served round-robin, so a target with many probes queued cannot take
+every token while the others wait; `key_rate` additionally caps each host or
+subnet on its own. Engines await pacer.wait(ip) before every packet they send,
+retries included, and stats() reports the rate actually achieved.
+
+A Pacer belongs to the event loop that first waits on it.
+"""
+from __future__ import annotations
+import asyncio, collections, ipaddress, time
+from typing import Any, Deque, Dict, Optional
+
+BURST_SECONDS = 0.05      # default burst: this many seconds' worth of tokens (at least 1)
+FAIRNESS = ("host", "subnet", "none")
+MIN_DELAY = 0.001         # shortest timer the pacer arms
+
+
+def _burst(rate: float) -> float:
+    return max(1.0, rate * BURST_SECONDS)
+
+
+def subnet_of(ip: str) -> str:
+    """The /24 (IPv4) or /64 (IPv6) an address belongs to."""
+    if ":" not in ip:
+        return ip.rsplit(".", 1)[0]
+    return str(ipaddress.ip_network(f"{ip}/64", strict=False).network_address)
+
+
+class _Bucket:
+    __slots__ = ("rate", "burst", "tokens", "stamp")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = now
+
+    def refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def delay(self) -> float:
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class Pacer:
+    """
+    Shared token bucket with per-host or per-subnet fair queuing.
+
+    Args:
+        rate: Packets per second, on average
+        burst: Packets that may go out back to back (default: BURST_SECONDS of rate)
+        fairness: "host", "subnet" (/24, IPv6 /64) or "none" (plain FIFO)
+        key_rate: Optional packets per second for each host/subnet on its own
+
+    Raises:
+        ValueError: on a non-positive rate or an unknown fairness
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, fairness: str = "host",
+                 key_rate: Optional[float] = None):
+        if not rate or rate <= 0:
+            raise ValueError("rate must be positive")
+        if fairness not in FAIRNESS:
+            raise ValueError(f"fairness must be one of {', '.join(FAIRNESS)}")
+        self.rate = float(rate)
+        self.burst = float(burst) if burst else _burst(self.rate)
+        self.fairness = fairness
+        self.key_rate = key_rate
+        self._bucket = _Bucket(self.rate, self.burst, time.monotonic())
+        self._keys: Dict[str, _Bucket] = {}
+        self._queues: "collections.OrderedDict[str, Deque[asyncio.Future]]" = collections.OrderedDict()
+        self._queued = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.sent = 0
+        self.delayed = 0
+        self._first: Optional[float] = None
+        self._last: Optional[float] = None
+
+    def key(self, ip: str) -> str:
+        if self.fairness == "host":
+            return ip
+        if self.fairness == "subnet":
+            return subnet_of(ip)
+        return ""
+
+    def _ready(self, key: str, now: float) -> bool:
+        self._bucket.refill(now)
+        if self._bucket.tokens < 1:
+            return False
+        if self.key_rate:
+            b = self._keys.get(key)
+            if b is None:
+                b = self._keys[key] = _Bucket(self.key_rate, _burst(self.key_rate), now)
+            b.refill(now)
+            if b.tokens < 1:
+                return False
+        return True
+
+    def _spend(self, key: str, now: float):
+        self._bucket.tokens -= 1
+        if self.key_rate:
+            self._keys[key].tokens -= 1
+        self.sent += 1
+        if self._first is None:
+            self._first = now
+        self._last = now
+
+    def try_take(self, ip: str) -> bool:
+        """Take a token for `ip` if one is free right now, without queuing (for tick-driven engines)."""
+        key = self.key(ip)
+        now = time.monotonic()
+        if not self._ready(key, now):
+            return False
+        self._spend(key, now)
+        return True
+
+    async def wait(self, ip: str):
+        """Wait until one packet to `ip` may be sent."""
+        key = self.key(ip)
+        now = time.monotonic()
+        if not self._queued and self._ready(key, now):
+            self._spend(key, now)
+            return
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = collections.deque()
+            # A host that was not queued before may be able to go right away
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        queue.append(fut)
+        self._queued += 1
+        self.delayed += 1
+        if self._timer is None:
+            self._timer = loop.call_soon(self._serve, loop)
+        await fut
+
+    def _serve(self, loop: asyncio.AbstractEventLoop):
+        # Hand out tokens one host/subnet at a time, in rotation
+        self._timer = None
+        now = time.monotonic()
+        self._bucket.refill(now)
+        progressed = True
+        while self._queued and progressed and self._bucket.tokens >= 1:
+            progressed = False
+            for key in list(self._queues):
+                queue = self._queues[key]
+                while queue and queue[0].done():       # cancelled waiters
+                    queue.popleft()
+                    self._queued -= 1
+                if not queue:
+                    del self._queues[key]
+                    continue
+                if not self._ready(key, now):
+                    if self._bucket.tokens < 1:
+                        break
+                    continue
+                self._spend(key, now)
+                queue.popleft().set_result(None)
+                self._queued -= 1
+                if queue:
+                    self._queues.move_to_end(key)
+                else:
+                    del self._queues[key]
+                progressed = True
+        if not self._queued:
+            return
+        if self._bucket.tokens < 1:
+            delay = self._bucket.delay()
+        else:
+            # Tokens to spare, but every queued host is over its own rate
+            delay = min((self._keys[k].delay() for k in self._queues if k in self._keys), default=MIN_DELAY)
+        self._timer = loop.call_later(max(MIN_DELAY, delay), self._serve, loop)
+
+    @property
+    def achieved(self) -> Optional[float]:
+        """Packets per second actually let out, from the first to the last."""
+        if self.sent < 2 or self._last == self._first:
+            return None
+        return (self.sent - 1) / (self._last - self._first)
+
+    def stats(self) -> Dict[str, Any]:
+        """Configured and achieved rate, for results."""
+        achieved = self.achieved
+        return {"rate": self.rate, "burst": self.burst, "fairness": self.fairness,
+                "key_rate": self.key_rate, "sent": self.sent, "delayed": self.delayed,
+                "achieved_pps": round(achieved, 1) if achieved is not None else None}
@@ -0,0 +1,203 @@
+"""
+Multi-process sweeps for very large address spaces.
+One process running the ICMP engine tops out on a single core (building
+packets, parsing replies, handling results). sweep_processes() cuts the
+block into targets.chunks() that worker processes pull from a shared queue,
+so fast and slow chunks even out between them. Each worker runs its own
+event loop and ICMP engine and, as each chunk finishes, sends back the
+number of addresses it probed and only the hosts that answered, packed with
+struct into one binary frame over its pipe. The parent merges the frames as
+they arrive.
+
+A raw ICMP socket receives every echo reply on the host, so each worker's
+engine attaches a BPF filter on its own identifier (icmp.attach_ident_filter());
+otherwise every worker would read all the others' replies and, at high reply
+rates, lose its own. Ping sockets (dgram) are filtered by the kernel anyway.
+"Network Sweep Tool/check_sharded.py" compares a sharded sweep with a
+single-process one.
+"""
+from __future__ import annotations
+import asyncio, ipaddress, math, multiprocessing, os, socket, struct
+from multiprocessing.connection import wait
+from typing import Any, Callable, Collection, Dict, List, Optional
+
+from . import discovery, targets
+from .pacing import Pacer
+from .results import HostResult
+
+# Frame: kind (R = results, E = error), chunk index, addresses probed; then records or error text
+_FRAME = struct.Struct("!cII")
+# Record: IP version, address, TTL (0 = unknown), RTT ms (NaN = unknown), MAC (zeros = unknown),
+# followed by method, hostname and vendor as length-prefixed UTF-8
+_RECORD = struct.Struct("!B16sBf6s")
+_NO_MAC = bytes(6)
+JOIN_TIMEOUT = 5.0        # seconds to wait for a worker to exit before terminating it
+
+
+def _put_text(out: bytearray, text: Optional[str]):
+    data = (text or "").encode("utf-8")[:255]
+    out.append(len(data))
+    out += data
+
+
+def pack_hosts(hosts: List[HostResult]) -> bytes:
+    """Live HostResults as compact binary records (ports and errors are not carried)."""
+    out = bytearray()
+    for h in hosts:
+        addr = ipaddress.ip_address(h.ip)
+        mac = bytes.fromhex(h.mac.replace(":", "").replace("-", "")) if h.mac else _NO_MAC
+        out += _RECORD.pack(addr.version, addr.packed, h.ttl or 0,
+                            h.rtt_ms if h.rtt_ms is not None else math.nan,
+                            mac if len(mac) == 6 else _NO_MAC)
+        _put_text(out, h.method)
+        _put_text(out, h.hostname)
+        _put_text(out, h.vendor)
+    return bytes(out)
+
+
+def unpack_hosts(data: bytes) -> List[HostResult]:
+    """Inverse of pack_hosts(); the OS guess is recomputed from TTL and vendor."""
+    from .icmp import guess_os
+    hosts: List[HostResult] = []
+    off = 0
+    while off < len(data):
+        version, packed, ttl, rtt, mac = _RECORD.unpack_from(data, off)
+        off += _RECORD.size
+        texts = []
+        for _ in range(3):
+            n = data[off]
+            texts.append(data[off + 1:off + 1 + n].decode("utf-8", errors="replace"))
+            off += 1 + n
+        method, hostname, vendor = texts
+        ip = socket.inet_ntop(socket.AF_INET if version == 4 else socket.AF_INET6,
+                              packed[:4] if version == 4 else packed)
+        hosts.append(HostResult(
+            ip, alive=True, ttl=ttl or None, rtt_ms=None if math.isnan(rtt) else round(rtt, 2),
+            method=method, mac=":".join(f"{b:02x}" for b in mac) if mac != _NO_MAC else None,
+            hostname=hostname or None, vendor=vendor or None,
+            os=guess_os(ttl or None, vendor)))
+    return hosts
+
+
+async def _work(network: str, tasks, conn, timeout: float, concurrency: int, retries: int,
+                details: bool, rate: Optional[float], burst: Optional[float], fairness: str):
+    loop = asyncio.get_running_loop()
+    pacer = Pacer(rate, burst, fairness) if rate else None
+    while True:
+        item = await loop.run_in_executor(None, tasks.get)
+        if item is None:
+            return
+        index, chunk = item
+        try:
+            found = await discovery.discover(targets.chunk_hosts(network, chunk), timeout, concurrency,
+                                             retries, details=details, pacer=pacer)
+        except Exception as e:
+            conn.send_bytes(_FRAME.pack(b"E", index, 0) + f"{chunk}: {e}".encode("utf-8", errors="replace"))
+            continue
+        conn.send_bytes(_FRAME.pack(b"R", index, len(found)) + pack_hosts([h for h in found if h.alive]))
+
+
+def _worker(network: str, tasks, conn, timeout: float, concurrency: int, retries: int,
+            details: bool, rate: Optional[float], burst: Optional[float], fairness: str):
+    try:
+        asyncio.run(_work(network, tasks, conn, timeout, concurrency, retries, details, rate, burst, fairness))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+
+
+def sweep_processes(network: str, processes: Optional[int] = None, timeout: float = 1.0,
+                    concurrency: int = 256, retries: int = 0, details: bool = True,
+                    rate: Optional[float] = None, burst: Optional[float] = None,
+                    fairness: str = "subnet", chunk_size: int = targets.CHUNK_HOSTS,
+                    skip: Collection[str] = (),
+                    on_host: Optional[Callable[[HostResult], None]] = None,
+                    on_chunk: Optional[Callable[[str, int, int, Optional[str]], None]] = None) -> Dict[str, Any]:
+    """
+    Sweep one CIDR block from several processes.
+
+    Args:
+        network: CIDR block to sweep
+        processes: Worker processes (default: one per CPU; never more than there are chunks)
+        timeout: Seconds to wait for each echo reply
+        concurrency: Probes in flight in each worker
+        retries: Extra echo requests sent to silent hosts
+        details: Look up MAC, vendor and hostname in the workers
+        rate: Echo requests per second for the whole sweep, split evenly between workers
+        burst: Echo requests that may go out back to back, also split between workers
+        fairness: Pacer fairness in each worker ("host", "subnet" or "none")
+        chunk_size: Addresses per chunk handed to a worker
+        skip: Chunks (as listed by targets.chunks()) already swept, e.g. by an interrupted run
+        on_host: Optional callback(HostResult) in the parent for every live host
+        on_chunk: Optional callback(chunk, probed, total_probed, error) in the parent as chunks
+            finish; error is None for a swept chunk, or the text of why the worker failed it
+
+    Returns:
+        {"alive": live HostResults in arrival order, "scanned", "chunks" (to sweep,
+        after `skip`), "chunks_done", "processes", "errors": [text, ...]}
+
+    Raises:
+        ValueError: if `network` is not a CIDR block or the pacing is invalid
+    """
+    chunks = targets.chunks(network, chunk_size)
+    todo = [(i, c) for i, c in enumerate(chunks) if c not in skip]
+    processes = max(1, min(processes or os.cpu_count() or 1, len(todo)))
+    ctx = multiprocessing.get_context()
+    tasks = ctx.Queue()
+    for item in todo:
+        tasks.put(item)
+    for _ in range(processes):
+        tasks.put(None)
+
+    share = rate / processes if rate else None
+    burst = max(1.0, burst / processes) if rate and burst else None
+    if share:
+        Pacer(share, burst, fairness)        # raise here, not in every worker
+    workers, conns = [], []
+    for _ in range(processes):
+        recv, send = ctx.Pipe(duplex=False)
+        proc = ctx.Process(target=_worker, daemon=True,
+                           args=(network, tasks, send, timeout, concurrency, retries, details, share,
+                                 burst, fairness))
+        proc.start()
+        send.close()
+        workers.append(proc)
+        conns.append(recv)
+
+    result: Dict[str, Any] = {"alive": [], "scanned": 0, "chunks": len(todo), "chunks_done": 0,
+                              "processes": processes, "errors": []}
+    try:
+        while conns:
+            for conn in wait(conns):
+                try:
+                    frame = conn.recv_bytes()
+                except EOFError:
+                    conns.remove(conn)
+                    continue
+                kind, index, probed = _FRAME.unpack_from(frame)
+                body = frame[_FRAME.size:]
+                result["chunks_done"] += 1
+                error = None
+                if kind == b"E":
+                    error = body.decode("utf-8", errors="replace")
+                    result["errors"].append(error)
+                else:
+                    result["scanned"] += probed
+                    for host in unpack_hosts(body):
+                        result["alive"].append(host)
+                        if on_host:
+                            on_host(host)
+                if on_chunk:
+                    on_chunk(chunks[index], probed, result["scanned"], error)
+    finally:
+        for proc in workers:
+            proc.join(JOIN_TIMEOUT if not conns else 0)
+            if proc.is_alive():
+                proc.terminate()
+                proc.join()
+        tasks.close()
+    lost = result["chunks"] - result["chunks_done"]
+    if lost:
+        result["errors"].append(f"{lost} chunk(s) not swept (a worker exited early)")
+    return result
@@ -0,0 +1,86 @@
+"""
+Port tables shared by every scanner, and the port-list parser.
+"""
+from __future__ import annotations
+from typing import List
+
+# Most commonly exposed TCP ports
+TOP_100_PORTS = [
+    20, 21, 22, 23, 25, 53, 67, 68, 69, 80, 110, 111, 123, 135, 137, 138, 139,
+    143, 161, 389, 443, 445, 514, 587, 631, 636, 873, 902, 989, 990, 993, 995,
+    1025, 1026, 1027, 1028, 1433, 1434, 1723, 2049, 2082, 2083, 2181, 2375,
+    2376, 2484, 2487, 3050, 3128, 3306, 3389, 3690, 4369, 5000, 5432, 5555,
+    5672, 5900, 5985, 5986, 6379, 6443, 6667, 6881, 7001, 7002, 7077, 8000,
+    8008, 8080, 8081, 8123, 8443, 8888, 9000, 9001, 9042, 9092, 9200, 9300,
+    9418, 11211, 27017, 27018, 27019, 28017,
+]
+
+# Most commonly exposed UDP ports
+TOP_UDP_PORTS = [
+    53, 67, 68, 69, 111, 123, 137, 138, 161, 162, 500, 514, 520, 623, 1194,
+    1434, 1900, 2049, 4500, 5060, 5353, 11211,
+]
+
+# Conventional service for a port number (a guess until something answers)
+PORT_SERVICES = {
+    20: "FTP-Data",    21: "FTP",          22: "SSH",          23: "Telnet",
+    25: "SMTP",        53: "DNS",          67: "DHCP",         68: "DHCP",
+    69: "TFTP",        80: "HTTP",         110: "POP3",        111: "RPC",
+    123: "NTP",        135: "MS-RPC",      137: "NetBIOS",     138: "NetBIOS",
+    139: "NetBIOS",    143: "IMAP",        161: "SNMP",        389: "LDAP",
+    443: "HTTPS",      445: "SMB",         514: "Syslog",      587: "SMTP",
+    631: "IPP",        636: "LDAPS",       873: "Rsync",       902: "VMware",
+    989: "FTPS",       990: "FTPS",        993: "IMAPS",       995: "POP3S",
+    1025: "MS-RPC",    1433: "MSSQL",      1434: "MSSQL",      1723: "PPTP",
+    2049: "NFS",       2082: "cPanel",     2083: "cPanel",     2181: "ZooKeeper",
+    2375: "Docker",    2376: "Docker-TLS", 3128: "Squid",      3306: "MySQL",
+    3389: "RDP",       3690: "SVN",        4369: "EPMD",       5000: "UPnP",
+    5432: "PostgreSQL", 5555: "ADB",       5672: "RabbitMQ",   5900: "VNC",
+    5985: "WinRM",     5986: "WinRM-SSL",  6379: "Redis",      6443: "Kubernetes",
+    6667: "IRC",       7001: "WebLogic",   8000: "HTTP-Alt",   8008: "HTTP-Alt",
+    8080: "HTTP-Proxy", 8081: "HTTP-Alt",  8123: "Polipo",     8443: "HTTPS-Alt",
+    8888: "HTTP-Alt",  9000: "SonarQube",  9042: "Cassandra",  9092: "Kafka",
+    9200: "Elasticsearch", 9300: "Elasticsearch", 9418: "Git", 11211: "Memcached",
+    27017: "MongoDB",  27018: "MongoDB",   27019: "MongoDB",
+    162: "SNMP-Trap",  500: "IKE",         520: "RIP",         623: "IPMI",
+    1194: "OpenVPN",   1900: "SSDP",       4500: "IPsec-NAT",  5060: "SIP",
+    5353: "mDNS",
+}
+
+
+def service_name(port: int) -> str:
+    """Conventional service name for a port, or "Unknown"."""
+    return PORT_SERVICES.get(int(port), "Unknown")
+
+
+def parse_ports(spec: str) -> List[int]:
+    """
+    Parse a port list such as "22,80,443,8000-8100" into sorted unique ints.
+    "top100" expands to TOP_100_PORTS, "topudp" to TOP_UDP_PORTS and "all" to 1-65535.
+
+    Raises:
+        ValueError: on a malformed entry or a port outside 1-65535
+    """
+    out = set()
+    for part in (spec or "").split(","):
+        part = part.strip().lower()
+        if not part:
+            continue
+        if part == "top100":
+            out.update(TOP_100_PORTS)
+        elif part == "topudp":
+            out.update(TOP_UDP_PORTS)
+        elif part == "all":
+            out.update(range(1, 65536))
+        elif "-" in part:
+            a, b = part.split("-", 1)
+            lo, hi = int(a or 1), int(b or 65535)
+            if not 1 <= lo <= hi <= 65535:
+                raise ValueError(f"bad port range: {part}")
+            out.update(range(lo, hi + 1))
+        else:
+            p = int(part)
+            if not 1 <= p <= 65535:
+                raise ValueError(f"bad port: {part}")
+            out.add(p)
+    return sorted(out)
@@ -0,0 +1,57 @@
+"""
+Result records every engine reports in, so the front-ends can share
+rendering, JSON output and post-processing.
+"""
+from __future__ import annotations
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class PortResult:
+    """Outcome of probing one port on one host."""
+    ip: str
+    port: int
+    state: str                          # "open", "closed", "filtered" or (UDP) "open|filtered"
+    proto: str = "tcp"
+    latency_ms: Optional[float] = None  # time from the (last) probe to the verdict; the timeout when nothing answered
+    service: str = ""                   # conventional name, or the detected one when detected
+    banner: str = ""
+    error: Optional[str] = None
+    product: str = ""                   # software / version text from fingerprinting
+    detected: bool = False              # service identified from what the port said
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == "open"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class HostResult:
+    """What discovery learned about one address."""
+    ip: str
+    alive: bool = False
+    ttl: Optional[int] = None
+    rtt_ms: Optional[float] = None
+    method: str = ""                    # "icmp-raw", "icmp-dgram" or "ping"
+    mac: Optional[str] = None
+    vendor: Optional[str] = None
+    hostname: Optional[str] = None
+    os: Optional[str] = None
+    ports: List[PortResult] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def open_ports(self) -> List[PortResult]:
+        return sorted((p for p in self.ports if p.is_open), key=lambda p: (p.proto, p.port))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HostResult":
+        """Inverse of to_dict(), e.g. for a host reloaded from a checkpoint."""
+        return cls(**{**data, "ports": [PortResult(**p) for p in data.get("ports", [])]})
@@ -0,0 +1,325 @@
+"""
+Half-open (SYN) scan engine. Needs root or CAP_NET_RAW; IPv4 only.
+
+SYNs are written to one raw TCP socket. Each carries a sequence number
+derived from a per-scan secret and the (address, port) it was sent to, so
+a SYN-ACK or RST is matched statelessly by checking its acknowledgement
+number. No socket is opened per probe and no handshake is completed (the
+kernel answers the SYN-ACK with an RST), so the connection never reaches
+the target application. ICMP unreachables quoting one of our SYNs and
+probes that get no answer after the retries are reported as filtered.
+"""
+from __future__ import annotations
+import asyncio, collections, errno, os, random, socket, struct, time
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from ._aio import run_sync
+from .governor import GOVERNOR
+from .pacing import Pacer
+from .ports import service_name
+from .results import PortResult
+
+TCP_SYN, TCP_RST, TCP_ACK = 0x02, 0x04, 0x10
+MSS_OPTION = b"\x02\x04\x05\xb4"          # MSS 1460; bare SYNs look odd to some stacks
+TCP_LEN = 20 + len(MSS_OPTION)
+BATCH = 512                               # SYNs sent between event-loop turns when unpaced
+TICK = 0.005                              # pacing granularity in seconds
+
+_TCP_HDR = struct.Struct("!HHIIBBHHH")
+_TCP_PEEK = struct.Struct("!HHIIBB")
+_ICMP_FILTERED = {1, 2, 3, 9, 10, 13}     # host/protocol/port unreachable, admin prohibited
+
+
+def available() -> bool:
+    """True if this process may open the raw sockets SYN scanning needs."""
+    try:
+        socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_TCP).close()
+        return True
+    except (OSError, AttributeError):
+        return False
+
+
+def _fold(total: int) -> int:
+    while total >> 16:
+        total = (total & 0xFFFF) + (total >> 16)
+    return total
+
+
+class SynScanner:
+    """
+    One SYN scan: a raw TCP socket to send and listen on, a raw ICMP socket
+    for unreachables, and the table of probes awaiting an answer.
+
+    Args:
+        timeout: Seconds to wait for an answer to each SYN
+        retries: Extra SYNs sent to a port that stays silent
+        rate: Maximum SYNs per second (None = as fast as the socket takes them)
+        source_port: TCP source port for every probe (default: random high port)
+        pacer: Optional shared Pacer every SYN (retries included) waits on, instead of `rate`
+
+    Raises:
+        PermissionError: without root / CAP_NET_RAW
+    """
+
+    def __init__(self, timeout: float = 1.0, retries: int = 1, rate: Optional[float] = None,
+                 source_port: Optional[int] = None, pacer: Optional[Pacer] = None):
+        self.timeout = timeout
+        self.retries = retries
+        self.rate = rate if pacer is None else None
+        self.pacer = pacer
+        self.sport = source_port or random.randrange(40000, 60000)
+        self.sent = 0
+        self.tcp = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_TCP)
+        try:
+            self.icmp: Optional[socket.socket] = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+        except OSError:
+            self.icmp = None
+        for s in filter(None, (self.tcp, self.icmp)):
+            s.setblocking(False)
+            try:
+                s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 22)
+                s.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 22)
+            except OSError:
+                pass
+        self._key = os.urandom(8)
+        self._base: Dict[str, Tuple[bytes, int]] = {}
+        self._pending: Dict[Tuple[str, int], List] = {}      # key -> [sent_at, tries]
+        self._expiry: Deque[Tuple[float, Tuple[str, int]]] = collections.deque()
+        self._resend: List[Tuple[str, int]] = []
+        self._results: List[PortResult] = []
+        self._on_result: Optional[Callable[[PortResult], None]] = None
+
+    def close(self):
+        for s in (self.tcp, self.icmp):
+            if s is not None:
+                s.close()
+
+    # Packets
+    def cookie(self, ip: str, port: int) -> int:
+        return hash((self._key, ip, port)) & 0xFFFFFFFF
+
+    def _prepare(self, ip: str) -> Tuple[bytes, int]:
+        # Source address the kernel will use toward ip, and the checksum sum of
+        # everything in the segment that doesn't change from port to port
+        entry = self._base.get(ip)
+        if entry is None:
+            probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                probe.connect((ip, 9))
+                src = socket.inet_aton(probe.getsockname()[0])
+            finally:
+                probe.close()
+            dst = socket.inet_aton(ip)
+            pseudo = struct.unpack("!6H", src + dst + struct.pack("!HH", socket.IPPROTO_TCP, TCP_LEN))
+            fixed = _TCP_HDR.pack(self.sport, 0, 0, 0, (TCP_LEN // 4) << 4, TCP_SYN, 1024, 0, 0) + MSS_OPTION
+            entry = (src, sum(pseudo) + sum(struct.unpack(f"!{TCP_LEN // 2}H", fixed)))
+            self._base[ip] = entry
+        return entry
+
+    def packet(self, ip: str, port: int) -> bytes:
+        _src, base = self._prepare(ip)
+        seq = self.cookie(ip, port)
+        check = ~_fold(base + port + (seq >> 16) + (seq & 0xFFFF)) & 0xFFFF
+        return _TCP_HDR.pack(self.sport, port, seq, 0, (TCP_LEN // 4) << 4, TCP_SYN, 1024, check, 0) + MSS_OPTION
+
+    # Replies
+    def _finish(self, key: Tuple[str, int], state: str, error: Optional[str] = None):
+        entry = self._pending.pop(key, None)
+        if entry is None:
+            return          # duplicate or late answer
+        ip, port = key
+        latency = round((time.perf_counter() - entry[0]) * 1000, 2)
+        r = PortResult(ip, port, state, latency_ms=latency,
+                       service=service_name(port) if state == "open" else "", error=error)
+        self._results.append(r)
+        if self._on_result:
+            self._on_result(r)
+
+    def _on_tcp(self):
+        while True:
+            try:
+                data = self.tcp.recv(65535)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            ihl = (data[0] & 0x0F) * 4
+            if len(data) < ihl + _TCP_PEEK.size or data[9] != socket.IPPROTO_TCP:
+                continue
+            sport, dport, _seq, ack, _off, flags = _TCP_PEEK.unpack_from(data, ihl)
+            if dport != self.sport:
+                continue
+            ip = socket.inet_ntoa(data[12:16])
+            if (ack - 1) & 0xFFFFFFFF != self.cookie(ip, sport):
+                continue
+            if flags & (TCP_SYN | TCP_ACK) == TCP_SYN | TCP_ACK:
+                self._finish((ip, sport), "open")
+            elif flags & TCP_RST:
+                self._finish((ip, sport), "closed")
+
+    def _on_icmp(self):
+        while True:
+            try:
+                data = self.icmp.recv(65535)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            ihl = (data[0] & 0x0F) * 4
+            # Destination unreachable quoting the IP header + first 8 bytes of our SYN
+            if len(data) < ihl + 8 + 20 + 8 or data[ihl] != 3:
+                continue
+            code = data[ihl + 1]
+            inner = ihl + 8
+            if data[inner + 9] != socket.IPPROTO_TCP:
+                continue
+            tcp = inner + (data[inner] & 0x0F) * 4
+            if len(data) < tcp + 8:
+                continue
+            sport, dport, seq = struct.unpack_from("!HHI", data, tcp)
+            ip = socket.inet_ntoa(data[inner + 16:inner + 20])
+            if sport != self.sport or seq != self.cookie(ip, dport):
+                continue
+            if code in _ICMP_FILTERED:
+                self._finish((ip, dport), "filtered", error=f"icmp unreachable (code {code})")
+
+    # Sending
+    async def _send(self, key: Tuple[str, int]):
+        ip, port = key
+        try:
+            pkt = self.packet(ip, port)
+        except OSError as e:
+            self._pending.setdefault(key, [time.perf_counter(), 0])
+            self._finish(key, "filtered", error=e.strerror or str(e))
+            return
+        while True:
+            try:
+                self.tcp.sendto(pkt, (ip, 0))
+                break
+            except (BlockingIOError, InterruptedError):
+                await asyncio.sleep(0.0005)
+            except OSError as e:
+                if e.errno == errno.ENOBUFS:
+                    GOVERNOR.note(e.errno)
+                    # Kernel queue full: back off instead of losing the probe
+                    await asyncio.sleep(0.001)
+                    continue
+                self._pending.setdefault(key, [time.perf_counter(), 0])
+                self._finish(key, "filtered", error=e.strerror or str(e))
+                return
+        now = time.perf_counter()
+        entry = self._pending.get(key)
+        if entry is None:
+            self._pending[key] = [now, 0]
+        else:
+            entry[0] = now
+            entry[1] += 1
+        self._expiry.append((now + self.timeout, key))
+        self.sent += 1
+
+    def _reap(self):
+        now = time.perf_counter()
+        while self._expiry and self._expiry[0][0] <= now:
+            deadline, key = self._expiry.popleft()
+            entry = self._pending.get(key)
+            if entry is None or entry[0] + self.timeout != deadline:
+                continue    # answered, or re-sent since
+            if entry[1] < self.retries:
+                self._resend.append(key)
+            else:
+                self._finish(key, "filtered")
+
+    async def run(self, targets: Iterable[Tuple[str, int]],
+                  on_result: Optional[Callable[[PortResult], None]] = None,
+                  stop: Optional[Callable[[], bool]] = None) -> List[PortResult]:
+        """Probe (ip, port) pairs; returns one PortResult per pair, in completion order."""
+        loop = asyncio.get_running_loop()
+        self._on_result = on_result
+        loop.add_reader(self.tcp.fileno(), self._on_tcp)
+        if self.icmp is not None:
+            loop.add_reader(self.icmp.fileno(), self._on_icmp)
+        pending_targets = iter(targets)
+        batch = BATCH
+        # Token bucket when paced: fractional rates per tick add up instead of rounding to one SYN a tick
+        tokens = 0.0
+        stamp = next_tick = loop.time()
+        exhausted = False
+        try:
+            while True:
+                self._reap()
+                if self.rate:
+                    now = loop.time()
+                    tokens = min(max(2.0, self.rate * TICK * 2), tokens + (now - stamp) * self.rate)
+                    stamp = now
+                    batch = int(tokens)
+                sent = 0
+                while sent < batch:
+                    if self._resend:
+                        key = self._resend.pop()
+                    elif exhausted:
+                        break
+                    else:
+                        key = next(pending_targets, None)
+                        if key is None or (stop and stop()):
+                            exhausted = True
+                            break
+                        key = (str(key[0]), int(key[1]))
+                    if self.pacer is not None:
+                        await self.pacer.wait(key[0])
+                    await self._send(key)
+                    sent += 1
+                tokens -= sent
+                if exhausted and not self._pending:
+                    break
+                if self.rate:
+                    next_tick = max(next_tick + TICK, loop.time() - TICK)
+                    await asyncio.sleep(max(0.0, next_tick - loop.time()))
+                elif exhausted or not sent:
+                    # Only waiting for answers now: sleep until the next probe expires
+                    wait = self._expiry[0][0] - time.perf_counter() if self._expiry else 0.01
+                    await asyncio.sleep(min(max(wait, 0.0), 0.05))
+                else:
+                    await asyncio.sleep(0)
+        finally:
+            loop.remove_reader(self.tcp.fileno())
+            if self.icmp is not None:
+                loop.remove_reader(self.icmp.fileno())
+        return self._results
+
+
+async def scan(targets: Iterable[Tuple[str, int]], timeout: float = 1.0, retries: int = 1,
+               rate: Optional[float] = None, on_result: Optional[Callable[[PortResult], None]] = None,
+               stop: Optional[Callable[[], bool]] = None, pacer: Optional[Pacer] = None) -> List[PortResult]:
+    """
+    SYN-scan (ip, port) pairs; same shape as tcp.scan().
+
+    Args:
+        targets: (ip, port) pairs with IPv4 address literals; consumed lazily
+        timeout: Seconds to wait for each answer
+        retries: Extra SYNs sent to silent ports before calling them filtered
+        rate: Maximum SYNs per second (None = unpaced)
+        on_result: Optional callback(PortResult) as each port is decided
+        stop: Optional callable; no new SYNs are sent once it returns True
+        pacer: Optional Pacer shared with other scans (takes the place of `rate`)
+
+    Returns:
+        One PortResult per pair (open, closed or filtered), in completion order
+
+    Raises:
+        PermissionError: without root / CAP_NET_RAW
+    """
+    scanner = SynScanner(timeout, retries, rate, pacer=pacer)
+    try:
+        return await scanner.run(targets, on_result, stop)
+    finally:
+        scanner.close()
+
+
+def scan_ports(host: str, ports: Iterable[int], timeout: float = 1.0, retries: int = 1,
+               rate: Optional[float] = None, on_result: Optional[Callable[[PortResult], None]] = None,
+               stop: Optional[Callable[[], bool]] = None, pacer: Optional[Pacer] = None) -> List[PortResult]:
+    """Blocking SYN scan of one host (name or IPv4 address); results sorted by port."""
+    from .targets import expand
+    ip = next(expand(host))
+    results = run_sync(scan(((ip, p) for p in ports), timeout, retries, rate, on_result, stop, pacer))
+    return sorted(results, key=lambda r: r.port)
@@ -0,0 +1,100 @@
+"""
+Target expansion: addresses, CIDR blocks, hostnames and host files into a
+lazy stream of IP strings, and the splitting of one large block into chunks
+for sharded sweeps.
+"""
+from __future__ import annotations
+import ipaddress, itertools, sys
+from typing import Iterable, Iterator, List, Optional
+
+CHUNK_HOSTS = 1024     # addresses per chunk when a block is split for sharded sweeps
+
+
+def read_hosts_file(path: str) -> Iterator[str]:
+    """Yield target specs from a file (or stdin for "-"), whitespace/comma separated, # comments skipped."""
+    f = sys.stdin if path == "-" else open(path)
+    try:
+        for line in f:
+            for spec in line.split("#", 1)[0].replace(",", " ").split():
+                yield spec
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def expand(spec: str) -> Iterator[str]:
+    """
+    Addresses for one target spec: an IP, a CIDR block (its usable hosts; the
+    block itself for /31, /32 and IPv6 /127-/128) or a hostname (first address).
+
+    Raises:
+        ValueError: if the spec is neither an address, a network nor a resolvable name
+    """
+    spec = spec.strip()
+    if "/" in spec:
+        net = ipaddress.ip_network(spec, strict=False)
+        hosts = net.hosts()
+        first = next(hosts, None)
+        if first is None:
+            yield str(net.network_address)
+            return
+        yield str(first)
+        for ip in hosts:
+            yield str(ip)
+        return
+    try:
+        yield str(ipaddress.ip_address(spec))
+        return
+    except ValueError:
+        pass
+    from .dns import resolve_host
+    addrs = resolve_host(spec)
+    if not addrs:
+        raise ValueError(f"cannot resolve {spec}")
+    yield next((a for a in addrs if ":" not in a), addrs[0])
+
+
+def expand_all(specs: Iterable[str], hosts_file: Optional[str] = None) -> Iterator[str]:
+    """Expand command-line specs, then every spec in a host file; a spec repeated verbatim is expanded once."""
+    seen = set()
+    sources = itertools.chain(specs, read_hosts_file(hosts_file) if hosts_file else ())
+    for spec in sources:
+        if spec in seen:
+            continue
+        seen.add(spec)
+        yield from expand(spec)
+
+
+def chunks(network: str, size: int = CHUNK_HOSTS) -> List[str]:
+    """
+    Split a CIDR block into sub-blocks of about `size` addresses (a power of
+    two, never smaller than the block itself allows), in address order.
+
+    Raises:
+        ValueError: if `network` is not a CIDR block
+    """
+    net = ipaddress.ip_network(network, strict=False)
+    bits = max(0, int(size).bit_length() - 1)
+    prefix = max(net.prefixlen, net.max_prefixlen - bits)
+    return [str(sub) for sub in net.subnets(new_prefix=prefix)]
+
+
+def chunk_hosts(network: str, chunk: str) -> Iterator[str]:
+    """
+    Addresses of `chunk` that expand(network) would yield: the enclosing
+    block's network and broadcast addresses are left out, the chunk's own
+    are not (they are ordinary hosts of the larger block).
+    """
+    net = ipaddress.ip_network(network, strict=False)
+    sub = ipaddress.ip_network(chunk, strict=False)
+    if sub == net:
+        yield from expand(network)
+        return
+    skip = set()
+    if net.version == 4 and net.prefixlen < 31:
+        skip = {net.network_address, net.broadcast_address}
+    elif net.version == 6 and net.prefixlen < 127:
+        skip = {net.network_address}
+    for ip in sub:
+        if ip not in skip:
+            yield str(ip)
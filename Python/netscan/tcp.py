@@ -0,0 +1,302 @@
+"""
+TCP connect engine.
+Every probe is a non-blocking connect on the caller's event loop. A fixed
+pool of workers pulls (ip, port) pairs from one iterator, so the number of
+sockets in flight never exceeds `concurrency` however many targets there
+are (nor, across all scans in the process, what governor.GOVERNOR allows),
+and sockets are closed with an RST so scans don't leave TIME_WAIT
+entries behind.
+
+Ports are open (handshake completed), closed (RST) or filtered (no answer
+before the timeout, or an ICMP unreachable). Once a host has dropped a few
+probes silently it gets a shorter timeout, derived from how fast it
+answers the probes it does answer, and a proportionally smaller share of
+the window, so firewalled hosts stop dominating scan time.
+"""
+from __future__ import annotations
+import asyncio, collections, errno, ipaddress, os, socket, struct, time
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+from ._aio import run_sync
+from .governor import GOVERNOR
+from .pacing import Pacer
+from .ports import service_name
+from .results import PortResult
+
+LINGER_RST = struct.pack("ii", 1, 0)
+_IN_PROGRESS = {errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN, getattr(errno, "WSAEWOULDBLOCK", -1)}
+_REFUSED = {errno.ECONNREFUSED, getattr(errno, "WSAECONNREFUSED", -1)}
+# Answered with an ICMP error (or stopped by a local firewall) rather than an RST
+_UNREACHABLE = {errno.EHOSTUNREACH, errno.ENETUNREACH, errno.EACCES, errno.EPERM, errno.ETIMEDOUT,
+                getattr(errno, "WSAEHOSTUNREACH", -1), getattr(errno, "WSAENETUNREACH", -1)}
+
+DROP_THRESHOLD = 3        # silent drops before a host counts as filtering
+RTT_FACTOR = 4            # a filtering host's timeout: this many times its slowest answer
+MIN_TIMEOUT = 0.2         # ... but never less than this
+MIN_WINDOW = 8            # connects a filtering host may always keep in flight
+MAX_DEFERRED = 4096       # pairs held back for filtering hosts before the reader waits
+
+
+def _ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+async def _read_banner(loop, sock: socket.socket, timeout: float) -> str:
+    # Give server-speaks-first services (SSH, SMTP, FTP, ...) the chance to greet, then
+    # nudge with a blank line. fingerprint.py does proper service identification.
+    try:
+        try:
+            data = await asyncio.wait_for(loop.sock_recv(sock, 1024), timeout / 2)
+        except asyncio.TimeoutError:
+            await asyncio.wait_for(loop.sock_sendall(sock, b"\r\n"), timeout)
+            data = await asyncio.wait_for(loop.sock_recv(sock, 1024), timeout)
+        return data.decode(errors="ignore").strip()
+    except (OSError, asyncio.TimeoutError):
+        return ""
+
+
+def _connect(loop, sock: socket.socket, addr, timeout: float) -> asyncio.Future:
+    """
+    Start a non-blocking connect. The future resolves to 0 on success, the
+    errno on failure, or None when `timeout` passes first - one writer
+    callback and one timer per probe, no extra task.
+    """
+    fut = loop.create_future()
+    err = sock.connect_ex(addr)
+    if err not in _IN_PROGRESS:
+        fut.set_result(err)
+        return fut
+    fd = sock.fileno()
+
+    def done(result):
+        loop.remove_writer(fd)
+        timer.cancel()
+        if not fut.done():
+            fut.set_result(result)
+
+    loop.add_writer(fd, lambda: done(sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)))
+    timer = loop.call_later(timeout, done, None)
+    # A cancelled probe must not leave the fd registered
+    fut.add_done_callback(lambda f: f.cancelled() and (loop.remove_writer(fd), timer.cancel()))
+    return fut
+
+
+async def _connect_compat(loop, sock: socket.socket, addr, timeout: float) -> Optional[int]:
+    # Proactor loops (Windows) cannot watch sockets for writability
+    try:
+        await asyncio.wait_for(loop.sock_connect(sock, addr), timeout)
+        return 0
+    except asyncio.TimeoutError:
+        return None
+    except OSError as e:
+        return e.errno or -1
+
+
+async def probe(ip: str, port: int, timeout: float = 0.8, banner: bool = False) -> PortResult:
+    """
+    Connect to one port. `ip` must be an address literal. The socket is
+    counted against the shared GOVERNOR, and a connect the kernel refuses
+    for lack of descriptors, buffers or ports is retried, not reported closed.
+    """
+    attempt = 0
+    while True:
+        async with GOVERNOR.slot():
+            r = await _attempt(ip, port, timeout, banner)
+        if isinstance(r, PortResult):
+            return r
+        if not await GOVERNOR.backoff(attempt):
+            return PortResult(ip, port, "filtered", error=os.strerror(r))
+        attempt += 1
+
+
+async def _attempt(ip: str, port: int, timeout: float, banner: bool) -> Union[PortResult, int]:
+    # A PortResult, or the errno when the attempt failed for local lack of resources
+    loop = asyncio.get_running_loop()
+    family = socket.AF_INET6 if ":" in ip else socket.AF_INET
+    try:
+        sock = socket.socket(family, socket.SOCK_STREAM)
+    except OSError as e:
+        if GOVERNOR.backpressure(e.errno):
+            return e.errno
+        return PortResult(ip, port, "filtered", error=e.strerror or str(e))
+    sock.setblocking(False)
+    start = time.perf_counter()
+    try:
+        if hasattr(loop, "add_writer") and os.name != "nt":
+            err = await _connect(loop, sock, (ip, port), timeout)
+        else:
+            err = await _connect_compat(loop, sock, (ip, port), timeout)
+        if err is None:
+            return PortResult(ip, port, "filtered", latency_ms=_ms(start))
+        if err in _REFUSED:
+            return PortResult(ip, port, "closed", latency_ms=_ms(start))
+        if err in _UNREACHABLE:
+            return PortResult(ip, port, "filtered", latency_ms=_ms(start), error=os.strerror(err))
+        if err and GOVERNOR.backpressure(err):
+            return err
+        if err:
+            return PortResult(ip, port, "closed", latency_ms=_ms(start), error=os.strerror(err))
+        if sock.getsockname() == sock.getpeername():
+            # Loopback simultaneous open: our ephemeral port happened to equal the target port
+            return PortResult(ip, port, "closed", latency_ms=_ms(start))
+        result = PortResult(ip, port, "open", latency_ms=_ms(start), service=service_name(port))
+        if banner:
+            result.banner = await _read_banner(loop, sock, timeout)
+        return result
+    finally:
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, LINGER_RST)
+        except OSError:
+            pass
+        sock.close()
+
+
+class _HostPace:
+    """What one host has answered and dropped so far, and the timeout and window that follow."""
+    __slots__ = ("answered", "dropped", "max_rtt", "inflight", "waiting")
+
+    def __init__(self):
+        self.answered = 0
+        self.dropped = 0
+        self.max_rtt = 0.0                  # seconds, slowest open/closed answer
+        self.inflight = 0
+        self.waiting: Deque[int] = collections.deque()
+
+    @property
+    def filtering(self) -> bool:
+        return self.dropped >= DROP_THRESHOLD
+
+    def timeout(self, base: float) -> float:
+        if not self.filtering:
+            return base
+        if self.answered:
+            return min(base, max(MIN_TIMEOUT, RTT_FACTOR * self.max_rtt))
+        return max(MIN_TIMEOUT, base / 2)
+
+    def window(self, base_timeout: float, concurrency: int) -> int:
+        # Shrink with the timeout, so the host's probe rate stays the same while it holds fewer sockets
+        if not self.filtering:
+            return concurrency
+        return max(MIN_WINDOW, int(concurrency * self.timeout(base_timeout) / base_timeout))
+
+
+class _Scheduler:
+    """
+    Hands (ip, port, timeout) to the workers. Pairs for a host that is
+    already using its whole window are held back (up to MAX_DEFERRED) and
+    handed out as its probes complete.
+    """
+
+    def __init__(self, targets: Iterable[Tuple[str, int]], timeout: float, concurrency: int,
+                 stop: Optional[Callable[[], bool]]):
+        self.source = iter(targets)
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.stop = stop
+        self.hosts: Dict[str, _HostPace] = {}
+        self.deferred = 0
+        self.exhausted = False
+        self.wake = asyncio.Event()
+
+    def _take(self, ip: str, host: _HostPace, port: int) -> Tuple[str, int, float]:
+        host.inflight += 1
+        return ip, port, host.timeout(self.timeout)
+
+    async def next(self) -> Optional[Tuple[str, int, float]]:
+        while True:
+            if self.stop and self.stop():
+                return None
+            if self.deferred:
+                for ip, host in self.hosts.items():
+                    if host.waiting and host.inflight < host.window(self.timeout, self.concurrency):
+                        self.deferred -= 1
+                        return self._take(ip, host, host.waiting.popleft())
+            while not self.exhausted and self.deferred < MAX_DEFERRED:
+                pair = next(self.source, None)
+                if pair is None:
+                    self.exhausted = True
+                    break
+                ip, port = pair
+                host = self.hosts.get(ip)
+                if host is None:
+                    host = self.hosts[ip] = _HostPace()
+                if host.inflight < host.window(self.timeout, self.concurrency):
+                    return self._take(ip, host, port)
+                host.waiting.append(port)
+                self.deferred += 1
+            if self.exhausted and not self.deferred:
+                return None
+            self.wake.clear()
+            await self.wake.wait()
+
+    def done(self, r: PortResult):
+        host = self.hosts[r.ip]
+        host.inflight -= 1
+        if r.state == "filtered" and r.error is None:
+            host.dropped += 1
+        elif r.latency_ms is not None:
+            host.answered += 1
+            host.max_rtt = max(host.max_rtt, r.latency_ms / 1000)
+        self.wake.set()
+
+
+async def scan(targets: Iterable[Tuple[str, int]], timeout: float = 0.8, concurrency: int = 200,
+               banner: bool = False, on_result: Optional[Callable[[PortResult], None]] = None,
+               stop: Optional[Callable[[], bool]] = None, pacer: Optional[Pacer] = None) -> List[PortResult]:
+    """
+    Connect-scan (ip, port) pairs with at most `concurrency` connects in flight.
+
+    Args:
+        targets: (ip, port) pairs; consumed lazily, so generators over huge ranges are fine
+        timeout: Seconds to wait for each connect (and each banner read); hosts seen
+            dropping probes get less, see _HostPace
+        concurrency: Connects in flight at once
+        banner: Read a banner from every open port
+        on_result: Optional callback(PortResult) as each probe completes
+        stop: Optional callable; the scan winds down once it returns True
+        pacer: Optional Pacer every connect waits on (SYNs per second)
+
+    Returns:
+        One PortResult per probed pair (open, closed or filtered, with the
+        observed latency), in completion order
+    """
+    results: List[PortResult] = []
+    sched = _Scheduler(targets, timeout, max(1, concurrency), stop)
+
+    async def worker():
+        while True:
+            item = await sched.next()
+            if item is None:
+                return
+            ip, port, probe_timeout = item
+            if pacer is not None:
+                await pacer.wait(ip)
+            r = await probe(ip, port, probe_timeout, banner)
+            sched.done(r)
+            results.append(r)
+            if on_result:
+                on_result(r)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return results
+
+
+def scan_ports(host: str, ports: Iterable[int], timeout: float = 0.8, concurrency: int = 200,
+               banner: bool = False, on_result: Optional[Callable[[PortResult], None]] = None,
+               stop: Optional[Callable[[], bool]] = None, pacer: Optional[Pacer] = None) -> List[PortResult]:
+    """
+    Blocking connect scan of one host; names are resolved once up front.
+
+    Returns:
+        PortResults sorted by port (empty if the name does not resolve)
+    """
+    try:
+        ip = str(ipaddress.ip_address(host))
+    except ValueError:
+        from .dns import resolve_host
+        addrs = resolve_host(host)
+        if not addrs:
+            return []
+        ip = addrs[0]
+    results = run_sync(scan(((ip, p) for p in ports), timeout, concurrency, banner, on_result, stop, pacer))
+    return sorted(results, key=lambda r: r.port)
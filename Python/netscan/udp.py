@@ -0,0 +1,376 @@
+"""
+UDP scan engine.
+
+Probes go out of a small shared set of unconnected sockets (one set per
+address family), carrying a payload the service is likely to answer: a DNS
+query, an NTP client request, an SNMP get, and so on. Any reply means open.
+On Linux the sockets set IP_RECVERR, so ICMP port-unreachables come back on
+the socket's error queue with the original destination attached and mark
+the port closed - no raw socket or root needed. Ports that stay silent
+after the retries are "open|filtered", as there is no way to tell the two
+apart.
+
+Most stacks rate-limit ICMP errors (Linux: a burst of 6, then one per
+second per peer), so probing a host quickly makes closed ports look silent.
+Each host gets its own token bucket: its rate grows while every probe
+draws an ICMP error and is halved once a retried port turns out closed
+(its first error was suppressed). Probes to different hosts interleave, so
+the scan as a whole stays fast.
+"""
+from __future__ import annotations
+import asyncio, collections, errno, ipaddress, socket, struct, sys, time
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from ._aio import run_sync
+from .governor import GOVERNOR
+from .pacing import Pacer
+from .ports import service_name
+from .results import PortResult
+
+HOST_RATE = 20.0          # probes per second per host to start with
+HOST_BURST = 6            # Linux sends this many ICMP errors before rate limiting
+MIN_HOST_RATE = 1.0       # one ICMP error per second survives any common limiter
+MAX_HOST_RATE = 5000.0    # ceiling for hosts that answer every probe (loopback, unlimited stacks)
+LIMITED_RETRIES = 2       # extra retries for silent ports on a rate-limited host
+SOCKETS = 4               # shared sockets per address family
+BUFFERED = 4096           # targets pulled ahead of sending
+TICK = 0.005
+
+IP_RECVERR = getattr(socket, "IP_RECVERR", 11)
+IPV6_RECVERR = getattr(socket, "IPV6_RECVERR", 25)
+_EE_ORIGIN_ICMP = (2, 3)  # SO_EE_ORIGIN_ICMP, SO_EE_ORIGIN_ICMP6
+_ERRQUEUE = sys.platform.startswith("linux") and hasattr(socket, "MSG_ERRQUEUE")
+
+
+def _tlv(tag: int, body: bytes) -> bytes:
+    return bytes((tag, len(body))) + body
+
+
+# SNMPv1 GetRequest for sysDescr.0 with community "public"
+_SNMP_GET = _tlv(0x30, _tlv(0x02, b"\x00") + _tlv(0x04, b"public") + _tlv(0xA0,
+    _tlv(0x02, b"\x4e\x53\x43\x4e") + _tlv(0x02, b"\x00") + _tlv(0x02, b"\x00") +
+    _tlv(0x30, _tlv(0x30, _tlv(0x06, b"\x2b\x06\x01\x02\x01\x01\x01\x00") + b"\x05\x00"))))
+
+# DNS query for the root NS set: any DNS server answers it, if only with REFUSED
+_DNS_QUERY = b"\x4e\x53\x01\x00\x00\x01\x00\x00\x00\x00\x00\x00\x00\x00\x02\x00\x01"
+
+# Payloads that make a listening service answer; other ports get an empty datagram
+PAYLOADS: Dict[int, bytes] = {
+    53: _DNS_QUERY,
+    111: struct.pack("!IIIIII", 0x4E534E53, 0, 2, 100000, 2, 0) + b"\x00" * 16,  # portmap NULL call
+    123: b"\x1b" + b"\x00" * 47,                                                # NTP v3 client request
+    137: b"\x4e\x53\x00\x10\x00\x01\x00\x00\x00\x00\x00\x00\x20" + b"CK" + b"A" * 30
+         + b"\x00\x00\x21\x00\x01",                                             # NetBIOS NBSTAT *
+    161: _SNMP_GET,
+    1900: b"M-SEARCH * HTTP/1.1\r\nHOST: 239.255.255.250:1900\r\n"
+          b"MAN: \"ssdp:discover\"\r\nMX: 1\r\nST: ssdp:all\r\n\r\n",
+    5353: _DNS_QUERY,
+    11211: b"\x00\x01\x00\x00\x00\x01\x00\x00version\r\n",                     # memcached UDP frame
+}
+
+
+def payload(port: int) -> bytes:
+    """Probe datagram for a port (empty if no service-specific payload is known)."""
+    return PAYLOADS.get(port, b"")
+
+
+def _printable(data: bytes, limit: int = 60) -> str:
+    # Readable runs from a binary reply (SNMP sysDescr, SSDP SERVER header, ...)
+    runs, cur = [], []
+    for b in data:
+        if 32 <= b < 127:
+            cur.append(chr(b))
+            continue
+        if len(cur) >= 4:
+            runs.append("".join(cur))
+        cur = []
+    if len(cur) >= 4:
+        runs.append("".join(cur))
+    return " ".join(runs)[:limit]
+
+
+class _Host:
+    # inflight counts ports queued or awaiting an answer
+    __slots__ = ("queue", "tokens", "rate", "stamp", "inflight", "limited")
+
+    def __init__(self, rate: float, now: float):
+        self.queue: Deque[int] = collections.deque()
+        self.tokens = float(HOST_BURST)
+        self.rate = rate
+        self.stamp = now
+        self.inflight = 0
+        self.limited = False
+
+
+class UdpScanner:
+    """
+    One UDP scan: the shared sockets, per-host pacing and the table of
+    probes awaiting a reply or an ICMP error.
+
+    Args:
+        timeout: Seconds to wait for each probe's answer
+        retries: Extra probes sent to a port that stays silent
+        rate: Overall probes per second (None = only the per-host limit applies)
+        host_rate: Starting probes per second per host; halved (down to 1/s)
+            when the host turns out to rate-limit its ICMP errors
+        sockets: Shared sockets per address family
+        pacer: Optional shared Pacer each probe also needs a token from
+    """
+
+    def __init__(self, timeout: float = 1.0, retries: int = 2, rate: Optional[float] = None,
+                 host_rate: float = HOST_RATE, sockets: int = SOCKETS, pacer: Optional[Pacer] = None):
+        self.timeout = timeout
+        self.retries = retries
+        self.rate = rate
+        self.pacer = pacer
+        self.host_rate = host_rate
+        self.nsockets = max(1, sockets)
+        self.sent = 0
+        self._socks: Dict[int, List[socket.socket]] = {}
+        self._next = 0
+        self._hosts: Dict[str, _Host] = {}
+        self._pending: Dict[Tuple[str, int], List] = {}      # key -> [sent_at, tries]
+        self._expiry: Deque[Tuple[float, Tuple[str, int]]] = collections.deque()
+        self._results: List[PortResult] = []
+        self._on_result: Optional[Callable[[PortResult], None]] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def close(self):
+        for socks in self._socks.values():
+            for s in socks:
+                if self._loop is not None:
+                    self._loop.remove_reader(s.fileno())
+                s.close()
+        self._socks.clear()
+
+    def _socket(self, family: int) -> socket.socket:
+        socks = self._socks.get(family)
+        if socks is None:
+            socks = []
+            for _ in range(self.nsockets):
+                s = socket.socket(family, socket.SOCK_DGRAM)
+                s.setblocking(False)
+                try:
+                    s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+                except OSError:
+                    pass
+                if _ERRQUEUE:
+                    level, opt = ((socket.IPPROTO_IP, IP_RECVERR) if family == socket.AF_INET
+                                  else (socket.IPPROTO_IPV6, IPV6_RECVERR))
+                    s.setsockopt(level, opt, 1)
+                self._loop.add_reader(s.fileno(), self._readable, s)
+                socks.append(s)
+            self._socks[family] = socks
+        self._next += 1
+        return socks[self._next % len(socks)]
+
+    # Answers
+    def _finish(self, key: Tuple[str, int], state: str, data: bytes = b"", error: Optional[str] = None):
+        entry = self._pending.pop(key, None)
+        if entry is None:
+            return          # duplicate or late answer
+        ip, port = key
+        host = self._hosts.get(ip)
+        if host is not None:
+            host.inflight -= 1
+            if state == "closed" and entry[1] > 0:
+                # An earlier probe to this closed port got no ICMP error back: the host rate-limits them
+                host.limited = True
+                host.rate = max(MIN_HOST_RATE, host.rate / 2)
+            elif state == "closed" and not host.limited:
+                host.rate = min(MAX_HOST_RATE, host.rate * 1.05)
+        latency = round((time.perf_counter() - entry[0]) * 1000, 2)
+        r = PortResult(ip, port, state, proto="udp", latency_ms=latency,
+                       service=service_name(port) if state == "open" else "",
+                       banner=_printable(data), error=error)
+        self._results.append(r)
+        if self._on_result:
+            self._on_result(r)
+
+    def _readable(self, sock: socket.socket):
+        while True:
+            try:
+                data, addr = sock.recvfrom(65535)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                # A queued ICMP error surfaced as the socket error; the details are on the error queue
+                if not self._drain_errors(sock):
+                    break
+                continue
+            self._finish((addr[0], addr[1]), "open", data)
+        self._drain_errors(sock)
+
+    def _drain_errors(self, sock: socket.socket) -> int:
+        if not _ERRQUEUE:
+            return 0
+        drained = 0
+        while True:
+            try:
+                _data, anc, _flags, addr = sock.recvmsg(0, 512, socket.MSG_ERRQUEUE)
+            except OSError:
+                return drained
+            drained += 1
+            for level, kind, cdata in anc:
+                if kind not in (IP_RECVERR, IPV6_RECVERR) or len(cdata) < 8:
+                    continue
+                ee_errno, origin, icmp_type, code = struct.unpack_from("=IBBB", cdata)
+                if origin not in _EE_ORIGIN_ICMP or not addr:
+                    continue
+                key = (addr[0], addr[1])
+                if ee_errno == errno.ECONNREFUSED:
+                    self._finish(key, "closed")
+                else:
+                    self._finish(key, "filtered", error=f"icmp unreachable (type {icmp_type}, code {code})")
+
+    # Sending
+    def _send(self, ip: str, port: int) -> bool:
+        """Send one probe; False if the socket buffer is full and the caller should back off."""
+        key = (ip, port)
+        family = socket.AF_INET6 if ":" in ip else socket.AF_INET
+        sock = self._socket(family)
+        for _attempt in range(2):
+            try:
+                sock.sendto(payload(port), (ip, port))
+                break
+            except (BlockingIOError, InterruptedError):
+                return False
+            except OSError as e:
+                if e.errno == errno.ENOBUFS:
+                    GOVERNOR.note(e.errno)
+                    return False
+                if e.errno == errno.ECONNREFUSED:
+                    # An earlier probe's ICMP error reported on this send; the datagram wasn't sent
+                    self._drain_errors(sock)
+                    continue
+                self._pending.setdefault(key, [time.perf_counter(), 0])
+                self._finish(key, "filtered", error=e.strerror or str(e))
+                return True
+        now = time.perf_counter()
+        entry = self._pending.get(key)
+        if entry is None:
+            self._pending[key] = [now, 0]
+        else:
+            entry[0] = now
+            entry[1] += 1
+        self._expiry.append((now + self.timeout, key))
+        self.sent += 1
+        return True
+
+    def _reap(self):
+        now = time.perf_counter()
+        while self._expiry and self._expiry[0][0] <= now:
+            deadline, key = self._expiry.popleft()
+            entry = self._pending.get(key)
+            if entry is None or entry[0] + self.timeout != deadline:
+                continue    # answered, or re-sent since
+            host = self._hosts[key[0]]
+            allowed = self.retries + (LIMITED_RETRIES if host.limited else 0)
+            if entry[1] < allowed:
+                host.queue.appendleft(key[1])
+            else:
+                self._finish(key, "open|filtered")
+
+    async def run(self, targets: Iterable[Tuple[str, int]],
+                  on_result: Optional[Callable[[PortResult], None]] = None,
+                  stop: Optional[Callable[[], bool]] = None) -> List[PortResult]:
+        """Probe (ip, port) pairs; returns one PortResult per pair, in completion order."""
+        self._loop = asyncio.get_running_loop()
+        self._on_result = on_result
+        source = iter(targets)
+        exhausted = False
+        queued = 0
+        tokens = 0.0
+        stamp = time.perf_counter()
+        try:
+            while True:
+                self._reap()
+                now = time.perf_counter()
+                while not exhausted and queued < BUFFERED:
+                    pair = next(source, None)
+                    if pair is None or (stop and stop()):
+                        exhausted = True
+                        break
+                    ip, port = str(pair[0]), int(pair[1])
+                    host = self._hosts.get(ip)
+                    if host is None:
+                        host = self._hosts[ip] = _Host(self.host_rate, now)
+                    host.queue.append(port)
+                    host.inflight += 1
+                    queued += 1
+                if self.rate:
+                    tokens = min(max(2.0, self.rate * TICK * 2), tokens + (now - stamp) * self.rate)
+                    stamp = now
+                blocked = False
+                for ip in list(self._hosts):
+                    host = self._hosts[ip]
+                    burst = max(float(HOST_BURST), host.rate * TICK * 2)
+                    host.tokens = min(burst, host.tokens + (now - host.stamp) * host.rate)
+                    host.stamp = now
+                    while (host.queue and host.tokens >= 1 and (not self.rate or tokens >= 1)
+                           and (self.pacer is None or self.pacer.try_take(ip))):
+                        port = host.queue.popleft()
+                        first = (ip, port) not in self._pending
+                        if not self._send(ip, port):
+                            host.queue.appendleft(port)
+                            blocked = True
+                            break
+                        host.tokens -= 1
+                        tokens -= 1
+                        queued -= first
+                    if host.inflight <= 0:
+                        del self._hosts[ip]
+                    if blocked or (self.rate and tokens < 1):
+                        break
+                if exhausted and not self._hosts:
+                    break
+                await asyncio.sleep(TICK if not blocked else 0.001)
+        finally:
+            self.close()
+        return self._results
+
+
+async def scan(targets: Iterable[Tuple[str, int]], timeout: float = 1.0, retries: int = 2,
+               rate: Optional[float] = None, host_rate: float = HOST_RATE,
+               on_result: Optional[Callable[[PortResult], None]] = None,
+               stop: Optional[Callable[[], bool]] = None, pacer: Optional[Pacer] = None) -> List[PortResult]:
+    """
+    UDP-scan (ip, port) pairs; same shape as tcp.scan().
+
+    Args:
+        targets: (ip, port) pairs with address literals; consumed lazily
+        timeout: Seconds to wait for each answer
+        retries: Extra probes sent to silent ports
+        rate: Overall probes per second (None = only the per-host limit applies)
+        host_rate: Starting probes per second per host
+        on_result: Optional callback(PortResult) as each port is decided
+        stop: Optional callable; no new ports are started once it returns True
+        pacer: Optional Pacer shared with other scans
+
+    Returns:
+        One PortResult per pair (proto "udp"; state open, closed, filtered or
+        open|filtered), in completion order
+    """
+    return await UdpScanner(timeout, retries, rate, host_rate, pacer=pacer).run(targets, on_result, stop)
+
+
+def scan_ports(host: str, ports: Iterable[int], timeout: float = 1.0, retries: int = 2,
+               rate: Optional[float] = None, host_rate: float = HOST_RATE,
+               on_result: Optional[Callable[[PortResult], None]] = None,
+               stop: Optional[Callable[[], bool]] = None, pacer: Optional[Pacer] = None) -> List[PortResult]:
+    """
+    Blocking UDP scan of one host; names are resolved once up front.
+
+    Returns:
+        PortResults sorted by port (empty if the name does not resolve)
+    """
+    try:
+        ip = str(ipaddress.ip_address(host))
+    except ValueError:
+        from .dns import resolve_host
+        addrs = resolve_host(host)
+        if not addrs:
+            return []
+        ip = addrs[0]
+    results = run_sync(scan(((ip, p) for p in ports), timeout, retries, rate, host_rate, on_result, stop, pacer))
+    return sorted(results, key=lambda r: r.port)